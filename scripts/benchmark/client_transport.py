@@ -0,0 +1,145 @@
+"""
+Benchmark of the HTTP transport used by Client against a local FastAPI server.
+"before" sends every call by a bare requests.post() and formats the request information eagerly, which is the
+    implementation before the change. "after" calls Client._call_server(), which reuses the keep-alive connections.
+Usage:
+    PYTHONPATH=./ python scripts/benchmark/client_transport.py
+"""
+
+import argparse
+import socket
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing import Process
+from typing import Any, Callable
+
+import requests
+import uvicorn
+from fastapi import APIRouter, FastAPI
+from pydantic import BaseModel
+
+from src.utils import Client, Server
+
+
+class EchoRequest(BaseModel):
+    item_list: list[str]
+
+
+class EchoResponse(BaseModel):
+    item_count: int
+
+
+class EchoServer(Server):
+    def __init__(self, router: APIRouter):
+        Server.__init__(self, router, object())
+        self.router.post("/echo")(self.echo)
+
+    @staticmethod
+    def echo(data: EchoRequest) -> EchoResponse:
+        return EchoResponse(item_count=len(data.item_list))
+
+    @staticmethod
+    def start_server(port: int) -> None:
+        app = FastAPI()
+        router = APIRouter()
+        _ = EchoServer(router)
+        app.include_router(router)
+        uvicorn.run(app, host="127.0.0.1", port=port, log_level="warning")
+
+
+class EchoClient(Client):
+    def echo(self, data: EchoRequest) -> EchoResponse:
+        response: EchoResponse = self._call_server("/echo", data, EchoResponse)
+        return response
+
+
+def get_free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind(("127.0.0.1", 0))
+        port: int = s.getsockname()[1]
+        return port
+
+
+def wait_for_server(server_address: str) -> None:
+    for _ in range(100):
+        try:
+            requests.post(f"{server_address}/ping", json={}, timeout=1)
+            return
+        except requests.exceptions.ConnectionError:
+            time.sleep(0.1)
+    raise RuntimeError("The server does not start.")
+
+
+def run(
+    name: str,
+    function: Callable[[], Any],
+    call_count: int,
+    thread_count: int,
+) -> None:
+    def timed_call(_: int) -> float:
+        start_time = time.perf_counter()
+        function()
+        return time.perf_counter() - start_time
+
+    start_time = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=thread_count) as executor:
+        latency_list = sorted(executor.map(timed_call, range(call_count)))
+    elapsed = time.perf_counter() - start_time
+    p99_latency = latency_list[
+        min(len(latency_list) - 1, int(len(latency_list) * 0.99))
+    ]
+    print(
+        f"{name:<8} requests/s: {call_count / elapsed:10.1f}, "
+        f"p50: {statistics.median(latency_list) * 1e3:8.3f} ms, "
+        f"p99: {p99_latency * 1e3:8.3f} ms"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--call_count", type=int, default=2000)
+    parser.add_argument("--thread_count", type=int, default=1)
+    parser.add_argument("--item_count", type=int, default=20)
+    parser.add_argument("--item_length", type=int, default=500)
+    args = parser.parse_args()
+    port = get_free_port()
+    server_address = f"http://127.0.0.1:{port}"
+    server_process = Process(target=EchoServer.start_server, args=(port,))
+    server_process.start()
+    try:
+        wait_for_server(server_address)
+        data = EchoRequest(item_list=["x" * args.item_length] * args.item_count)
+        client = EchoClient(server_address=server_address, request_timeout=10)
+
+        def call_before() -> EchoResponse:
+            data_dict = data.model_dump()
+            _ = (
+                f"Request information:\n"
+                f"- data_dict_str_length: {len(str(data_dict))}\n"
+                f"- data_dict: {data_dict}"
+            )
+            response = requests.post(
+                f"{server_address}/echo", json=data_dict, timeout=10
+            )
+            return EchoResponse.model_validate(response.json())
+
+        def call_after() -> EchoResponse:
+            return client.echo(data)
+
+        print(
+            f"Call count: {args.call_count}, thread count: {args.thread_count}, "
+            f"payload: {args.item_count} x {args.item_length} characters"
+        )
+        for _ in range(50):
+            # Warm up the server.
+            call_before()
+        for name, function in [("before", call_before), ("after", call_after)]:
+            run(name, function, args.call_count, args.thread_count)
+    finally:
+        server_process.terminate()
+        server_process.join()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+"""
+Benchmark of Task.calculate_metric(), whose dataset item lookup used to inspect the call stack to check its
+    caller for every session. It now reads a SampleMetricInfo, which is computed once per sample and cached.
+"after, cold" creates a new task for every pass, so the cache is empty; "after, warm" reuses the task.
+Usage:
+    PYTHONPATH=./ python scripts/benchmark/dataset_item_lookup.py
+"""
+
+import argparse
+import inspect
+import random
+import statistics
+import timeit
+import warnings
+from typing import Optional
+
+from src.tasks.task import (
+    Task,
+    DatasetItem,
+    MetricAccumulator,
+    SampleMetricInfo,
+    AgentResponseParserResult,
+)
+from src.tasks.instance.db_bench.task import DBBenchSkillUtility
+from src.typings import (
+    TaskName,
+    SampleIndex,
+    SampleStatus,
+    Session,
+    MetricDict,
+    SessionEvaluationOutcome,
+    SessionEvaluationRecord,
+    SessionMetricCalculationPartial,
+)
+
+
+class BenchmarkDatasetItem(DatasetItem):
+    skill_list: list[str]
+    difficulty_level: int
+
+    def get_skill_list(self) -> list[str]:
+        return self.skill_list
+
+    def get_difficulty_level(self) -> int:
+        return self.difficulty_level
+
+
+class BenchmarkTask(Task[BenchmarkDatasetItem]):
+    def __init__(self, dataset: dict[SampleIndex, BenchmarkDatasetItem]):
+        # The chat_history_item_factory is never used in the benchmark.
+        super().__init__(TaskName.DB_BENCH, None, 1)  # type: ignore[arg-type]
+        self._set_dataset(dataset)
+        # Only used by the implementation before the change.
+        self.dataset = dataset
+
+    def calculate_metric_with_stack_inspection(
+        self, session_partial_list: list[SessionMetricCalculationPartial]
+    ) -> MetricDict:
+        # The implementation before the change: the dataset item is looked up for every session, and the lookup
+        #   inspects the call stack to check its caller.
+        metric_accumulator = MetricAccumulator()
+        for session_partial in session_partial_list:
+            dataset_item = self._get_dataset_item_with_stack_inspection(
+                session_partial.sample_index
+            )
+            metric_accumulator.add(
+                session_partial,
+                SampleMetricInfo(
+                    skill_list=tuple(dataset_item.get_skill_list()),
+                    effective_skill_set=frozenset(
+                        dataset_item.get_effective_skill_list()
+                    ),
+                    difficulty_level=dataset_item.get_difficulty_level(),
+                ),
+                {},
+            )
+        return self._calculate_metric(metric_accumulator)
+
+    def _get_dataset_item_with_stack_inspection(
+        self, sample_index: SampleIndex
+    ) -> BenchmarkDatasetItem:
+        caller_frame = inspect.stack()[1]
+        if caller_frame.function not in ["_calculate_metric_based_on_skill"]:
+            warnings.warn("Unexpected caller.", RuntimeWarning)
+        return self.dataset[sample_index]
+
+    def _get_default_task_output(self) -> dict[str, Optional[str]]:
+        return {}
+
+    @staticmethod
+    def _parse_agent_response(agent_response: str) -> AgentResponseParserResult:
+        raise NotImplementedError()
+
+    def _reset(self, session: Session) -> None:
+        pass
+
+    def _interact(self, session: Session) -> None:
+        pass
+
+    def _complete(self, session: Session) -> None:
+        pass
+
+    def _release(self) -> None:
+        pass
+
+    def _calculate_metric(self, metric_accumulator: MetricAccumulator) -> MetricDict:
+        return {
+            "skill": self._calculate_metric_based_on_skill(
+                DBBenchSkillUtility, metric_accumulator
+            ),
+            "difficulty_level": self._calculate_metric_based_on_difficulty_level(
+                metric_accumulator
+            ),
+            "overall": self._calculate_overall_metric(metric_accumulator),
+        }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sample_count", type=int, default=500)
+    parser.add_argument("--repeat_count", type=int, default=5)
+    args = parser.parse_args()
+    random.seed(0)
+    warnings.simplefilter("ignore")
+    all_skill_list = DBBenchSkillUtility.get_all_skill_list()
+    dataset: dict[SampleIndex, BenchmarkDatasetItem] = {
+        sample_index: BenchmarkDatasetItem(
+            skill_list=random.sample(all_skill_list, random.randint(1, 4)),
+            difficulty_level=random.randint(0, 4),
+        )
+        for sample_index in range(args.sample_count)
+    }
+    task = BenchmarkTask(dataset)
+    session_partial_list = [
+        SessionMetricCalculationPartial(
+            sample_index=sample_index,
+            sample_status=SampleStatus.COMPLETED,
+            evaluation_record=SessionEvaluationRecord(
+                outcome=random.choice(
+                    [
+                        SessionEvaluationOutcome.CORRECT,
+                        SessionEvaluationOutcome.INCORRECT,
+                    ]
+                )
+            ),
+        )
+        for sample_index in dataset.keys()
+    ]
+    before_task = BenchmarkTask(dataset)
+    # The metric must not be changed by the benchmarked change.
+    assert before_task.calculate_metric_with_stack_inspection(
+        session_partial_list
+    ) == BenchmarkTask(dataset).calculate_metric(session_partial_list)
+
+    def calculate_metric_before() -> None:
+        before_task.calculate_metric_with_stack_inspection(session_partial_list)
+
+    def calculate_metric_after_cold() -> None:
+        # A new task has an empty SampleMetricInfo cache, which is the cost of the first calculation in a run.
+        BenchmarkTask(dataset).calculate_metric(session_partial_list)
+
+    after_task = BenchmarkTask(dataset)
+    after_task.calculate_metric(session_partial_list)
+
+    def calculate_metric_after_warm() -> None:
+        after_task.calculate_metric(session_partial_list)
+
+    print(f"Sample count: {args.sample_count}, repeat count: {args.repeat_count}")
+    for name, function in [
+        ("calculate_metric (before)", calculate_metric_before),
+        ("calculate_metric (after, cold)", calculate_metric_after_cold),
+        ("calculate_metric (after, warm)", calculate_metric_after_warm),
+    ]:
+        elapsed_list = timeit.repeat(function, number=1, repeat=args.repeat_count)
+        # Report the first pass separately, and the median of all the passes instead of the best one.
+        print(
+            f"{name:<32} first pass: {elapsed_list[0] * 1e3:10.3f} ms, "
+            f"median: {statistics.median(elapsed_list) * 1e3:10.3f} ms, "
+            f"median per sample: {statistics.median(elapsed_list) / args.sample_count * 1e6:10.3f} us"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""
+Benchmark of DBBenchContainer.execute() against a MySQL container started from the same image as the task.
+"before" reconnects a single connection for every call, which is the implementation before the change. "after"
+    calls DBBenchContainer.execute(), which borrows a connection from the pool and only reconnects it if the health
+    check fails.
+The Docker daemon must be available.
+Usage:
+    PYTHONPATH=./ python scripts/benchmark/db_bench_connection.py
+"""
+
+import argparse
+import statistics
+import time
+from typing import Callable, Optional
+
+import mysql.connector
+
+from src.tasks.instance.db_bench.container import DBBenchContainer
+
+DATABASE_NAME = "benchmark"
+
+
+def execute_with_reconnection(
+    connection: mysql.connector.MySQLConnection,
+    multiple_sql: str,
+    database: Optional[str] = None,
+) -> str:
+    # The implementation before the change.
+    connection.reconnect()
+    try:
+        cursor = connection.cursor()
+        if database:
+            cursor.execute(f"use `{database}`;")
+            cursor.fetchall()
+        sql_list = multiple_sql.split(";")
+        sql_list = [sql.strip() for sql in sql_list if sql.strip() != ""]
+        result = ""
+        for sql in sql_list:
+            cursor.execute(sql)
+            result = str(cursor.fetchall())
+            connection.commit()
+    except Exception as e:
+        result = str(e)
+    return result
+
+
+def measure(
+    execute: Callable[[str, Optional[str]], str],
+    sql_list: list[str],
+    repeat_count: int,
+) -> list[float]:
+    """
+    Return the number of statements per second of every pass.
+    """
+    statement_per_second_list: list[float] = []
+    for _ in range(repeat_count):
+        start_time = time.perf_counter()
+        for sql in sql_list:
+            execute(sql, DATABASE_NAME)
+        elapsed = time.perf_counter() - start_time
+        statement_per_second_list.append(len(sql_list) / elapsed)
+    return statement_per_second_list
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--image", type=str, default="mysql")
+    parser.add_argument("--statement_count", type=int, default=500)
+    parser.add_argument("--repeat_count", type=int, default=5)
+    args = parser.parse_args()
+    container = DBBenchContainer(args.image)
+    try:
+        container.execute(
+            f"CREATE DATABASE `{DATABASE_NAME}`;"
+            f"CREATE TABLE `{DATABASE_NAME}`.`item` (`id` INT PRIMARY KEY, `value` INT);"
+        )
+        connection = mysql.connector.connect(
+            host="127.0.0.1",
+            user="root",
+            password=container.password,
+            port=container.port,
+            pool_reset_session=True,
+        )
+        # The statements of a DBBench session: the inserts and updates are committed, and the selects read the table.
+        sql_list: list[str] = []
+        for index in range(args.statement_count):
+            match index % 3:
+                case 0:
+                    sql_list.append(
+                        f"INSERT INTO `item` (`id`, `value`) VALUES ({index}, {index}) "
+                        f"ON DUPLICATE KEY UPDATE `value` = `value` + 1"
+                    )
+                case 1:
+                    sql_list.append(
+                        f"UPDATE `item` SET `value` = `value` + 1 WHERE `id` = {index - 1}"
+                    )
+                case _:
+                    sql_list.append(
+                        f"SELECT `id`, `value` FROM `item` WHERE `id` <= {index} ORDER BY `id` DESC LIMIT 5"
+                    )
+        # The selects must return the same result through both implementations.
+        for sql in sql_list:
+            result = execute_with_reconnection(connection, sql, DATABASE_NAME)
+            if sql.startswith("SELECT"):
+                assert result == container.execute(sql, DATABASE_NAME)
+
+        print(
+            f"Image: {args.image}, statement count: {args.statement_count}, repeat count: {args.repeat_count}"
+        )
+        for name, execute in [
+            (
+                "execute (before)",
+                lambda sql, database: execute_with_reconnection(
+                    connection, sql, database
+                ),
+            ),
+            ("execute (after)", container.execute),
+        ]:
+            statement_per_second_list = measure(execute, sql_list, args.repeat_count)
+            # Report the first pass separately, and the median of all the passes instead of the best one.
+            print(
+                f"{name:<20} first pass: {statement_per_second_list[0]:10.1f} statements/s, "
+                f"median: {statistics.median(statement_per_second_list):10.1f} statements/s"
+            )
+        connection.close()
+    finally:
+        container.delete()
+
+
+if __name__ == "__main__":
+    main()
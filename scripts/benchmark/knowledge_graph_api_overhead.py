@@ -0,0 +1,116 @@
+"""
+Benchmark of the overhead of KnowledgeGraphAPI itself, excluding the SPARQL queries: the construction, which loads the
+    ontology, and the API calls of an action, whose queries are answered by an executor that returns fixed results.
+The ontology is synthetic and has the size of the ontology of the task (vocab.json and fb_roles), so that the numbers
+    do not depend on the data directory.
+Usage:
+    PYTHONPATH=./ python scripts/benchmark/knowledge_graph_api_overhead.py
+"""
+
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import time
+from typing import Callable
+
+from src.tasks.instance.knowledge_graph.api import KnowledgeGraphAPI, Variable
+from src.tasks.instance.knowledge_graph.utils.sparql_executor import SparqlExecutor
+
+
+class FixedResultSparqlExecutor(SparqlExecutor):
+    def __init__(self, result: list[str]):
+        super().__init__("", memory_cache_size=0)
+        self.result = result
+
+    def execute_query(self, query: str) -> list[str]:
+        return self.result
+
+    def get_out_relations(self, entity: str) -> list[str]:
+        return self.result
+
+
+def write_ontology(
+    ontology_dir_path: str, relation_count: int, attribute_count: int
+) -> tuple[list[str], list[str]]:
+    relation_list = [
+        f"domain{index % 100}.type{index}.relation{index}"
+        for index in range(relation_count)
+    ]
+    attribute_list = [
+        f"domain{index % 100}.type{index}.attribute{index}"
+        for index in range(attribute_count)
+    ]
+    with open(os.path.join(ontology_dir_path, "vocab.json"), "w") as f:
+        json.dump({"relations": relation_list, "attributes": attribute_list}, f)
+    with open(os.path.join(ontology_dir_path, "fb_roles"), "w") as f:
+        for relation in relation_list + attribute_list:
+            domain_type = ".".join(relation.split(".")[:2])
+            f.write(f"{domain_type} {relation} {domain_type}\n")
+    return relation_list, attribute_list
+
+
+def measure(function: Callable[[], object], repeat_count: int) -> list[float]:
+    elapsed_list: list[float] = []
+    for _ in range(repeat_count):
+        start_time = time.perf_counter()
+        function()
+        elapsed_list.append(time.perf_counter() - start_time)
+    return elapsed_list
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--relation_count", type=int, default=8000)
+    parser.add_argument("--attribute_count", type=int, default=2000)
+    # The number of relations and attributes returned by a query.
+    parser.add_argument("--result_size", type=int, default=200)
+    parser.add_argument("--repeat_count", type=int, default=200)
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as ontology_dir_path:
+        relation_list, attribute_list = write_ontology(
+            ontology_dir_path, args.relation_count, args.attribute_count
+        )
+        # Half of the results are not in the ontology, e.g., the relations of other namespaces.
+        result = (
+            relation_list[: args.result_size // 4]
+            + attribute_list[: args.result_size // 4]
+            + [f"other.type.relation{index}" for index in range(args.result_size // 2)]
+        )
+        sparql_executor = FixedResultSparqlExecutor(result)
+        construction_elapsed_list = measure(
+            lambda: KnowledgeGraphAPI(ontology_dir_path, sparql_executor),
+            max(args.repeat_count // 20, 3),
+        )
+        api = KnowledgeGraphAPI(ontology_dir_path, sparql_executor)
+        variable = Variable(
+            type=".".join(relation_list[0].split(".")[:2]),
+            program=f"(JOIN {relation_list[0]}_inv m.0abc)",
+        )
+        api.get_attributes(variable)
+        print(
+            f"Relation count: {args.relation_count}, attribute count: {args.attribute_count}, "
+            f"result size: {args.result_size}, repeat count: {args.repeat_count}"
+        )
+        print(
+            f"{'construction':<28} first: {construction_elapsed_list[0] * 1e3:8.2f} ms, "
+            f"median: {statistics.median(construction_elapsed_list) * 1e3:8.2f} ms"
+        )
+        for name, function in [
+            ("get_relations(entity)", lambda: api.get_relations("m.0abc")),
+            ("get_relations(variable)", lambda: api.get_relations(variable)),
+            ("get_neighbors", lambda: api.get_neighbors("m.0abc", relation_list[0])),
+            ("get_attributes", lambda: api.get_attributes(variable)),
+            ("argmax", lambda: api.argmax(variable, attribute_list[0])),
+        ]:
+            elapsed_list = measure(function, args.repeat_count)
+            # Report the first call separately, and the median of all the calls instead of the best one.
+            print(
+                f"{name:<28} first: {elapsed_list[0] * 1e6:8.1f} us, "
+                f"median: {statistics.median(elapsed_list) * 1e6:8.1f} us"
+            )
+
+
+if __name__ == "__main__":
+    main()
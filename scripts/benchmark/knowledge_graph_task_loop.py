@@ -0,0 +1,204 @@
+"""
+End-to-end benchmark of the knowledge_graph task loop (reset(), interact() and complete()) without network.
+The queries are answered by a LocalSparqlExecutor loaded from a synthetic Freebase-like subgraph, which is written to a
+    temporary directory together with the ontology, the dataset and the chat history items. A scripted agent replays
+    the same actions as a successful agent, so every session calls get_relations, get_neighbors, get_attributes,
+    argmax or count, and final_execute.
+"memory cache off" disables the memory cache of the executor, so that every query reaches rdflib; "memory cache on"
+    keeps the default size. The entities are drawn from a small pool, so the samples share queries as in the dataset.
+Usage:
+    PYTHONPATH=./ python scripts/benchmark/knowledge_graph_task_loop.py
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from src.factories.chat_history_item import ChatHistoryItemFactory
+from src.tasks.instance.knowledge_graph import KnowledgeGraph
+from src.typings import Role, SampleStatus, Session, TaskName
+
+NAMESPACE = "http://rdf.freebase.com/ns/"
+XSD_FLOAT = "http://www.w3.org/2001/XMLSchema#float"
+
+
+def write_fixture(
+    fixture_dir_path: str,
+    person_count: int,
+    sibling_count: int,
+    sample_count: int,
+    entity_pool_size: int,
+) -> tuple[str, dict[str, list[str]]]:
+    """
+    Write the subgraph, the ontology, the dataset and the chat history items. Return the path of the subgraph and
+        the actions of the scripted agent of every sample.
+    """
+    rng = random.Random(0)
+    # region Subgraph
+    height_dict = {
+        f"m.p{index}": round(rng.uniform(1.5, 2.0), 3) for index in range(person_count)
+    }
+    sibling_dict: dict[str, list[str]] = {}
+    line_list: list[str] = []
+    for person in height_dict:
+        sibling_dict[person] = rng.sample(
+            [other for other in height_dict if other != person], sibling_count
+        )
+        line_list.append(
+            f"<{NAMESPACE}{person}> <{NAMESPACE}type.object.type> <{NAMESPACE}people.person> ."
+        )
+        line_list.append(
+            f'<{NAMESPACE}{person}> <{NAMESPACE}people.person.height_meters> "{height_dict[person]}"^^<{XSD_FLOAT}> .'
+        )
+        for sibling in sibling_dict[person]:
+            line_list.append(
+                f"<{NAMESPACE}{person}> <{NAMESPACE}people.person.sibling> <{NAMESPACE}{sibling}> ."
+            )
+    graph_file_path = os.path.join(fixture_dir_path, "subgraph.nt")
+    with open(graph_file_path, "w") as f:
+        f.write("\n".join(line_list) + "\n")
+    # endregion
+    # region Ontology
+    ontology_dir_path = os.path.join(fixture_dir_path, "ontology")
+    os.makedirs(ontology_dir_path)
+    with open(os.path.join(ontology_dir_path, "vocab.json"), "w") as f:
+        json.dump(
+            {
+                "attributes": ["people.person.height_meters"],
+                "relations": ["people.person.sibling"],
+            },
+            f,
+        )
+    with open(os.path.join(ontology_dir_path, "fb_roles"), "w") as f:
+        f.write(
+            "people.person people.person.sibling people.person\n"
+            "people.person people.person.height_meters type.float\n"
+        )
+    # endregion
+    # region Dataset and the actions of the scripted agent
+    entity_pool = rng.sample(list(height_dict), entity_pool_size)
+    raw_dataset: dict[str, dict[str, object]] = {}
+    action_list_dict: dict[str, list[str]] = {}
+    for sample_index in range(sample_count):
+        person = rng.choice(entity_pool)
+        action_list = [
+            "Action: get_relations(Person)",
+            "Action: get_neighbors(Person, people.person.sibling)",
+        ]
+        if sample_index % 2 == 0:
+            question = "Who is the tallest sibling of Person?"
+            answer_list = [max(sibling_dict[person], key=lambda x: height_dict[x])]
+            action_list += [
+                "Action: get_attributes(#0)",
+                "Action: argmax(#0, people.person.height_meters)",
+            ]
+        else:
+            question = "How many siblings does Person have?"
+            answer_list = [str(len(set(sibling_dict[person])))]
+            action_list.append("Action: count(#0)")
+        action_list.append("Final Answer: #1")
+        raw_dataset[str(sample_index)] = {
+            "question": question,
+            "entity_dict": {"Person": person},
+            "answer_list": answer_list,
+        }
+        action_list_dict[str(sample_index)] = action_list
+    with open(os.path.join(fixture_dir_path, "entry_dict.json"), "w") as f:
+        json.dump(raw_dataset, f)
+    with open(os.path.join(fixture_dir_path, "chat_history_items.json"), "w") as f:
+        json.dump(
+            {
+                "value": {
+                    "0": {"role": "user", "content": "instruction"},
+                    "1": {"role": "agent", "content": "OK."},
+                }
+            },
+            f,
+        )
+    # endregion
+    return graph_file_path, action_list_dict
+
+
+def run_pass(task: KnowledgeGraph, action_list_dict: dict[str, list[str]]) -> int:
+    """
+    Run every sample once, and return the number of interactions.
+    """
+    interaction_count = 0
+    for sample_index, action_list in action_list_dict.items():
+        session = Session(task_name=TaskName.KNOWLEDGE_GRAPH, sample_index=sample_index)
+        task.reset(session)
+        for action in action_list:
+            session.chat_history.inject({"role": Role.AGENT, "content": action})
+            task.interact(session)
+            interaction_count += 1
+            if session.sample_status != SampleStatus.RUNNING:
+                break
+        task.complete(session)
+        # The scripted agent must answer correctly, otherwise the benchmark does not measure the task loop.
+        assert session.evaluation_record.detail_dict["f1_score"] == 1, session
+    return interaction_count
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--person_count", type=int, default=500)
+    parser.add_argument("--sibling_count", type=int, default=5)
+    parser.add_argument("--sample_count", type=int, default=100)
+    parser.add_argument("--entity_pool_size", type=int, default=20)
+    parser.add_argument("--repeat_count", type=int, default=5)
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as fixture_dir_path:
+        graph_file_path, action_list_dict = write_fixture(
+            fixture_dir_path,
+            args.person_count,
+            args.sibling_count,
+            args.sample_count,
+            args.entity_pool_size,
+        )
+        print(
+            f"Person count: {args.person_count}, sample count: {args.sample_count}, "
+            f"entity pool size: {args.entity_pool_size}, repeat count: {args.repeat_count}"
+        )
+        for name, memory_cache_size in [
+            ("memory cache off", 0),
+            ("memory cache on", 1024),
+        ]:
+            load_start_time = time.perf_counter()
+            task = KnowledgeGraph(
+                task_name=TaskName.KNOWLEDGE_GRAPH,
+                chat_history_item_factory=ChatHistoryItemFactory(
+                    os.path.join(fixture_dir_path, "chat_history_items.json")
+                ),
+                sparql_url="",
+                ontology_dir_path=os.path.join(fixture_dir_path, "ontology"),
+                data_file_path=os.path.join(fixture_dir_path, "entry_dict.json"),
+                max_round=15,
+                sparql_memory_cache_size=memory_cache_size,
+                sparql_graph_file_path=graph_file_path,
+            )
+            load_elapsed = time.perf_counter() - load_start_time
+            session_per_second_list: list[float] = []
+            interaction_per_second_list: list[float] = []
+            for _ in range(args.repeat_count):
+                start_time = time.perf_counter()
+                interaction_count = run_pass(task, action_list_dict)
+                elapsed = time.perf_counter() - start_time
+                session_per_second_list.append(len(action_list_dict) / elapsed)
+                interaction_per_second_list.append(interaction_count / elapsed)
+            task.release()
+            # Report the first pass separately, and the median of all the passes instead of the best one.
+            print(
+                f"{name:<18} load: {load_elapsed * 1e3:8.1f} ms, "
+                f"first pass: {session_per_second_list[0]:8.1f} sessions/s "
+                f"({interaction_per_second_list[0]:8.1f} interactions/s), "
+                f"median: {statistics.median(session_per_second_list):8.1f} sessions/s "
+                f"({statistics.median(interaction_per_second_list):8.1f} interactions/s)"
+            )
+
+
+if __name__ == "__main__":
+    main()
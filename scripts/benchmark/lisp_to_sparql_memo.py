@@ -0,0 +1,151 @@
+"""
+Benchmark of the compilation of the logical forms of the knowledge_graph task, i.e.,
+    LogicFormUtil.postprocess_raw_code() followed by LogicFormUtil.lisp_to_sparql(), whose outputs are memoized.
+The action lists of the dataset are replayed: the programs of the Variables are built in the same way as
+    KnowledgeGraphAPI, and compiled whenever KnowledgeGraphAPI would compile them (get_relations and get_attributes of
+    a Variable, and the final answer). No query is sent.
+"before" disables the memo tables, which is the implementation before the change. "after, cold" clears the memo
+    tables before every pass; "after, warm" keeps them, as a long-running task does.
+Usage:
+    PYTHONPATH=./ python scripts/benchmark/lisp_to_sparql_memo.py --data_file_path <entry_dict.json>
+"""
+
+import argparse
+import json
+import re
+import statistics
+import time
+from typing import Any, Callable
+
+from src.tasks.instance.knowledge_graph.utils.logic_form_util import LogicFormUtil
+
+MEMOIZED_FUNCTION_LIST: list[tuple[type, str]] = [
+    (LogicFormUtil, "postprocess_raw_code"),
+    (LogicFormUtil, "lisp_to_sparql"),
+]
+
+
+def get_program_list(action_list: list[str]) -> list[str]:
+    """
+    Return the programs compiled by KnowledgeGraphAPI when the actions are executed, in order.
+    The variable indices of the action lists are the indices of the Variables created by the actions.
+    """
+    variable_program_list: list[str] = []
+    compiled_program_list: list[str] = []
+
+    def get_argument(argument: str) -> str:
+        if argument.startswith("#"):
+            return variable_program_list[int(argument[1:])]
+        return argument
+
+    for action in action_list:
+        match = re.fullmatch(r"(\w+)\((.*)\)", action.strip())
+        assert match is not None, action
+        api_name = match.group(1)
+        argument_list = [argument.strip() for argument in match.group(2).split(",")]
+        match api_name:
+            case "get_relations" | "get_attributes":
+                if argument_list[0].startswith("#"):
+                    compiled_program_list.append(get_argument(argument_list[0]))
+            case "get_neighbors":
+                variable_program_list.append(
+                    f"(JOIN {argument_list[1] + '_inv'} {get_argument(argument_list[0])})"
+                )
+            case "intersection":
+                variable_program_list.append(
+                    f"(AND {get_argument(argument_list[0])} {get_argument(argument_list[1])})"
+                )
+            case "count":
+                variable_program_list.append(
+                    f"(COUNT {get_argument(argument_list[0])})"
+                )
+            case "argmax" | "argmin":
+                variable_program_list.append(
+                    f"({api_name.upper()} {get_argument(argument_list[0])} {argument_list[1]})"
+                )
+            case _:
+                raise ValueError(f"Unknown API name: {api_name}")
+    # The final answer is the last Variable.
+    compiled_program_list.append(variable_program_list[-1])
+    return compiled_program_list
+
+
+def compile_program_list(program_list: list[str]) -> None:
+    for program in program_list:
+        LogicFormUtil.lisp_to_sparql(LogicFormUtil.postprocess_raw_code(program))
+
+
+def measure(
+    program_list: list[str], repeat_count: int, before_pass: Callable[[], None]
+) -> list[float]:
+    elapsed_list: list[float] = []
+    for _ in range(repeat_count):
+        before_pass()
+        start_time = time.perf_counter()
+        compile_program_list(program_list)
+        elapsed_list.append(time.perf_counter() - start_time)
+    return elapsed_list
+
+
+def clear_memo_table() -> None:
+    for cls, name in MEMOIZED_FUNCTION_LIST:
+        getattr(cls, name).cache_clear()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--data_file_path",
+        type=str,
+        default="./data/v0303/knowledge_graph/processed/grailqa/v0417_tl2sc50_tl3sc50_tl4sc50_tl5sc50_tl6sc50_tl7sc50_tl8sc50_tl9sc46/entry_dict.json",
+    )
+    parser.add_argument("--repeat_count", type=int, default=10)
+    args = parser.parse_args()
+    raw_dataset: dict[str, dict[str, Any]] = json.load(open(args.data_file_path))
+    program_list: list[str] = []
+    for item in raw_dataset.values():
+        program_list.extend(get_program_list(item["action_list"]))
+    # The outputs must be the same with and without the memo tables.
+    clear_memo_table()
+    memoized_output_list = [
+        LogicFormUtil.lisp_to_sparql(LogicFormUtil.postprocess_raw_code(program))
+        for program in program_list
+    ]
+    # region Before: disable the memo tables
+    original_function_list = [
+        cls.__dict__[name] for cls, name in MEMOIZED_FUNCTION_LIST
+    ]
+    for cls, name in MEMOIZED_FUNCTION_LIST:
+        setattr(cls, name, staticmethod(getattr(cls, name).__wrapped__))
+    assert memoized_output_list == [
+        LogicFormUtil.lisp_to_sparql(LogicFormUtil.postprocess_raw_code(program))
+        for program in program_list
+    ]
+    elapsed_list_before = measure(program_list, args.repeat_count, lambda: None)
+    for (cls, name), original_function in zip(
+        MEMOIZED_FUNCTION_LIST, original_function_list
+    ):
+        setattr(cls, name, original_function)
+    # endregion
+    elapsed_list_cold = measure(program_list, args.repeat_count, clear_memo_table)
+    elapsed_list_warm = measure(program_list, args.repeat_count, lambda: None)
+    print(
+        f"Sample count: {len(raw_dataset)}, compiled program count: {len(program_list)}, "
+        f"unique program count: {len(set(program_list))}, repeat count: {args.repeat_count}"
+    )
+    for name, elapsed_list in [
+        ("before", elapsed_list_before),
+        ("after, cold", elapsed_list_cold),
+        ("after, warm", elapsed_list_warm),
+    ]:
+        # Report the first pass separately, and the median of all the passes instead of the best one.
+        print(
+            f"{name:<12} first pass: {elapsed_list[0] * 1e3:8.2f} ms, "
+            f"median: {statistics.median(elapsed_list) * 1e3:8.2f} ms"
+        )
+    for cls, name in MEMOIZED_FUNCTION_LIST:
+        print(f"{cls.__name__}.{name}: {getattr(cls, name).cache_info()}")
+
+
+if __name__ == "__main__":
+    main()
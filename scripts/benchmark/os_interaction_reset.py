@@ -0,0 +1,90 @@
+"""
+Benchmark of the reset of an OSInteractionContainer between two samples.
+"before" kills the container and starts a new one, which is the implementation before the change. "after" restores
+    the snapshot created after the start of the container.
+Every pass runs the same commands as a sample before the reset, and checks that the filesystem is pristine after it.
+The Docker daemon and the image built by scripts/dockerfile/os_interaction/default must be available.
+Usage:
+    PYTHONPATH=./ python scripts/benchmark/os_interaction_reset.py
+"""
+
+import argparse
+import statistics
+import time
+
+from src.tasks.instance.os_interaction.container import OSInteractionContainer
+from src.tasks.instance.os_interaction.utility import CommandItem, CommandName
+
+SAMPLE_SCRIPT = (
+    "useradd -m jack && mkdir -p /data/logs && echo 1 > /data/logs/a.log && "
+    "chmod 700 /etc && echo changed >> /etc/issue && rm /etc/legal && "
+    "(sleep 1000 > /dev/null 2>&1 &)"
+)
+CHECK_SCRIPT = (
+    "! id jack && [ ! -e /home/jack ] && [ ! -e /data ] && "
+    '[ "$(stat -c %a /etc)" = 755 ] && ! grep -q changed /etc/issue && [ -f /etc/legal ] && '
+    "! grep -qsx sleep /proc/[0-9]*/comm"
+)
+
+
+def run_sample(container: OSInteractionContainer) -> None:
+    execution_result = container.execute_independent(
+        CommandItem(command_name=CommandName.BASH, script=SAMPLE_SCRIPT)
+    )
+    assert execution_result.exit_code == 0, execution_result.output
+
+
+def check_pristine(container: OSInteractionContainer) -> None:
+    execution_result = container.execute_independent(
+        CommandItem(command_name=CommandName.BASH, script=CHECK_SCRIPT)
+    )
+    assert execution_result.exit_code == 0, execution_result.output
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--image", type=str, default="local-os/default")
+    parser.add_argument("--repeat_count", type=int, default=10)
+    args = parser.parse_args()
+    # region Before: kill the container and start a new one
+    elapsed_list_before: list[float] = []
+    container = OSInteractionContainer(20, args.image)
+    for _ in range(args.repeat_count):
+        run_sample(container)
+        start_time = time.perf_counter()
+        container.terminate()
+        container = OSInteractionContainer(20, args.image)
+        container.container.exec_run(["true"])
+        elapsed_list_before.append(time.perf_counter() - start_time)
+        check_pristine(container)
+    container.terminate()
+    # endregion
+    # region After: restore the snapshot
+    elapsed_list_after: list[float] = []
+    container = OSInteractionContainer(20, args.image)
+    snapshot_start_time = time.perf_counter()
+    container.create_snapshot()
+    snapshot_elapsed = time.perf_counter() - snapshot_start_time
+    for _ in range(args.repeat_count):
+        run_sample(container)
+        start_time = time.perf_counter()
+        container.restore_snapshot()
+        elapsed_list_after.append(time.perf_counter() - start_time)
+        check_pristine(container)
+    container.terminate()
+    # endregion
+    print(f"Image: {args.image}, repeat count: {args.repeat_count}")
+    print(f"{'create_snapshot (once)':<28} {snapshot_elapsed * 1e3:10.1f} ms")
+    for name, elapsed_list in [
+        ("reset (before)", elapsed_list_before),
+        ("reset (after)", elapsed_list_after),
+    ]:
+        # Report the first pass separately, and the median of all the passes instead of the best one.
+        print(
+            f"{name:<28} first pass: {elapsed_list[0] * 1e3:10.1f} ms, "
+            f"median: {statistics.median(elapsed_list) * 1e3:10.1f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -20,7 +20,7 @@ class Agent(ABC):
     def inference(self, session: Session) -> None:
         # The function takes Session as input for better exception handling
         chat_history = session.chat_history
-        assert chat_history.get_item_deep_copy(-1).role == Role.USER
+        assert chat_history.get_item(-1).role == Role.USER
         try:
             chat_history_item = self._inference(chat_history)
         except AgentException as e:
@@ -75,6 +75,18 @@ class Callback(ABC):
     def is_unique(cls) -> bool:
         raise NotImplementedError()
 
+    @classmethod
+    def is_session_concurrency_safe(cls) -> bool:
+        """
+        Whether the callback can be used when assignment_config.session_concurrency is greater than 1.
+        When sessions run concurrently, the events of different sessions are interleaved. The events are still
+            dispatched one at a time, and on_session_create, on_task_complete, on_state_save are still called in the
+            sample order, but a session may be created before the previous sessions are completed.
+        Return True only if the callback does not rely on the previous session being completed when a new session is
+            created.
+        """
+        return False
+
     def restore_state(self) -> None:
         pass
 
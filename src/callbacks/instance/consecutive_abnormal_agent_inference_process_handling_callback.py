@@ -35,7 +35,9 @@ class ConsecutiveAbnormalAgentInferenceProcessHandlingCallback(Callback):
         )
 
     def on_session_create(self, callback_args: CallbackArguments) -> None:
-        if self.consecutive_abnormality_count != self.tolerance_count:
+        # Use "<" instead of "!=". When sessions run concurrently, the sessions that are created before the tolerance
+        #   is reached are still completed, and they can increase the count beyond the tolerance.
+        if self.consecutive_abnormality_count < self.tolerance_count:
             return
         current_session = callback_args.current_session
         self.aborted_sample_index_list.append(current_session.sample_index)
@@ -53,6 +55,13 @@ class ConsecutiveAbnormalAgentInferenceProcessHandlingCallback(Callback):
     def is_unique(cls) -> bool:
         return True
 
+    @classmethod
+    def is_session_concurrency_safe(cls) -> bool:
+        # When sessions run concurrently, the sessions that are created before the tolerance is reached are not
+        #   aborted. Once the tolerance is reached, every new session is aborted until a session that is already
+        #   running completes normally.
+        return True
+
     def on_task_complete(self, callback_args: CallbackArguments) -> None:
         if (
             callback_args.current_session.sample_status.is_agent_inference_process_abnormal()
@@ -18,6 +18,12 @@ class CurrentSessionSavingCallback(Callback):
     def is_unique(cls) -> bool:
         return True
 
+    @classmethod
+    def is_session_concurrency_safe(cls) -> bool:
+        # All the sessions are saved to the same saving_path, so the file does not show a meaningful session when the
+        #   sessions run concurrently.
+        return False
+
     def on_session_create(self, callback_args: CallbackArguments) -> None:
         self._save_session(callback_args.current_session)
 
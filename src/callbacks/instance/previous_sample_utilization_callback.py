@@ -3,6 +3,7 @@ from typing import Optional
 import json
 
 from src.callbacks.callback import Callback, CallbackArguments
+from src.utils import Client
 from src.typings import (
     Session,
     Role,
@@ -61,7 +62,7 @@ class PreviousSampleUtilizationCallback(Callback):
         example_text = "\n"
         for i, session in enumerate(self.utilized_session_list):
             try:
-                question = session.chat_history.get_item_deep_copy(2).content
+                question = session.chat_history.get_item(2).content
             except:  # noqa
                 question = ""
             session_str = f"Question {question}:\n"
@@ -73,14 +74,18 @@ class PreviousSampleUtilizationCallback(Callback):
         first_user_prompt = self.original_first_user_prompt.replace(
             self.pattern, example_text
         )
-        callback_args.session_context.task.chat_history_item_factory.set(
-            0, Role.USER, first_user_prompt
-        )
+        task = callback_args.session_context.task
+        if isinstance(task, Client):
+            # Call the method of the chat_history_item_factory on the server, instead of fetching the factory first.
+            with task.batch() as batch:
+                batch.call_method(
+                    "chat_history_item_factory.set", 0, Role.USER, first_user_prompt
+                )
+        else:
+            task.chat_history_item_factory.set(0, Role.USER, first_user_prompt)
 
     def on_agent_inference(self, callback_args: CallbackArguments) -> None:
-        last_chat_history_item = (
-            callback_args.current_session.chat_history.get_item_deep_copy(-1)
-        )
+        last_chat_history_item = callback_args.current_session.chat_history.get_item(-1)
         assert last_chat_history_item.role == Role.AGENT
         last_agent_response = last_chat_history_item.content
         counterfeit_user_response_location = last_agent_response.find("\nuser: ")
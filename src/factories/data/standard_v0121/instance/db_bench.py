@@ -67,13 +67,13 @@ class DBBenchStandardDataFactory:
     def _get_structured_ground_truth(
         self, dataset_item: DBBenchDatasetItem
     ) -> str | list[tuple[str | int | float, ...]]:
-        self.pseudo_db_bench.container.conn.reconnect()
-        cursor = self.pseudo_db_bench.container.conn.cursor()
-        cursor.execute(f"use `{dataset_item.database_name}`")
-        cursor.fetchall()
-        cursor.execute(dataset_item.answer_info.ground_truth_sql)
-        structured_sql_output = cursor.fetchall()
-        self.pseudo_db_bench.container.conn.commit()
+        with self.pseudo_db_bench.container.connection() as connection:
+            cursor = connection.cursor()
+            cursor.execute(f"use `{dataset_item.database_name}`")
+            cursor.fetchall()
+            cursor.execute(dataset_item.answer_info.ground_truth_sql)
+            structured_sql_output = cursor.fetchall()
+            connection.commit()
         ground_truth: str | list[tuple[str | int | float, ...]]
         match dataset_item.answer_info.answer_type:
             case AnswerType.MD5:
@@ -83,7 +83,7 @@ class DBBenchStandardDataFactory:
                     self.pseudo_db_bench, ""  # type: ignore[arg-type]
                 )["answer"]
             case AnswerType.DIRECT:
-                ground_truth = structured_sql_output  # type: ignore[assignment]
+                ground_truth = structured_sql_output
                 # region Convert Decimal to float
                 for row_index, raw_row_tuple in enumerate(ground_truth):
                     processed_row_list = []
@@ -106,8 +106,9 @@ class DBBenchStandardDataFactory:
             # endregion
             # region Prepare dataset_item and database
             dataset_item = DBBench._construct_dataset_item(processed_entry)  # noqa
-            init_sql = DBBench._build_init_sql(dataset_item)  # noqa
-            self.pseudo_db_bench.container.execute(init_sql)
+            DBBench._initialize_database(  # noqa
+                self.pseudo_db_bench.container, dataset_item
+            )
             # endregion
             # region Get structured ground truth and set it
             ground_truth = self._get_structured_ground_truth(dataset_item)
@@ -142,8 +143,9 @@ class DBBenchStandardDataFactory:
         for sample_index, entry in processed_data_dict.items():
             # region Prepare dataset_item and database
             dataset_item = DBBench._construct_dataset_item(entry)  # noqa
-            init_sql = DBBench._build_init_sql(dataset_item)  # noqa
-            self.pseudo_db_bench.container.execute(init_sql)
+            DBBench._initialize_database(  # noqa
+                self.pseudo_db_bench.container, dataset_item
+            )
             # endregion
             # region Execute sql and validate the answer
             sql_execution_result = self.pseudo_db_bench.container.execute(
@@ -187,8 +187,9 @@ class EntryFactory:
         for entry_index, entry in entry_dict.items():
             # region Prepare dataset_item and database
             dataset_item = DBBench._construct_dataset_item(entry)  # noqa
-            init_sql = DBBench._build_init_sql(dataset_item)  # noqa
-            pseudo_db_bench.container.execute(init_sql)
+            DBBench._initialize_database(
+                pseudo_db_bench.container, dataset_item
+            )  # noqa
             # endregion
             # region Execute sql and validate the answer
             sql_execution_result = pseudo_db_bench.container.execute(
@@ -146,8 +146,9 @@ class PseudoDBBench:
             )
             self.current_dataset_item = pseudo_db_bench_dataset_item
             # endregion
-            init_sql = DBBench._build_init_sql(pseudo_db_bench_dataset_item)  # type: ignore[arg-type]  # noqa
-            self.container.execute(init_sql)
+            DBBench._initialize_database(  # noqa
+                self.container, pseudo_db_bench_dataset_item  # type: ignore[arg-type]
+            )
             SafeLogger.info(
                 f"Initiated database: {pseudo_db_bench_dataset_item.database_name}."
             )
@@ -163,13 +164,13 @@ class PseudoDBBench:
                 time.sleep(self.sql_execution_interval)
             # endregion
             # region Execute SQL
-            self.container.conn.reconnect()
-            cursor = self.container.conn.cursor()
-            cursor.execute(f"use `{pseudo_db_bench_dataset_item.database_name}`")
-            cursor.fetchall()
-            cursor.execute(sql)
-            structured_sql_output = cursor.fetchall()
-            self.container.conn.commit()
+            with self.container.connection() as connection:
+                cursor = connection.cursor()
+                cursor.execute(f"use `{pseudo_db_bench_dataset_item.database_name}`")
+                cursor.fetchall()
+                cursor.execute(sql)
+                structured_sql_output = cursor.fetchall()
+                connection.commit()
             time.sleep(self.sql_execution_interval)
             # endregion
             # region Set SQLExecutionResult values
@@ -633,26 +633,44 @@ class ActionInfoFactory:
             ActionInfoEntry.model_validate(entry_dict)
             for entry_dict in json.load(open(self.action_info_entry_list_path))
         ]
-        for entry in tqdm(action_info_entry_list, desc="Executing s_expression"):
+        # region Execute the s_expressions that are not cached
+        # The queries are independent, so they are sent concurrently in chunks.
+        missed_s_expression_list: list[str] = []
+        for entry in action_info_entry_list:
+            if entry.action_info is None:
+                continue
+            for s_expression in [
+                entry.grail_qa_entry.s_expression,
+                entry.action_info.simplified_s_expression,
+                entry.action_info.processed_s_expression,
+            ]:
+                if self.s_expression_cache.get_cache_item(s_expression) is None:
+                    missed_s_expression_list.append(s_expression)
+        missed_s_expression_list = list(dict.fromkeys(missed_s_expression_list))
+        chunk_size = self.sparql_executor.concurrency * 16
+        with tqdm(
+            total=len(missed_s_expression_list), desc="Executing s_expression"
+        ) as progress_bar:
+            for start_index in range(0, len(missed_s_expression_list), chunk_size):
+                s_expression_chunk = missed_s_expression_list[
+                    start_index : start_index + chunk_size
+                ]
+                result_list = self.sparql_executor.execute_query_list(
+                    [
+                        LogicFormUtil.lisp_to_sparql(s_expression)
+                        for s_expression in s_expression_chunk
+                    ]
+                )
+                for s_expression, result in zip(s_expression_chunk, result_list):
+                    self.s_expression_cache.set_cache_item(s_expression, result)
+                progress_bar.update(len(s_expression_chunk))
+        # endregion
+        for entry in action_info_entry_list:
             if entry.action_info is None:
                 continue
             original_s_expression = entry.grail_qa_entry.s_expression
             simplified_s_expression = entry.action_info.simplified_s_expression
             processed_s_expression = entry.action_info.processed_s_expression
-            for s_expression in [
-                original_s_expression,
-                simplified_s_expression,
-                processed_s_expression,
-            ]:
-                if self.s_expression_cache.get_cache_item(s_expression) is not None:
-                    continue
-                else:
-                    self.s_expression_cache.set_cache_item(
-                        s_expression,
-                        self.sparql_executor.execute_query(
-                            LogicFormUtil.lisp_to_sparql(s_expression)
-                        ),
-                    )
             original_result = self.s_expression_cache.get_cache_item(
                 original_s_expression
             )
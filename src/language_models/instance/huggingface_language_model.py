@@ -1,8 +1,7 @@
 import torch
 import os
 from typing import Any, Optional, Mapping, Sequence
-from transformers import AutoModelForCausalLM, AutoTokenizer  # type: ignore[import-untyped]
-import niuload  # type: ignore[import-untyped]
+from transformers import AutoModelForCausalLM, AutoTokenizer, DynamicCache  # type: ignore[import-untyped]
 
 from src.language_models.language_model import LanguageModel
 from src.typings import (
@@ -14,6 +13,17 @@ from src.typings import (
 )
 
 
+class PrefixCacheEntry:
+    """
+    The past key values of a token sequence, which is the prompt and the generated tokens of a previous inference.
+    The key values of the last generated token are never computed, so the entry covers token_ids[:-1].
+    """
+
+    def __init__(self, token_ids: torch.Tensor, past_key_values: DynamicCache):
+        self.token_ids = token_ids
+        self.past_key_values = past_key_values
+
+
 class HuggingfaceLanguageModel(LanguageModel):
     def __init__(
         self,
@@ -21,6 +31,9 @@ class HuggingfaceLanguageModel(LanguageModel):
         role_dict: Mapping[str, str],
         dtype: torch.dtype | str = torch.bfloat16,
         device_map: str | Mapping[str, Any] = "auto",
+        prefix_cache_size: int = 1,
+        response_cache_path: Optional[str] = None,
+        response_cache_maximum_size: int = 1 << 30,
     ):
         """
         Config explanations
@@ -28,17 +41,78 @@ class HuggingfaceLanguageModel(LanguageModel):
         device_map: I cannot find the detail documents.
             But it seems that it can be set to "cuda" or {"": "cuda"} to use GPU.
             Set "auto" can use multiple GPUs. (Amazing!)
+        prefix_cache_size: The number of conversations whose past key values are kept, so that the next round of the
+            conversation only needs to run the forward pass over the new tokens. Set it to 0 to disable the cache.
+            The sessions are run one by one (the model is not thread-safe), so 1 is enough to reuse the prefix
+            across the rounds of a session.
         """
-        super().__init__(role_dict)
+        super().__init__(role_dict, response_cache_path, response_cache_maximum_size)
+        self.model_name_or_path = model_name_or_path
         self.tokenizer = AutoTokenizer.from_pretrained(model_name_or_path)
         if device_map == "niuload":
             # https://zhuanlan.zhihu.com/p/792303768
+            import niuload  # type: ignore[import-untyped]
+
             device_map = niuload.balanced_load(
                 model_name_or_path, return_device_map_only=True
             )
         self.model = AutoModelForCausalLM.from_pretrained(
             model_name_or_path, device_map=device_map, torch_dtype=dtype
         )
+        assert prefix_cache_size >= 0
+        self.prefix_cache_size = prefix_cache_size
+        # The least recently used entry is at the beginning of the list.
+        self._prefix_cache_entry_list: list[PrefixCacheEntry] = []
+
+    def _pop_prefix_cache_entry(
+        self, input_ids: torch.Tensor
+    ) -> tuple[int, Optional[DynamicCache]]:
+        """
+        Find the entry that shares the longest prefix with input_ids (shape: [1, length]), remove it from the cache
+            and return (prefix_length, past_key_values). The past key values are cropped to prefix_length, which is
+            less than the length of input_ids, since generate() needs at least one uncached token.
+        The entry is removed because generate() extends the past key values in place. It is added back, with the
+            new tokens, by _push_prefix_cache_entry() after the inference succeeds.
+        """
+        best_entry_index: Optional[int] = None
+        best_prefix_length = 0
+        for entry_index, entry in enumerate(self._prefix_cache_entry_list):
+            entry_token_ids = entry.token_ids[: entry.past_key_values.get_seq_length()]
+            compared_length = min(entry_token_ids.shape[-1], input_ids.shape[-1] - 1)
+            mismatch_flag = (
+                entry_token_ids[:compared_length] != input_ids[0, :compared_length]
+            )
+            prefix_length = (
+                int(mismatch_flag.int().argmax())
+                if bool(mismatch_flag.any())
+                else compared_length
+            )
+            if prefix_length > best_prefix_length:
+                best_entry_index = entry_index
+                best_prefix_length = prefix_length
+        if best_entry_index is None:
+            return 0, None
+        past_key_values = self._prefix_cache_entry_list.pop(
+            best_entry_index
+        ).past_key_values
+        past_key_values.crop(best_prefix_length)
+        return best_prefix_length, past_key_values
+
+    def _push_prefix_cache_entry(
+        self, token_ids: torch.Tensor, past_key_values: DynamicCache
+    ) -> None:
+        self._prefix_cache_entry_list.append(
+            PrefixCacheEntry(token_ids[0], past_key_values)
+        )
+        # Evict the least recently used entries, which usually belong to the finished sessions.
+        while len(self._prefix_cache_entry_list) > self.prefix_cache_size:
+            self._prefix_cache_entry_list.pop(0)
+
+    def get_model_identity(self) -> str:
+        return f"{self.__class__.__name__}:{self.model_name_or_path}"
+
+    def clear_prefix_cache(self) -> None:
+        self._prefix_cache_entry_list.clear()
 
     def _convert_message_list_to_model_input_dict(
         self, batch_message_list: Sequence[Sequence[Mapping[str, str]]]
@@ -145,12 +219,29 @@ class HuggingfaceLanguageModel(LanguageModel):
                 f"Input length {batch_input_ids.shape[-1]} exceeds the model's max_position_embeddings "
                 f"{self.model.config.max_position_embeddings}."
             )
-        torch.cuda.synchronize()
+        # The prefix cache is only used without padding, which is the case of LanguageModelAgent.
+        prefix_cache_flag = (
+            self.prefix_cache_size > 0
+            and batch_input_ids.shape[0] == 1
+            and "past_key_values" not in inference_config_dict
+        )
+        past_key_values: Optional[DynamicCache] = None
+        if prefix_cache_flag:
+            _, past_key_values = self._pop_prefix_cache_entry(batch_input_ids)
+            if past_key_values is None:
+                past_key_values = DynamicCache()
+        if torch.cuda.is_available():
+            torch.cuda.synchronize()
         try:
             output_tensor: torch.Tensor = self.model.generate(
                 batch_input_ids,
                 attention_mask=batch_attention_mask,
                 pad_token_id=self.tokenizer.eos_token_id,  # Mute warning
+                **(
+                    {"past_key_values": past_key_values, "use_cache": True}
+                    if past_key_values is not None
+                    else {}
+                ),
                 **inference_config_dict,
             )
         except Exception as e:
@@ -163,7 +254,10 @@ class HuggingfaceLanguageModel(LanguageModel):
             else:
                 raise e
         finally:
-            torch.cuda.synchronize()
+            if torch.cuda.is_available():
+                torch.cuda.synchronize()
+        if past_key_values is not None:
+            self._push_prefix_cache_entry(output_tensor, past_key_values)
         # endregion
         # region Convert output to ChatHistoryItem
         output_str_list: Sequence[str] = self.tokenizer.batch_decode(
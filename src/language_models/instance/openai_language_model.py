@@ -2,6 +2,7 @@ from openai import OpenAI
 from openai.types.chat import ChatCompletionMessageParam
 import openai
 import os
+from concurrent.futures import ThreadPoolExecutor, Future
 from typing import Any, Optional, Sequence, Mapping, TypeGuard
 
 from src.language_models.language_model import LanguageModel
@@ -26,13 +27,18 @@ class OpenaiLanguageModel(LanguageModel):
         api_key: Optional[str] = None,
         base_url: Optional[str] = None,
         maximum_prompt_token_count: Optional[int] = None,
+        maximum_concurrency: int = 8,
+        response_cache_path: Optional[str] = None,
+        response_cache_maximum_size: int = 1 << 30,
     ):
         """
         max_prompt_tokens: The maximum number of tokens that can be used in the prompt. It can be used to set the
             context limit manually. If it is set to None, the context limit will be the same as the context length of
             the model selected.
+        maximum_concurrency: The maximum number of chat completions of a batch that are requested at the same time.
+            Each request is retried independently, and the outputs are kept in the order of the batch.
         """
-        super().__init__(role_dict)
+        super().__init__(role_dict, response_cache_path, response_cache_maximum_size)
         self.model_name = model_name
         if api_key is None:
             api_key = os.environ.get("OPENAI_API_KEY")
@@ -40,6 +46,16 @@ class OpenaiLanguageModel(LanguageModel):
             base_url = os.environ.get("OPENAI_BASE_URL")
         self.client = OpenAI(api_key=api_key, base_url=base_url)
         self.maximum_prompt_token_count = maximum_prompt_token_count
+        assert maximum_concurrency >= 1
+        self.maximum_concurrency = maximum_concurrency
+
+    def get_model_identity(self) -> str:
+        return f"{self.__class__.__name__}:{self.model_name}"
+
+    @classmethod
+    def is_thread_safe(cls) -> bool:
+        # The OpenAI client can be shared by threads, and _inference() does not modify the instance.
+        return True
 
     @staticmethod
     def _is_valid_message_list(
@@ -53,10 +69,31 @@ class OpenaiLanguageModel(LanguageModel):
                 return False
         return True
 
+    @staticmethod
+    def _get_retry_after(e: Exception) -> Optional[float]:
+        """
+        Return the waiting time requested by a rate-limited response, which is sent in the Retry-After header.
+        The OpenAI client already retries the rate-limited requests twice, the header is respected here once the
+            retries of the client are exhausted.
+        """
+        if not isinstance(e, openai.RateLimitError):
+            return None
+        header_dict = e.response.headers
+        try:
+            if (retry_after_ms := header_dict.get("retry-after-ms")) is not None:
+                return max(0.0, float(retry_after_ms) / 1000)
+            if (retry_after := header_dict.get("retry-after")) is not None:
+                return max(0.0, float(retry_after))
+        except ValueError:
+            # The header may also be an HTTP date, which is not used by the OpenAI-compatible servers in practice.
+            pass
+        return None
+
     @RetryHandler.handle(
         max_retries=3,
-        retry_on=(openai.BadRequestError,),
+        retry_on=(openai.BadRequestError, openai.RateLimitError),
         waiting_strategy=ExponentialBackoffStrategy(interval=(None, 60), multiplier=2),
+        retry_after_getter=_get_retry_after,
     )
     def _get_completion_content(
         self,
@@ -145,10 +182,28 @@ class OpenaiLanguageModel(LanguageModel):
         # endregion
         # region Generate output
         output_str_list: list[str] = []
-        for message_list in batch_message_list:
-            output_str_list.extend(
-                self._get_completion_content(message_list, inference_config_dict)
+        if len(batch_message_list) == 1 or self.maximum_concurrency == 1:
+            for message_list in batch_message_list:
+                output_str_list.extend(
+                    self._get_completion_content(message_list, inference_config_dict)
+                )
+        else:
+            executor = ThreadPoolExecutor(
+                max_workers=min(self.maximum_concurrency, len(batch_message_list))
             )
+            future_list: list[Future[Sequence[str]]] = [
+                executor.submit(
+                    self._get_completion_content, message_list, inference_config_dict
+                )
+                for message_list in batch_message_list
+            ]
+            try:
+                for future in future_list:
+                    output_str_list.extend(future.result())
+            finally:
+                # If a request fails, the requests that are not started are cancelled, and the exception of the
+                #   first failed request in the batch order is raised, which is the same as the sequential execution.
+                executor.shutdown(wait=True, cancel_futures=True)
         # endregion
         # region Convert output to ChatHistoryItem
         return [
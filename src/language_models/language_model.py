@@ -1,3 +1,4 @@
+import json
 from abc import ABC, abstractmethod
 from typing import Sequence, Mapping, Any, Optional, final
 
@@ -8,20 +9,54 @@ from src.typings import (
     ModelException,
     LanguageModelUnknownException,
 )
+from src.utils import DiskCache, SafeLogger
 
 
 class LanguageModel(ABC):
-    def __init__(self, role_dict: Mapping[str, str]) -> None:
+    def __init__(
+        self,
+        role_dict: Mapping[str, str],
+        response_cache_path: Optional[str] = None,
+        response_cache_maximum_size: int = 1 << 30,
+    ) -> None:
+        """
+        response_cache_path: The path of the SQLite file that caches the responses. If it is set, a request that is
+            the same as a previous one (same model, system prompt, messages and inference config) is answered from
+            the cache, so re-running or resuming an experiment does not pay for the same completion again.
+            The cache is disabled by default.
+        response_cache_maximum_size: The maximum size of the cache file in bytes, the least recently used responses
+            are evicted when it is exceeded.
+        """
         self.role_dict: Mapping[Role, str] = {
             Role(role): role_dict[role] for role in Role
         }
+        self.response_cache: Optional[DiskCache] = (
+            DiskCache(response_cache_path, response_cache_maximum_size)
+            if response_cache_path is not None
+            else None
+        )
+
+    @classmethod
+    def is_thread_safe(cls) -> bool:
+        """
+        Whether inference() can be called from several threads at the same time.
+        The language model instances are shared by the sessions when assignment_config.session_concurrency is greater
+            than 1, so only thread-safe language models can be used in that case.
+        """
+        return False
+
+    def get_model_identity(self) -> str:
+        """
+        The identity of the model, which is part of the key of the response cache.
+        Override it if the class can load different models.
+        """
+        return self.__class__.__name__
 
     def _convert_chat_history_to_message_list(
         self, chat_history: ChatHistory
     ) -> list[Mapping[str, str]]:
         message_list: list[Mapping[str, str]] = []
-        for item_index in range(chat_history.get_value_length()):
-            chat_history_item = chat_history.get_item_deep_copy(item_index)
+        for chat_history_item in chat_history.iterate_item():
             message_list.append(
                 {
                     "role": self.role_dict[chat_history_item.role],
@@ -38,19 +73,114 @@ class LanguageModel(ABC):
         system_prompt: str = "You are a helpful assistant.",
     ) -> Sequence[ChatHistoryItem]:
         for chat_history in batch_chat_history:
-            assert chat_history.get_item_deep_copy(-1).role == Role.USER
+            assert chat_history.get_item(-1).role == Role.USER
         try:
             if inference_config_dict is None:
                 inference_config_dict = {}
-            inference_result = self._inference(
-                batch_chat_history, inference_config_dict, system_prompt
-            )
+            if self.response_cache is None:
+                inference_result = self._inference(
+                    batch_chat_history, inference_config_dict, system_prompt
+                )
+            else:
+                inference_result = self._inference_with_response_cache(
+                    self.response_cache,
+                    batch_chat_history,
+                    inference_config_dict,
+                    system_prompt,
+                )
         except ModelException as e:
             raise e
         except Exception as e:
             raise LanguageModelUnknownException(str(e)) from e
         return inference_result
 
+    def _get_response_cache_key_list(
+        self,
+        batch_chat_history: Sequence[ChatHistory],
+        inference_config_dict: Mapping[str, Any],
+        system_prompt: str,
+    ) -> list[str]:
+        key_list: list[str] = []
+        occurrence_count_dict: dict[str, int] = {}
+        for chat_history in batch_chat_history:
+            request_str = json.dumps(
+                {
+                    "model_identity": self.get_model_identity(),
+                    "system_prompt": system_prompt,
+                    "message_list": self._convert_chat_history_to_message_list(
+                        chat_history
+                    ),
+                    "inference_config_dict": inference_config_dict,
+                },
+                sort_keys=True,
+                ensure_ascii=False,
+                separators=(",", ":"),
+                default=str,
+            )
+            # The same request may appear several times in a batch to get different samples (e.g.,
+            #   GroupSelfConsistencyCallback), each occurrence is cached separately.
+            occurrence_index = occurrence_count_dict.get(request_str, 0)
+            occurrence_count_dict[request_str] = occurrence_index + 1
+            key_list.append(f"{request_str}#{occurrence_index}")
+        return key_list
+
+    @final
+    def _inference_with_response_cache(
+        self,
+        response_cache: DiskCache,
+        batch_chat_history: Sequence[ChatHistory],
+        inference_config_dict: Mapping[str, Any],
+        system_prompt: str,
+    ) -> Sequence[ChatHistoryItem]:
+        """
+        Only the requests that are not cached are passed to _inference(). A request may have several responses (e.g.,
+            inference_config_dict["n"] > 1 for OpenaiLanguageModel), so the responses of each request are cached as a
+            list.
+        """
+        key_list = self._get_response_cache_key_list(
+            batch_chat_history, inference_config_dict, system_prompt
+        )
+        content_list_list: list[Optional[list[str]]] = []
+        for key in key_list:
+            cached_value = response_cache.get(key)
+            content_list_list.append(
+                json.loads(cached_value) if cached_value is not None else None
+            )
+        missed_index_list = [
+            index
+            for index, content_list in enumerate(content_list_list)
+            if content_list is None
+        ]
+        if len(missed_index_list) > 0:
+            missed_result = self._inference(
+                [batch_chat_history[index] for index in missed_index_list],
+                inference_config_dict,
+                system_prompt,
+            )
+            assert len(missed_result) % len(missed_index_list) == 0
+            response_count = len(missed_result) // len(missed_index_list)
+            for missed_position, index in enumerate(missed_index_list):
+                content_list = [
+                    chat_history_item.content
+                    for chat_history_item in missed_result[
+                        missed_position
+                        * response_count : (missed_position + 1)
+                        * response_count
+                    ]
+                ]
+                response_cache.set(key_list[index], json.dumps(content_list).encode())
+                content_list_list[index] = content_list
+        SafeLogger.debug(
+            f"[LanguageModel] Response cache hit count: {response_cache.hit_count}, "
+            f"miss count: {response_cache.miss_count}."
+        )
+        return [
+            ChatHistoryItem(role=Role.AGENT, content=content)
+            for content_list in content_list_list
+            if content_list is not None
+            for content in content_list
+        ]
+
     @abstractmethod
     def _inference(
         self,
@@ -3,11 +3,19 @@ import json
 import os
 import yaml
 import copy
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
 from enum import StrEnum
 from typing import Any, Mapping, Sequence, Optional
 import coredumpy  # type: ignore[import-untyped]
 
-from src.utils import ConfigLoader, SingletonLogger
+from src.utils import (
+    ConfigLoader,
+    SingletonLogger,
+    SessionJournal,
+    SessionResumeIndex,
+)
 from src.typings import (
     AssignmentConfig,
     EnvironmentConfig,
@@ -19,6 +27,7 @@ from src.typings import (
     PathConfig,
     GeneralInstanceFactory,
     SessionMetricCalculationPartial,
+    MetricDict,
 )
 from src.tasks import Task, DatasetItem
 from src.agents import Agent
@@ -48,12 +57,21 @@ class ConfigUtility:
         self.assignment_config = assignment_config
         self.environment_config = environment_config
         self.path_config = path_config
+        # Set in construct(), used by construct_worker_list().
+        self._task_instance_factory_snapshot: Optional[GeneralInstanceFactory] = None
+        # Set in construct(), used by validate().
+        self._thread_unsafe_language_model_name_list: list[str] = []
 
     def preprocess(self) -> None:
         if self.environment_config.task_client:
             self.assignment_config.task = self.environment_config.task_client
 
     def construct(self) -> tuple[Task[DatasetItem], Agent, dict[str, Callback]]:
+        # GeneralInstanceFactory.create() replaces the nested instance factories in the parameters with the created
+        #   instances. Keep an untouched copy, so that construct_worker_list() can create independent tasks.
+        self._task_instance_factory_snapshot = self.assignment_config.task.model_copy(
+            deep=True
+        )
         # Maybe task will be Task or TaskClient, but it doesn't matter!
         task: Task[DatasetItem] = self.assignment_config.task.create()
         # region Construct language_model_dict
@@ -64,6 +82,12 @@ class ConfigUtility:
             key: value.create()
             for key, value in self.assignment_config.language_model_dict.items()
         }
+        # The language model instances are shared by the workers, see construct_worker_list().
+        self._thread_unsafe_language_model_name_list = [
+            key
+            for key, language_model in language_model_dict.items()
+            if not language_model.is_thread_safe()
+        ]
         agent_instance_factory: GeneralInstanceFactory = self.assignment_config.agent
         if (
             language_model_name := agent_instance_factory.parameters.get(
@@ -80,10 +104,47 @@ class ConfigUtility:
         )
         return task, agent, callback_dict
 
-    def validate(self, task: Task[DatasetItem], agent: Agent) -> None:
+    def construct_worker_list(
+        self, task: Task[DatasetItem], agent: Agent
+    ) -> list[tuple[Task[DatasetItem], Agent]]:
+        """
+        Construct the (task, agent) pairs that are used to run the sessions concurrently.
+        The first pair is always the (task, agent) returned by construct(). The other pairs own independent tasks
+            (including the chat_history_item_factory), and share the language model instances with the first pair.
+        """
+        assert self._task_instance_factory_snapshot is not None
+        worker_list: list[tuple[Task[DatasetItem], Agent]] = [(task, agent)]
+        for _ in range(self.assignment_config.session_concurrency - 1):
+            worker_task: Task[DatasetItem] = (
+                self._task_instance_factory_snapshot.model_copy(deep=True).create()
+            )
+            # The language model instance has already been injected into the parameters in construct().
+            worker_agent: Agent = self.assignment_config.agent.create()
+            worker_list.append((worker_task, worker_agent))
+        return worker_list
+
+    def validate(
+        self,
+        task: Task[DatasetItem],
+        agent: Agent,
+        callback_dict: Mapping[str, Callback],
+    ) -> None:
         sample_index_list = task.get_sample_index_list()
         for selected_sample_index in self.assignment_config.sample_order:
             assert selected_sample_index in sample_index_list
+        assert self.assignment_config.session_concurrency > 0
+        if self.assignment_config.session_concurrency > 1:
+            # A TaskServer only hosts one task, so it cannot serve concurrent sessions.
+            assert not self.environment_config.task_client
+            for callback_id, callback in callback_dict.items():
+                assert (
+                    callback.is_session_concurrency_safe()
+                ), f"Callback {callback_id} cannot be used when session_concurrency is greater than 1."
+            for language_model_name in self._thread_unsafe_language_model_name_list:
+                raise AssertionError(
+                    f"Language model {language_model_name} cannot be shared by concurrent sessions, "
+                    f"set session_concurrency to 1."
+                )
 
     def postprocess(self, task: Task[DatasetItem], agent: Agent) -> None:
         if self.assignment_config.sample_order == "default":
@@ -208,6 +269,9 @@ class ConfigUtility:
             output_dir=raw_config["assignment_config"]["output_dir"],
             sample_order=raw_config["assignment_config"]["sample_order"],
             callback_dict=assignment_callback_dict,
+            session_concurrency=raw_config["assignment_config"].get(
+                "session_concurrency", 1
+            ),
         )
         # endregion
         # region Convert raw_config into environment_config
@@ -271,6 +335,12 @@ class ConfigUtility:
             session_list_output_path=os.path.join(
                 assignment_config.output_dir, "runs.json"
             ),
+            session_journal_path=os.path.join(
+                assignment_config.output_dir, "runs.jsonl"
+            ),
+            session_resume_index_path=os.path.join(
+                assignment_config.output_dir, "runs_index.jsonl"
+            ),
             metric_output_path=os.path.join(
                 assignment_config.output_dir, "metric.json"
             ),
@@ -294,6 +364,166 @@ class ConfigUtility:
         )
 
 
+def save_metric(metric: MetricDict, metric_output_path: str) -> None:
+    # Write to a temporary file first, so that metric.json is always complete when it is refreshed during the run.
+    temporary_metric_output_path = f"{metric_output_path}.tmp"
+    json.dump(
+        metric,
+        open(temporary_metric_output_path, "w"),  # noqa
+        indent=2,
+    )
+    os.replace(temporary_metric_output_path, metric_output_path)
+
+
+class SessionScheduler:
+    """
+    Run the sessions with a pool of (task, agent) workers, see ConfigUtility.construct_worker_list.
+    - Sessions are created in the sample order in the main thread, each of them is bound to an idle worker.
+    - task.reset(), agent.inference(), task.interact() and task.complete() of different sessions run in parallel.
+    - Callback events are dispatched one at a time. on_session_create, on_task_complete and on_state_save are
+        dispatched in the sample order, since the sessions are committed in the order they are created.
+    - A worker is released only after its session is committed.
+    - When a session is committed, it is added to the metric maintained by the task of the first worker, and
+        metric.json is refreshed.
+    - The sessions are appended to the journal (runs.jsonl) when they are committed. runs.json is compacted from the
+        journal whenever the journal doubles in size, and at the end of the run, so it may lag behind the journal.
+    When there is only one worker, the sessions are run in the main thread, which is the same as running them one by
+        one.
+    """
+
+    def __init__(
+        self,
+        worker_list: Sequence[tuple[Task[DatasetItem], Agent]],
+        callback_handler: CallbackHandler,
+        session_journal: SessionJournal,
+        session_resume_index: SessionResumeIndex,
+        session_list_output_path: str,
+        metric_output_path: str,
+        logger: SingletonLogger,
+    ):
+        assert len(worker_list) > 0
+        self.worker_list = worker_list
+        self.callback_handler = callback_handler
+        self.session_journal = session_journal
+        self.session_resume_index = session_resume_index
+        self.session_list_output_path = session_list_output_path
+        self.metric_output_path = metric_output_path
+        self.logger = logger
+        self.callback_lock = threading.Lock()
+
+    def run(self, sample_order: Sequence[SampleIndex]) -> None:
+        if len(self.worker_list) == 1:
+            task, agent = self.worker_list[0]
+            for sample_index in sample_order:
+                callback_args = self._create_session(sample_index, task, agent)
+                self._run_session(callback_args)
+                self._commit_session(callback_args)
+            return
+        # Use pop() to get an idle worker, so that the first worker is used first.
+        idle_worker_list = list(reversed(self.worker_list))
+        running_session_queue: deque[
+            tuple[CallbackArguments, Future[None], tuple[Task[DatasetItem], Agent]]
+        ] = deque()
+
+        def commit_head_session() -> None:
+            callback_args, future, worker = running_session_queue.popleft()
+            # Raise the exception in the main thread, if any.
+            future.result()
+            self._commit_session(callback_args)
+            idle_worker_list.append(worker)
+
+        with ThreadPoolExecutor(
+            max_workers=len(self.worker_list), thread_name_prefix="session_worker"
+        ) as executor:
+            for sample_index in sample_order:
+                # Sessions are committed in order, so waiting for sessions other than the head one is meaningless.
+                while len(idle_worker_list) == 0 or (
+                    len(running_session_queue) > 0
+                    and running_session_queue[0][1].done()
+                ):
+                    commit_head_session()
+                worker = idle_worker_list.pop()
+                callback_args = self._create_session(sample_index, *worker)
+                future = executor.submit(self._run_session, callback_args)
+                running_session_queue.append((callback_args, future, worker))
+            while len(running_session_queue) > 0:
+                commit_head_session()
+
+    def _create_session(
+        self, sample_index: SampleIndex, task: Task[DatasetItem], agent: Agent
+    ) -> CallbackArguments:
+        session = Session(task_name=task.task_name, sample_index=sample_index)
+        callback_args = CallbackArguments(
+            current_session=session,
+            task=task,
+            agent=agent,
+            session_list=self.session_journal.get_session_list_view(),
+        )
+        with self.callback_lock:
+            self.callback_handler.on_session_create(callback_args)
+        return callback_args
+
+    def _run_session(self, callback_args: CallbackArguments) -> None:
+        session = callback_args.current_session
+        task = callback_args.session_context.task
+        agent = callback_args.session_context.agent
+        session_controller = callback_args.session_controller
+        # region Initialize session
+        if session_controller.should_task_reset:
+            task.reset(session)
+            with self.callback_lock:
+                self.callback_handler.on_task_reset(callback_args)
+        self.logger.info(f"Sample {session.sample_index} start.")
+        # endregion
+        # region Run session
+        while session.sample_status == SampleStatus.RUNNING:
+            if session_controller.should_agent_inference:
+                agent.inference(session)
+                with self.callback_lock:
+                    self.callback_handler.on_agent_inference(callback_args)
+            if session_controller.should_task_interact:
+                task.interact(session)
+                with self.callback_lock:
+                    self.callback_handler.on_task_interact(callback_args)
+        # endregion
+        # region Complete session
+        # on_task_complete is called in _commit_session(), to keep the sample order.
+        if session_controller.should_task_complete:
+            task.complete(session)
+        # endregion
+
+    def _commit_session(self, callback_args: CallbackArguments) -> None:
+        session = callback_args.current_session
+        with self.callback_lock:
+            if callback_args.session_controller.should_task_complete:
+                self.callback_handler.on_task_complete(callback_args)
+            # The session is appended to the journal before the index, so a session in the index is always in the
+            #   journal. The sessions that are only in the journal will be indexed in SessionResumeIndex.synchronize().
+            journal_offset = self.session_journal.append(session)
+        session_partial = SessionMetricCalculationPartial(
+            sample_index=session.sample_index,
+            evaluation_record=session.evaluation_record,
+            sample_status=session.sample_status,
+        )
+        self.session_resume_index.append(session_partial, journal_offset)
+        # runs.json is rewritten whenever the journal doubles in size, the journal is always up to date.
+        self.session_journal.compact_if_grown(self.session_list_output_path)
+        # Only the first worker is used to maintain the metric, so that all the sessions are counted in one place.
+        metric_task = self.worker_list[0][0]
+        save_metric(
+            metric_task.accumulate_metric([session_partial]), self.metric_output_path
+        )
+        self.logger.info(
+            f"Sample {session.sample_index} end. Session status: {session.sample_status}. "
+            f"Evaluation outcome: {session.evaluation_record.outcome}."
+        )
+        # region Save callback state
+        # The state of callback will be used to restore the previous incomplete assignment.
+        with self.callback_lock:
+            self.callback_handler.on_state_save(callback_args)
+        # endregion
+
+
 def main() -> None:
     # region Prepare variables
     parser = argparse.ArgumentParser()
@@ -331,105 +561,76 @@ def main() -> None:
     config_utility.preprocess()
     task, agent, callback_dict = config_utility.construct()
     config_utility.postprocess(task, agent)
-    config_utility.validate(task, agent)
+    config_utility.validate(task, agent, callback_dict)
     ContinualAgentBenchException.set_record_file(path_config.exception_record_file_path)
     # endregion
     # region Determine whether to start a new assignment or restore the previous incomplete assignment, based on
     # whether the config file exists.
     session_list_output_path = path_config.session_list_output_path
+    session_journal = SessionJournal(path_config.session_journal_path)
+    if not session_journal.exists() and os.path.exists(session_list_output_path):
+        # The previous incomplete assignment only has runs.json, use it to create the journal.
+        session_journal.import_session_list(session_list_output_path)
+    # Only the index is loaded, the sessions in the journal are loaded on demand.
+    session_resume_index = SessionResumeIndex(path_config.session_resume_index_path)
+    session_journal.repair()
+    session_resume_index.synchronize(session_journal)
     assert isinstance(assignment_config.sample_order, list)
-    session_list: list[Session]
     unfinished_sample_order: list[SampleIndex]
-    if os.path.exists(session_list_output_path):
+    if session_journal.exists():
         # At least one session exists, so we restore the previous incomplete assignment.
-        session_list = [
-            Session.model_validate(session_info_dict)
-            for session_info_dict in json.load(open(session_list_output_path, "r"))
-        ]
         unfinished_sample_order = [
             sample_index
             for sample_index in assignment_config.sample_order
-            if all(session.sample_index != sample_index for session in session_list)
+            if not session_resume_index.is_finished(sample_index)
         ]
         # Previous session may change the state of the callback, restore it here.
         CallbackRestorer.restore(callback_dict)
     else:
         # Start a new assignment.
-        session_list = []
         unfinished_sample_order = assignment_config.sample_order
+    # The task may be served by a TaskServer that has accumulated the sessions of another run, so the metric is
+    #   replaced by the metric of the previous sessions (empty for a new assignment) instead of being added to.
+    task.accumulate_metric(session_resume_index.get_session_partial_list(), reset=True)
     callback_handler = CallbackHandler(callback_dict)
     # endregion
     # region Run experiment
     logger.info(
         f"Experiment start. "
         f"Total sample count: {len(assignment_config.sample_order)}. "
-        f"Unfinished sample count: {len(unfinished_sample_order)}."
+        f"Unfinished sample count: {len(unfinished_sample_order)}. "
+        f"Session concurrency: {assignment_config.session_concurrency}."
     )
-    for sample_index in unfinished_sample_order:
-        # region Initialize session
-        session = Session(task_name=task.task_name, sample_index=sample_index)
-        callback_args = CallbackArguments(
-            current_session=session, task=task, agent=agent, session_list=session_list
-        )
-        callback_handler.on_session_create(callback_args)
-        if callback_args.session_controller.should_task_reset:
-            task.reset(session)
-            callback_handler.on_task_reset(callback_args)
-        logger.info(f"Sample {sample_index} start.")
-        # endregion
-        # region Run session
-        while session.sample_status == SampleStatus.RUNNING:
-            if callback_args.session_controller.should_agent_inference:
-                agent.inference(session)
-                callback_handler.on_agent_inference(callback_args)
-            if callback_args.session_controller.should_task_interact:
-                task.interact(session)
-                callback_handler.on_task_interact(callback_args)
-        # endregion
-        # region Complete session
-        if callback_args.session_controller.should_task_complete:
-            task.complete(session)
-            callback_handler.on_task_complete(callback_args)
-        session_list.append(session)
-        json.dump(
-            [s.model_dump() for s in session_list],
-            open(session_list_output_path, "w"),  # noqa
-            indent=2,
-        )
-        logger.info(
-            f"Sample {sample_index} end. Session status: {session.sample_status}. "
-            f"Evaluation outcome: {session.evaluation_record.outcome}."
-        )
-        # endregion
-        # region Save callback state
-        # The state of callback will be used to restore the previous incomplete assignment.
-        callback_handler.on_state_save(callback_args)
-        # endregion
+    worker_list = config_utility.construct_worker_list(task, agent)
+    session_scheduler = SessionScheduler(
+        worker_list,
+        callback_handler,
+        session_journal,
+        session_resume_index,
+        session_list_output_path,
+        path_config.metric_output_path,
+        logger,
+    )
+    try:
+        session_scheduler.run(unfinished_sample_order)
+    finally:
+        # The layout of runs.json is kept for the downstream tools. It is also compacted when the run fails, so that
+        #   it contains all the committed sessions.
+        session_journal.compact(session_list_output_path)
+    logger.info(f"Session list has been saved to {session_list_output_path}.")
     # endregion
     # region Evaluate
-    session_metric_calculation_partial_list: Sequence[
-        SessionMetricCalculationPartial
-    ] = [
-        SessionMetricCalculationPartial(
-            sample_index=session.sample_index,
-            evaluation_record=session.evaluation_record,
-            sample_status=session.sample_status,
-        )
-        for session in session_list
-    ]
-    metric = task.calculate_metric(session_metric_calculation_partial_list)
+    # The metric has been updated session by session, pass an empty list to get it.
+    metric = task.accumulate_metric([])
     logger.info(
         f"Experiment end. Metric: {metric}. Total sample count: {len(assignment_config.sample_order)}.",
     )
-    json.dump(
-        metric,
-        open(path_config.metric_output_path, "w"),  # noqa
-        indent=2,
-    )
+    save_metric(metric, path_config.metric_output_path)
     logger.info(f"Metric file has been saved to {assignment_config.output_dir}.")
     # endregion
     # region Release
-    task.release()
+    for worker_task, _ in worker_list:
+        worker_task.release()
     # endregion
 
 
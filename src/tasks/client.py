@@ -1,4 +1,5 @@
-from typing import Sequence
+from typing import Optional, Sequence
+from pydantic import PrivateAttr
 
 from src.typings import (
     TaskResponse,
@@ -8,11 +9,15 @@ from src.typings import (
     MetricDict,
     SessionMetricCalculationPartial,
 )
-from src.utils import Client
+from src.utils import Client, SafeLogger
 from .task import TaskInterface
+from .session_replica import SessionReplica, SessionDeltaMismatchError
 
 
 class TaskClient(Client, TaskInterface):
+    # The copy of the session held by the TaskServer. Only the changes of the session are transferred.
+    _session_replica: Optional[SessionReplica] = PrivateAttr(default=None)
+
     def __init__(self, server_address: str, request_timeout: int):
         Client.__init__(
             self, server_address=server_address, request_timeout=request_timeout
@@ -25,26 +30,69 @@ class TaskClient(Client, TaskInterface):
         return response.sample_index_list
 
     def reset(self, session: Session) -> None:
-        response: TaskResponse.Reset = self._call_server(
-            "/reset", TaskRequest.Reset(session=session), TaskResponse.Reset
-        )
-        session.__dict__.update(response.session.__dict__)  # In-place update
+        # The session held by the server is always replaced when a session is reset.
+        self._set_session_replica(SessionReplica(session))
+        self._exchange_session_delta("/reset_with_session_delta", session)
 
     def interact(self, session: Session) -> None:
-        response: TaskResponse.Interact = self._call_server(
-            "/interact",
-            TaskRequest.Interact(session=session),
-            TaskResponse.Interact,
-        )
-        session.__dict__.update(response.session.__dict__)
+        self._exchange_session_delta("/interact_with_session_delta", session)
 
     def complete(self, session: Session) -> None:
-        response: TaskResponse.Complete = self._call_server(
-            "/complete",
-            TaskRequest.Complete(session=session),
-            TaskResponse.Complete,
+        self._exchange_session_delta("/complete_with_session_delta", session)
+
+    def _get_session_replica(self) -> Optional[SessionReplica]:
+        # Client.__getattr__() and Client.__setattr__() access the attribute on the server, so the private attribute
+        #   is accessed directly.
+        assert self.__pydantic_private__ is not None
+        session_replica: Optional[SessionReplica] = self.__pydantic_private__[
+            "_session_replica"
+        ]
+        return session_replica
+
+    def _set_session_replica(self, session_replica: SessionReplica) -> None:
+        assert self.__pydantic_private__ is not None
+        self.__pydantic_private__["_session_replica"] = session_replica
+
+    def _exchange_session_delta(self, api: str, session: Session) -> None:
+        """
+        Send the changes of the session since the last call, and apply the changes made by the server in place.
+        If the server cannot apply the changes, the full session is sent again. If the changes made by the server
+            cannot be applied, the full session is fetched from the server.
+        """
+        session_replica = self._get_session_replica()
+        if session_replica is None or session_replica.session is not session:
+            session_replica = SessionReplica(session)
+            self._set_session_replica(session_replica)
+        response: TaskResponse.ExchangeSessionDelta = self._call_server(
+            api,
+            TaskRequest.ExchangeSessionDelta(
+                session_delta=session_replica.create_delta()
+            ),
+            TaskResponse.ExchangeSessionDelta,
         )
-        session.__dict__.update(response.session.__dict__)
+        if response.session_delta is None:
+            SafeLogger.warning(
+                f"[TaskClient] The server cannot apply the session delta of {api}, send the full session."
+            )
+            response = self._call_server(
+                api,
+                TaskRequest.ExchangeSessionDelta(
+                    session_delta=session_replica.create_delta(full=True)
+                ),
+                TaskResponse.ExchangeSessionDelta,
+            )
+        if response.session_delta is None:
+            raise RuntimeError(f"The server cannot apply the full session of {api}.")
+        try:
+            session_replica.apply_delta(response.session_delta)
+            return
+        except SessionDeltaMismatchError as e:
+            SafeLogger.warning(f"[TaskClient] {e} Fetch the full session.")
+        response = self._call_server(
+            "/get_full_session_delta", None, TaskResponse.ExchangeSessionDelta
+        )
+        assert response.session_delta is not None
+        session_replica.apply_delta(response.session_delta)
 
     def release(self) -> None:
         _ = self._call_server(
@@ -62,3 +110,17 @@ class TaskClient(Client, TaskInterface):
             TaskResponse.CalculateMetric,
         )
         return response.metric
+
+    def accumulate_metric(
+        self,
+        session_partial_list: Sequence[SessionMetricCalculationPartial],
+        reset: bool = False,
+    ) -> MetricDict:
+        response: TaskResponse.AccumulateMetric = self._call_server(
+            "/accumulate_metric",
+            TaskRequest.AccumulateMetric(
+                session_partial_list=session_partial_list, reset=reset
+            ),
+            TaskResponse.AccumulateMetric,
+        )
+        return response.metric
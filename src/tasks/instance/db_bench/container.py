@@ -1,17 +1,35 @@
 import docker
 import mysql.connector
+import mysql.connector.pooling
 import random
 import socket
 import time
+from contextlib import contextmanager
 from docker.models import containers
-from typing import Optional
+from mysql.connector.abstracts import MySQLCursorAbstract
+from pydantic import BaseModel
+from typing import Any, Iterator, Optional, Sequence
+
+from src.utils import SafeLogger
+
+
+class DBBenchExecutionResult(BaseModel):
+    output: str
+    truncated_flag: bool
+    # The number of rows in the result set of the last statement, and the number of rows in the output.
+    row_count: int
+    output_row_count: int
 
 
 class DBBenchContainer:
     port = 13000
     password = "password"
 
-    def __init__(self, image: str = "mysql"):
+    def __init__(self, image: str = "mysql", connection_pool_size: int = 2):
+        """
+        connection_pool_size: The number of connections that are kept open. The connections are reused by the calls
+            of execute(), see connection().
+        """
         self.deleted = False
         self.image = image
         self.client = docker.from_env()
@@ -35,12 +53,15 @@ class DBBenchContainer:
         retry = 0
         while True:
             try:
-                self.conn = mysql.connector.connect(
+                self.connection_pool = mysql.connector.pooling.MySQLConnectionPool(
+                    pool_name=f"db_bench_{self.port}",
+                    pool_size=connection_pool_size,
+                    # The session is reset by connection(), which also handles the failure of the reset.
+                    pool_reset_session=False,
                     host="127.0.0.1",
                     user="root",
                     password=self.password,
                     port=self.port,
-                    pool_reset_session=True,
                 )
             except mysql.connector.errors.OperationalError:
                 time.sleep(1)
@@ -63,27 +84,144 @@ class DBBenchContainer:
         except Exception:  # noqa
             pass
 
+    @contextmanager
+    def connection(self) -> Iterator[mysql.connector.pooling.PooledMySQLConnection]:
+        """
+        Borrow a connection from the pool.
+        The connection is pinged when it is borrowed, and it is only reconnected if the ping fails, so a call does not
+            pay for a full handshake. When the connection is returned, its session state (current database,
+            variables, temporary tables, uncommitted transaction) is reset, so every call starts from a clean session
+            as if it used a new connection.
+        """
+        connection = self.connection_pool.get_connection()
+        try:
+            yield connection
+        finally:
+            try:
+                connection.reset_session()
+            except mysql.connector.Error as e:
+                # The connection is reconnected by the health check when it is borrowed next time.
+                SafeLogger.warning(
+                    f"[DBBenchContainer] Failed to reset the connection, disconnect it: {e}"
+                )
+                connection.disconnect()
+            # Return the connection to the pool.
+            connection.close()
+
     def execute(
         self,
         multiple_sql: str,
         database: Optional[str] = None,
     ) -> str:
-        self.conn.reconnect()
+        return self.execute_with_limit(multiple_sql, database).output
+
+    def execute_with_limit(
+        self,
+        multiple_sql: str,
+        database: Optional[str] = None,
+        maximum_row_count: Optional[int] = None,
+        maximum_byte_count: Optional[int] = None,
+    ) -> DBBenchExecutionResult:
+        """
+        Execute the statements separated by ";", and commit after each of them. The output is the str of the rows
+            returned by the last statement, or the str of the error.
+        The rows are streamed from the server, and only the first rows within maximum_row_count and
+            maximum_byte_count (the size of the output in UTF-8) are kept in the output. The other rows are read and
+            discarded, so that the memory and the output are bounded while row_count is still reported.
+        """
+        row_count = 0
+        row_list: list[Any] = []
+        truncated_flag = False
+        try:
+            with self.connection() as connection:
+                cursor = connection.cursor()
+                if database:
+                    cursor.execute(f"use `{database}`;")
+                    cursor.fetchall()
+                sql_list = multiple_sql.split(";")
+                sql_list = [sql.strip() for sql in sql_list if sql.strip() != ""]
+                output = ""
+                for sql in sql_list:
+                    cursor.execute(sql)
+                    row_list, row_count, truncated_flag = (
+                        DBBenchContainer._fetch_with_limit(
+                            cursor, maximum_row_count, maximum_byte_count
+                        )
+                    )
+                    output = str(row_list)
+                    connection.commit()
+        except Exception as e:
+            return DBBenchExecutionResult(
+                output=str(e), truncated_flag=False, row_count=0, output_row_count=0
+            )
+        return DBBenchExecutionResult(
+            output=output,
+            truncated_flag=truncated_flag,
+            row_count=row_count,
+            output_row_count=len(row_list),
+        )
+
+    @staticmethod
+    def _fetch_with_limit(
+        cursor: MySQLCursorAbstract,
+        maximum_row_count: Optional[int],
+        maximum_byte_count: Optional[int],
+        batch_size: int = 256,
+    ) -> tuple[list[Any], int, bool]:
+        if maximum_row_count is None and maximum_byte_count is None:
+            row_list = cursor.fetchall()
+            return row_list, len(row_list), False
+        row_list = []
+        row_count = 0
+        # The size of "[]" and the ", " between the rows, which is the same as str(row_list).
+        byte_count = 2
+        truncated_flag = False
+        while batch := cursor.fetchmany(batch_size):
+            row_count += len(batch)
+            if truncated_flag:
+                continue
+            for row in batch:
+                if maximum_row_count is not None and len(row_list) >= maximum_row_count:
+                    truncated_flag = True
+                    break
+                row_byte_count = len(str(row).encode()) + (2 if row_list else 0)
+                if (
+                    maximum_byte_count is not None
+                    and byte_count + row_byte_count > maximum_byte_count
+                ):
+                    truncated_flag = True
+                    break
+                row_list.append(row)
+                byte_count += row_byte_count
+        return row_list, row_count, truncated_flag
+
+    def execute_many(
+        self,
+        sql: str,
+        parameter_list: Sequence[Sequence[str]],
+        database: Optional[str] = None,
+        batch_size: int = 1000,
+    ) -> str:
+        """
+        Execute a parameterized statement for every parameter in parameter_list, and commit.
+        For an INSERT statement, every batch of batch_size parameters is sent as a single multi-row INSERT by
+            cursor.executemany(), so the size of a statement is bounded.
+        The errors are returned as str, which is the same as execute().
+        """
         try:
-            cursor = self.conn.cursor()
-            if database:
-                cursor.execute(f"use `{database}`;")
-                cursor.fetchall()
-            sql_list = multiple_sql.split(";")
-            sql_list = [sql.strip() for sql in sql_list if sql.strip() != ""]
-            result = ""
-            for sql in sql_list:
-                cursor.execute(sql)
-                result = str(cursor.fetchall())
-                self.conn.commit()
+            with self.connection() as connection:
+                cursor = connection.cursor()
+                if database:
+                    cursor.execute(f"use `{database}`;")
+                    cursor.fetchall()
+                for batch_start in range(0, len(parameter_list), batch_size):
+                    cursor.executemany(
+                        sql, parameter_list[batch_start : batch_start + batch_size]
+                    )
+                connection.commit()
         except Exception as e:
-            result = str(e)
-        return result
+            return str(e)
+        return ""
 
     def is_port_open(
         self, port: int
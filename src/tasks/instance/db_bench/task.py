@@ -1,6 +1,8 @@
+import hashlib
 import json
 import re
 import math
+from collections import OrderedDict
 from typing import Optional, Self, Mapping, Any, Sequence
 from pydantic import BaseModel, model_validator
 from enum import StrEnum, unique
@@ -11,6 +13,7 @@ from src.tasks.task import (
     SkillUtility,
     AgentResponseParserResult,
     AgentAction,
+    MetricAccumulator,
 )
 from .container import DBBenchContainer
 from src.typings import (
@@ -23,7 +26,6 @@ from src.typings import (
     Role,
     SessionEvaluationOutcome,
     MetricDict,
-    SessionMetricCalculationPartial,
 )
 from src.factories.chat_history_item import ChatHistoryItemFactory
 
@@ -108,6 +110,12 @@ class TableInfo(BaseModel):
     column_info_list: Sequence[ColumnInfo]
 
 
+class DBBenchInitStatement(BaseModel):
+    setup_sql: str  # Create the database and the table
+    insert_sql: str  # Parameterized by "%s"
+    parameter_list: list[tuple[str, ...]]
+
+
 class DBBenchDatasetItem(DatasetItem):
     instruction: str
     answer_info: AnswerInfo
@@ -272,13 +280,36 @@ class DirectTypeAnswerValidator:
 
 
 class DBBench(Task[DBBenchDatasetItem]):
+    # The escape sequences processed by MySQL in a string literal, other than the quotes and the backslash itself.
+    _MYSQL_ESCAPE_SEQUENCE_DICT = {
+        "0": "\0",
+        "b": "\b",
+        "n": "\n",
+        "r": "\r",
+        "t": "\t",
+        "Z": "\x1a",
+        # The backslash is kept for the wildcard characters.
+        "%": "\\%",
+        "_": "\\_",
+    }
+
     def __init__(
         self,
         task_name: TaskName,
         chat_history_item_factory: ChatHistoryItemFactory,
         data_file_path: str,
         max_round: int,
+        template_database_cache_size: int = 16,
+        execution_result_maximum_row_count: Optional[int] = None,
+        execution_result_maximum_byte_count: Optional[int] = None,
     ):
+        """
+        template_database_cache_size: The maximum number of template databases kept in the container, see
+            _initialize_database_from_template(). Set it to 0 to initialize every database from scratch.
+        execution_result_maximum_row_count, execution_result_maximum_byte_count: The limits of the result of the
+            SQL executed by the agent, which is injected into the chat history. The result is truncated with a note
+            when it exceeds a limit. None means no limit.
+        """
         super().__init__(task_name, chat_history_item_factory, max_round)
         data = json.load(open(data_file_path))
         dataset: dict[SampleIndex, DBBenchDatasetItem] = {}
@@ -288,6 +319,11 @@ class DBBench(Task[DBBenchDatasetItem]):
         self._set_dataset(dataset)
         # Construct docker container immediately
         self.container = DBBenchContainer()
+        self.template_database_cache_size = template_database_cache_size
+        self.execution_result_maximum_row_count = execution_result_maximum_row_count
+        self.execution_result_maximum_byte_count = execution_result_maximum_byte_count
+        # The names of the template databases in the container, in the order of the last use.
+        self._template_database_name_dict: OrderedDict[str, None] = OrderedDict()
 
     @staticmethod
     def _construct_dataset_item(entry: dict[str, Any]) -> DBBenchDatasetItem:
@@ -395,6 +431,131 @@ class DBBench(Task[DBBenchDatasetItem]):
         # endregion
         return sql
 
+    @staticmethod
+    def _get_init_parameter(value: DBBenchType.RowValue) -> str:
+        """
+        Return the string stored by the quoted literal that _build_init_sql() writes for the value, so that the
+            tables initialized by _build_init_statement() have identical contents (and md5 hashes).
+        The literal is '%s' formatted by Python, so every value is inserted as its str(). MySQL processes the
+            backslash escape sequences in the literal, and the "''" in the literal is the quote in the value, which
+            needs no processing here.
+        """
+        return re.sub(
+            r"\\(.)",
+            lambda match: DBBench._MYSQL_ESCAPE_SEQUENCE_DICT.get(
+                match.group(1), match.group(1)
+            ),
+            str(value),
+            flags=re.DOTALL,
+        )
+
+    @staticmethod
+    def _build_init_statement(dataset_item: DBBenchDatasetItem) -> DBBenchInitStatement:
+        """
+        The parameterized counterpart of _build_init_sql(), which is loaded by DBBenchContainer.execute_many(). The
+            rows are sent in batches instead of being formatted into a single INSERT statement.
+        """
+        table_info = dataset_item.table_info
+        column_info_list = table_info.column_info_list
+        column_str = ",".join(
+            [
+                f"`{column_info.name}` {column_info.type}"
+                for column_info in column_info_list
+            ]
+        )
+        column_name_str = ",".join(
+            [f"`{column_info.name}`" for column_info in column_info_list]
+        )
+        placeholder_str = ",".join(["%s"] * len(column_info_list))
+        table_name = table_info.name
+        database_name = dataset_item.database_name
+        return DBBenchInitStatement(
+            setup_sql=(
+                f"CREATE DATABASE IF NOT EXISTS `{database_name}`;\n"  # noqa
+                f"USE `{database_name}`;\n"
+                f"CREATE TABLE IF NOT EXISTS `{table_name}` ({column_str});\n"
+            ),
+            insert_sql=f"INSERT INTO `{table_name}` ({column_name_str}) VALUES ({placeholder_str})",
+            parameter_list=[
+                tuple(DBBench._get_init_parameter(value) for value in row)
+                for row in table_info.row_list
+            ],
+        )
+
+    @staticmethod
+    def _initialize_database(
+        container: DBBenchContainer, dataset_item: DBBenchDatasetItem
+    ) -> None:
+        init_statement = DBBench._build_init_statement(dataset_item)
+        container.execute(init_statement.setup_sql)
+        container.execute_many(
+            init_statement.insert_sql,
+            init_statement.parameter_list,
+            dataset_item.database_name,
+        )
+
+    @staticmethod
+    def _get_template_database_name(table_info: TableInfo) -> str:
+        table_info_digest = hashlib.blake2b(
+            table_info.model_dump_json().encode(), digest_size=16
+        ).hexdigest()
+        return f"db_bench_template_{table_info_digest}"
+
+    def _initialize_database_from_template(
+        self, dataset_item: DBBenchDatasetItem
+    ) -> None:
+        """
+        Initialize the database by cloning a template database, which is created by _initialize_database() for the
+            first sample with the same TableInfo (the name, the columns and the rows of the table). The clone is a
+            server-side copy, so the rows are neither sent nor parsed again for repeated samples (e.g., the samples
+            that are run multiple times for self-consistency).
+        """
+        if self.template_database_cache_size <= 0:
+            DBBench._initialize_database(self.container, dataset_item)
+            return
+        table_info = dataset_item.table_info
+        template_database_name = DBBench._get_template_database_name(table_info)
+        if template_database_name in self._template_database_name_dict:
+            self._template_database_name_dict.move_to_end(template_database_name)
+        else:
+            DBBench._initialize_database(
+                self.container,
+                dataset_item.model_copy(
+                    update={"database_name": template_database_name}
+                ),
+            )
+            # The errors of DBBenchContainer.execute() are returned instead of raised, so check the template before
+            #   caching it. If it is incomplete, initialize the database from scratch, which is the same as before.
+            row_count_str = self.container.execute(
+                f"SELECT COUNT(*) FROM `{template_database_name}`.`{table_info.name}`"
+            )
+            if row_count_str != str([(len(table_info.row_list),)]):
+                self.container.execute(
+                    f"DROP DATABASE IF EXISTS `{template_database_name}`"
+                )
+                DBBench._initialize_database(self.container, dataset_item)
+                return
+            self._template_database_name_dict[template_database_name] = None
+            while (
+                len(self._template_database_name_dict)
+                > self.template_database_cache_size
+            ):
+                evicted_template_database_name, _ = (
+                    self._template_database_name_dict.popitem(last=False)
+                )
+                self.container.execute(
+                    f"DROP DATABASE IF EXISTS `{evicted_template_database_name}`"
+                )
+        database_name = dataset_item.database_name
+        table_name = table_info.name
+        self.container.execute(
+            f"CREATE DATABASE IF NOT EXISTS `{database_name}`;\n"
+            f"CREATE TABLE IF NOT EXISTS `{database_name}`.`{table_name}` "
+            f"LIKE `{template_database_name}`.`{table_name}`;\n"
+            f"INSERT INTO `{database_name}`.`{table_name}` "
+            f"SELECT * FROM `{template_database_name}`.`{table_name}`;\n"
+        )
+
     def _get_task_output(self, answer: str) -> dict[str, str]:
         dataset_item: DBBenchDatasetItem = self._get_current_dataset_item()
         answer_info = dataset_item.answer_info
@@ -480,8 +641,7 @@ class DBBench(Task[DBBenchDatasetItem]):
     def _reset(self, session: Session) -> None:
         # Initialize the database and chat history
         current_dataset_item: DBBenchDatasetItem = self._get_current_dataset_item()
-        init_sql = DBBench._build_init_sql(current_dataset_item)
-        self.container.execute(init_sql)
+        self._initialize_database_from_template(current_dataset_item)
         session.chat_history.inject(
             self.chat_history_item_factory.construct(0, expected_role=Role.USER)
         )
@@ -494,7 +654,7 @@ class DBBench(Task[DBBenchDatasetItem]):
     def _interact(self, session: Session) -> None:
         # region Preparation
         parser_result = DBBench._parse_agent_response(
-            session.chat_history.get_item_deep_copy(-1).content
+            session.chat_history.get_item(-1).content
         )
         current_dataset_item: DBBenchDatasetItem = self._get_current_dataset_item()
         # endregion
@@ -505,10 +665,21 @@ class DBBench(Task[DBBenchDatasetItem]):
                 assert sql is not None, "Check DBBench._parse_agent_response()."
                 database_name = current_dataset_item.database_name
                 try:
-                    user_response = self.container.execute(sql, database_name)
+                    execution_result = self.container.execute_with_limit(
+                        sql,
+                        database_name,
+                        self.execution_result_maximum_row_count,
+                        self.execution_result_maximum_byte_count,
+                    )
                 except Exception as e:
                     session.task_output = self._get_default_task_output()
                     raise TaskEnvironmentException(str(e))
+                user_response = execution_result.output
+                if execution_result.truncated_flag:
+                    user_response += (
+                        f"\n[The result is truncated. Only the first {execution_result.output_row_count} of "
+                        f"{execution_result.row_count} rows are shown.]"
+                    )
                 session.chat_history.inject(
                     {"role": Role.USER, "content": user_response}
                 )
@@ -586,16 +757,14 @@ class DBBench(Task[DBBenchDatasetItem]):
         except Exception as e:
             raise TaskReleaseException(str(e))
 
-    def calculate_metric(
-        self, session_partial_list: Sequence[SessionMetricCalculationPartial]
-    ) -> MetricDict:
+    def _calculate_metric(self, metric_accumulator: MetricAccumulator) -> MetricDict:
         skill_metric_dict = self._calculate_metric_based_on_skill(
-            DBBenchSkillUtility, session_partial_list
+            DBBenchSkillUtility, metric_accumulator
         )
         difficulty_level_metric_dict = self._calculate_metric_based_on_difficulty_level(
-            session_partial_list
+            metric_accumulator
         )
-        overall_metric_dict = Task._calculate_overall_metric(session_partial_list)
+        overall_metric_dict = Task._calculate_overall_metric(metric_accumulator)
         metric_dict = {
             "skill": skill_metric_dict,
             "difficulty_level": difficulty_level_metric_dict,
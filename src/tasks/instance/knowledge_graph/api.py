@@ -3,9 +3,9 @@ import re
 from typing import Union, Optional, Sequence, Any
 import os
 from pydantic import BaseModel
-import inspect
 from enum import StrEnum
 
+from src.utils import SafeLogger
 from .utils.logic_form_util import LogicFormUtil
 from .utils.sparql_executor import SparqlExecutor
 
@@ -51,6 +51,9 @@ class KnowledgeGraphAPI:
             vocab = json.load(f)
             self.attributes = vocab["attributes"]
             self.relations = vocab["relations"]
+        # The sets are built once, since the results of every get_relations() and get_attributes() are filtered by them.
+        self.attribute_set: frozenset[str] = frozenset(self.attributes)
+        self.relation_set: frozenset[str] = frozenset(self.relations)
         self.range_info = {}
         with open(os.path.join(ontology_dir_path, "fb_roles"), "r") as f:
             for line in f:
@@ -121,6 +124,31 @@ class KnowledgeGraphAPI:
         self.variable_to_relations_cache = {}
         self.variable_to_attributes_cache = {}
 
+    def prefetch_entity_relations(self, entity_list: Sequence[str]) -> None:
+        """
+        Look up the relations of the entities with batched queries, so that get_relations() reads them from the cache
+            of the SparqlExecutor instead of sending a query for every entity. The lookup is skipped if the cache is
+            disabled, and its failure is left to get_relations().
+        """
+        if (
+            self.sparql_executor.memory_cache_size == 0
+            and self.sparql_executor.result_cache is None
+        ):
+            return
+        entity_list = [
+            entity
+            for entity in entity_list
+            if KnowledgeGraphAPI._is_valid_entity(entity)
+        ]
+        if len(entity_list) == 0:
+            return
+        try:
+            self.sparql_executor.get_out_relations_batch(entity_list)
+        except Exception as e:
+            SafeLogger.warning(
+                f"[KnowledgeGraphAPI] Cannot prefetch the relations of {entity_list}: {e}"
+            )
+
     @staticmethod
     def _construct_execution_message(observation: str) -> str:
         return f"<<API_STR>> executes successfully. Observation: {observation}"
@@ -168,9 +196,7 @@ class KnowledgeGraphAPI:
             out_relations = self.sparql_executor.execute_query(new_query)
         else:
             out_relations = self.sparql_executor.get_out_relations(argument)
-        out_relations = sorted(
-            list(set(out_relations).intersection(set(self.relations)))
-        )
+        out_relations = sorted(self.relation_set.intersection(out_relations))
         execution_message = KnowledgeGraphAPI._construct_execution_message(
             f"[{', '.join(out_relations)}]"
         )
@@ -276,9 +302,7 @@ class KnowledgeGraphAPI:
         new_clauses.append("}\n}")
         new_query = "\n".join(new_clauses)
         out_relations = self.sparql_executor.execute_query(new_query)
-        out_relations = sorted(
-            list(set(out_relations).intersection(set(self.attributes)))
-        )
+        out_relations = sorted(self.attribute_set.intersection(out_relations))
         self.variable_to_attributes_cache[variable] = out_relations
         execution_message = KnowledgeGraphAPI._construct_execution_message(
             f"[{', '.join(out_relations)}]"
@@ -292,7 +316,8 @@ class KnowledgeGraphAPI:
         extremum_function: "KnowledgeGraphAPI.ExtremumFunction",
     ) -> tuple[Variable, str]:
         # region Validate arguments
-        caller_name = inspect.stack()[1].function
+        # The callers are argmax() and argmin(), whose names are the values of ExtremumFunction.
+        caller_name = extremum_function.value
         KnowledgeGraphAPI._ensure_variable(caller_name, [variable])
         KnowledgeGraphAPI._validate_variable(caller_name, [variable])
         self._validate_attribute(caller_name, variable, attribute)
@@ -1,5 +1,5 @@
 import json
-from typing import Optional, Callable, Any, Sequence
+from typing import Optional, Callable, Any
 import re
 from pydantic import field_validator
 import inspect
@@ -10,6 +10,7 @@ from src.tasks.task import (
     SkillUtility,
     AgentResponseParserResult,
     AgentAction,
+    MetricAccumulator,
 )
 from src.typings import (
     SampleIndex,
@@ -25,6 +26,7 @@ from src.typings import (
 from src.factories.chat_history_item import ChatHistoryItemFactory
 from .api import KnowledgeGraphAPI, Variable, KnowledgeGraphAPIException
 from .utils.sparql_executor import SparqlExecutor
+from .utils.local_sparql_executor import LocalSparqlExecutor
 
 
 class KnowledgeGraphSkillUtility(SkillUtility):
@@ -77,9 +79,31 @@ class KnowledgeGraph(Task[KnowledgeGraphDatasetItem]):
         ontology_dir_path: str,
         data_file_path: str,
         max_round: int,
+        sparql_result_cache_path: Optional[str] = None,
+        sparql_result_cache_maximum_size: int = 1 << 30,
+        sparql_memory_cache_size: int = 1024,
+        sparql_graph_file_path: Optional[str] = None,
     ):
+        """
+        sparql_result_cache_path, sparql_result_cache_maximum_size, sparql_memory_cache_size: See SparqlExecutor. The
+            hit counts of the caches are logged when the task is released.
+        sparql_graph_file_path: If it is set, the queries are answered by a LocalSparqlExecutor loaded from the file,
+            instead of the endpoint of sparql_url. The file only contains a subgraph of Freebase, so it is meant for
+            running the task offline (e.g., profiling), not for evaluation.
+        """
         super().__init__(task_name, chat_history_item_factory, max_round)
-        sparql_executor = SparqlExecutor(sparql_url)
+        sparql_executor: SparqlExecutor
+        if sparql_graph_file_path is not None:
+            sparql_executor = LocalSparqlExecutor(
+                sparql_graph_file_path, memory_cache_size=sparql_memory_cache_size
+            )
+        else:
+            sparql_executor = SparqlExecutor(
+                sparql_url,
+                sparql_result_cache_path,
+                sparql_result_cache_maximum_size,
+                sparql_memory_cache_size,
+            )
         self.knowledge_graph_api = KnowledgeGraphAPI(ontology_dir_path, sparql_executor)
         raw_dataset: dict[str, dict[str, Any]] = json.load(open(data_file_path, "r"))
         dataset: dict[SampleIndex, KnowledgeGraphDatasetItem] = {}
@@ -254,11 +278,14 @@ class KnowledgeGraph(Task[KnowledgeGraphDatasetItem]):
         )
         self.variable_list = []
         self.knowledge_graph_api.reset_cache()
+        self.knowledge_graph_api.prefetch_entity_relations(
+            list(current_dataset_item.entity_dict.values())
+        )
 
     def _interact(self, session: Session) -> None:
         # region Parse agent response, ensure the code pass the type check
         parser_result = KnowledgeGraph._parse_agent_response(
-            session.chat_history.get_item_deep_copy(-1).content
+            session.chat_history.get_item(-1).content
         )
         assert self.variable_list is not None
         # endregion
@@ -539,42 +566,48 @@ class KnowledgeGraph(Task[KnowledgeGraphDatasetItem]):
         # endregion
 
     def _release(self) -> None:
-        return  # Do nothing
+        self.knowledge_graph_api.sparql_executor.close()
+
+    def _get_additional_metric_numerator_dict(
+        self, session_partial: SessionMetricCalculationPartial
+    ) -> dict[str, float]:
+        f1_score_numerator: float = 0
+        executable_rate_numerator: int = 0
+        if session_partial.evaluation_record.detail_dict is not None:
+            f1_score = session_partial.evaluation_record.detail_dict.get(
+                "f1_score", 0.0
+            )
+            if isinstance(
+                f1_score, (int, float)
+            ):  # The if statement is used for type narrowing
+                f1_score_numerator += float(f1_score)
+            executable_flag = session_partial.evaluation_record.detail_dict.get(
+                "executable_flag", False
+            )
+            if isinstance(
+                executable_flag, bool
+            ):  # The if statement is used for type narrowing
+                executable_rate_numerator += int(executable_flag)
+        return {
+            "f1_score": f1_score_numerator,
+            "executable_rate": executable_rate_numerator,
+        }
 
-    def calculate_metric(
-        self, session_partial_list: Sequence[SessionMetricCalculationPartial]
-    ) -> MetricDict:
+    def _calculate_metric(self, metric_accumulator: MetricAccumulator) -> MetricDict:
         # region Calculate general metrics
         skill_metric_dict = self._calculate_metric_based_on_skill(
-            KnowledgeGraphSkillUtility, session_partial_list
+            KnowledgeGraphSkillUtility, metric_accumulator
         )
         difficulty_level_metric_dict = self._calculate_metric_based_on_difficulty_level(
-            session_partial_list
+            metric_accumulator
         )
-        overall_metric_dict = Task._calculate_overall_metric(session_partial_list)
+        overall_metric_dict = Task._calculate_overall_metric(metric_accumulator)
         # endregion
         # region Calculate task-specific metrics
-        f1_score_numerator: float = 0
-        executable_rate_numerator: int = 0
-        for session_partial in session_partial_list:
-            if session_partial.evaluation_record.detail_dict is not None:
-                f1_score = session_partial.evaluation_record.detail_dict.get(
-                    "f1_score", 0.0
-                )
-                if isinstance(
-                    f1_score, (int, float)
-                ):  # The if statement is used for type narrowing
-                    f1_score_numerator += float(f1_score)
-                executable_flag = session_partial.evaluation_record.detail_dict.get(
-                    "executable_flag", False
-                )
-                if isinstance(
-                    executable_flag, bool
-                ):  # The if statement is used for type narrowing
-                    executable_rate_numerator += int(executable_flag)
         additional_metric_dict = {
-            "f1_score": f1_score_numerator / len(session_partial_list),
-            "executable_rate": executable_rate_numerator / len(session_partial_list),
+            key: metric_accumulator.additional_numerator_dict.get(key, 0)
+            / metric_accumulator.session_count
+            for key in ["f1_score", "executable_rate"]
         }
         overall_metric_dict["additional"] = additional_metric_dict
         # endregion
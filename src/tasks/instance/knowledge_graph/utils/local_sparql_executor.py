@@ -0,0 +1,71 @@
+import json
+import os
+import re
+import threading
+from typing import Any, Optional
+import rdflib
+
+from .sparql_executor import SparqlExecutor
+
+
+class LocalSparqlExecutor(SparqlExecutor):
+    """
+    A SparqlExecutor that answers the queries from an in-process rdflib graph loaded from a file, instead of a
+        Virtuoso endpoint. It is used to run the task on a small subgraph without network, e.g., for profiling.
+    The queries are written in the dialect of Virtuoso, so the constructs that rdflib does not support are translated
+        to SPARQL 1.1 by _translate_query().
+    """
+
+    _DIALECT_PATTERN_REPLACEMENT_LIST: list[tuple[re.Pattern[str], str]] = [
+        # The aggregate and the disjunction written by LogicFormUtil.lisp_to_sparql()
+        (
+            re.compile(r"\bSELECT\s+COUNT\s+DISTINCT\s+(\?\w+)"),
+            r"SELECT (COUNT(DISTINCT \1) AS ?count)",
+        ),
+        (re.compile(r"\s+OR\s+"), " || "),
+        # Virtuoso applies regex() to the IRIs, while SPARQL 1.1 only applies it to the literals.
+        (re.compile(r"\bregex\s*\(\s*(\?\w+)\s*,"), r"regex(str(\1),"),
+        (re.compile(r"\bxsd:datetime\s*\("), "xsd:dateTime("),
+    ]
+
+    def __init__(
+        self,
+        graph_file_path: str,
+        graph_file_format: Optional[str] = None,
+        memory_cache_size: int = 1024,
+    ):
+        """
+        graph_file_path: The file of the graph, in any format that rdflib can parse (e.g., N-Triples or Turtle).
+        graph_file_format: The format of the file. It is guessed from the file extension if it is not set.
+        """
+        super().__init__(
+            f"file://{os.path.abspath(graph_file_path)}",
+            memory_cache_size=memory_cache_size,
+        )
+        self.graph = rdflib.Graph()
+        self.graph.parse(graph_file_path, format=graph_file_format)
+        # The SPARQL engine of rdflib is not safe to be called by multiple threads at the same time.
+        self._graph_lock = threading.Lock()
+
+    @staticmethod
+    def _translate_query(query: str) -> str:
+        # The string literals and the IRIs are kept as they are.
+        part_list = re.split(f"({SparqlExecutor._LITERAL_OR_IRI_PATTERN})", query)
+        replacement_list = LocalSparqlExecutor._DIALECT_PATTERN_REPLACEMENT_LIST
+        for part_index in range(0, len(part_list), 2):
+            part = part_list[part_index]
+            for pattern, replacement in replacement_list:
+                part = pattern.sub(replacement, part)
+            part_list[part_index] = part
+        return "".join(part_list)
+
+    def _send_query(self, query: str) -> dict[str, Any]:
+        translated_query = LocalSparqlExecutor._translate_query(query)
+        with self._graph_lock:
+            serialized_results = self.graph.query(translated_query).serialize(
+                format="json"
+            )
+        assert serialized_results is not None
+        results = json.loads(serialized_results)
+        assert isinstance(results, dict)
+        return results
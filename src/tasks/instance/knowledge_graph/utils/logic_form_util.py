@@ -1,9 +1,14 @@
 # mypy: ignore-errors
+import functools
 from typing import List
 from .semantic_parser_util import SemanticParserUtil
 
 
 class LogicFormUtil:
+    # The number of compiled logical forms that are memoized. The programs of the Variables are compiled again when
+    #   they are used by get_relations, get_attributes and the final answer, and the same programs recur across samples.
+    _COMPILE_CACHE_SIZE = 4096
+
     @staticmethod
     def binary_nesting(
         function: str, elements: List[str], types_along_path=None
@@ -52,6 +57,7 @@ class LogicFormUtil:
                 )
 
     @staticmethod
+    @functools.lru_cache(maxsize=_COMPILE_CACHE_SIZE)
     def lisp_to_sparql(lisp_program: str):
         clauses = []
         order_clauses = []
@@ -339,6 +345,7 @@ class LogicFormUtil:
         return sub_formulas
 
     @staticmethod
+    @functools.lru_cache(maxsize=_COMPILE_CACHE_SIZE)
     def postprocess_raw_code(raw_lisp: str) -> str:
         expression = SemanticParserUtil.lisp_to_nested_expression(raw_lisp)
         if expression[0] in ["ARGMAX", "ARGMIN"] and len(expression) > 3:
@@ -1,21 +1,144 @@
-from typing import List, Tuple, Any
+import json
+import re
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Tuple, Any, Optional, Sequence
+from pydantic import BaseModel
 from SPARQLWrapper import SPARQLWrapper, JSON
 import urllib
 from urllib.error import URLError
 
 from src.typings import TaskEnvironmentException
-from src.utils import SafeLogger
+from src.utils import DiskCache, SafeLogger
+
+
+class SparqlResultCacheStatistics(BaseModel):
+    memory_hit_count: int = 0
+    disk_hit_count: int = 0
+    miss_count: int = 0
+
+    def get_hit_rate(self) -> float:
+        query_count = self.memory_hit_count + self.disk_hit_count + self.miss_count
+        if query_count == 0:
+            return 0
+        return (self.memory_hit_count + self.disk_hit_count) / query_count
 
 
 class SparqlExecutor:
-    def __init__(self, url: str):
+    # A string literal or an IRI. The pattern does not contain capturing groups.
+    _LITERAL_OR_IRI_PATTERN = (
+        r"\"(?:[^\"\\\n]|\\.)*\"|'(?:[^'\\\n]|\\.)*'|<[^<>\"{}|^`\\\s]*>"
+    )
+    # A string literal or an IRI, which is kept as it is, or a comment or a run of whitespace, which is collapsed.
+    _QUERY_TOKEN_PATTERN = re.compile(rf"({_LITERAL_OR_IRI_PATTERN})|(?:\s|#[^\n]*)+")
+
+    def __init__(
+        self,
+        url: str,
+        result_cache_path: Optional[str] = None,
+        result_cache_maximum_size: int = 1 << 30,
+        memory_cache_size: int = 1024,
+        concurrency: int = 4,
+    ):
+        """
+        result_cache_path: The path of the SQLite file that caches the results of the queries, so that the results
+            are reused by later runs. The results are only cached in memory if it is not set.
+        result_cache_maximum_size: The maximum size of the cache file in bytes.
+        memory_cache_size: The number of results that are kept in memory, in front of the cache file. The least
+            recently used results are evicted first. Set it to 0 to disable the memory cache.
+        concurrency: The maximum number of queries that execute_query_list() and get_out_relations_batch() send to
+            the endpoint at the same time.
+        """
+        assert memory_cache_size >= 0
+        assert concurrency > 0
+        self.url = url
         self.sparql_wrapper = SPARQLWrapper(url)
         self.sparql_wrapper.setReturnFormat(JSON)
+        # A SPARQLWrapper holds the query that it sends, so every thread of the pool uses its own instance.
+        self._thread_local = threading.local()
+        self._thread_local.sparql_wrapper = self.sparql_wrapper
+        self.concurrency = concurrency
+        self._thread_pool_executor: Optional[ThreadPoolExecutor] = None
+        self._thread_pool_executor_lock = threading.Lock()
+        self.result_cache: Optional[DiskCache] = (
+            DiskCache(result_cache_path, result_cache_maximum_size)
+            if result_cache_path is not None
+            else None
+        )
+        self.memory_cache_size = memory_cache_size
+        self._memory_cache: OrderedDict[str, dict[str, Any]] = OrderedDict()
+        self._memory_cache_lock = threading.Lock()
+        self.result_cache_statistics = SparqlResultCacheStatistics()
 
-    def _query_endpoint(self, query: str) -> dict[str, Any]:
-        self.sparql_wrapper.setQuery(query)
+    @staticmethod
+    def _normalize_query(query: str) -> str:
+        """
+        The queries built by the f-strings of this class and KnowledgeGraphAPI only differ in their indentation and
+            line breaks, so the comments and the runs of whitespace outside the string literals and the IRIs are
+            collapsed into a single space.
+        """
+
+        def replace(match: re.Match[str]) -> str:
+            if match.group(1) is not None:
+                return match.group(1)
+            return " "
+
+        return SparqlExecutor._QUERY_TOKEN_PATTERN.sub(replace, query).strip()
+
+    def _get_result_cache_key(self, query: str) -> str:
+        # The endpoint is part of the key, so that a cache file can be shared by the endpoints of different graphs.
+        return f"{self.url}\n{self._normalize_query(query)}"
+
+    def _get_cached_result(self, key: str) -> Optional[dict[str, Any]]:
+        with self._memory_cache_lock:
+            results = self._memory_cache.get(key)
+            if results is not None:
+                self._memory_cache.move_to_end(key)
+                self.result_cache_statistics.memory_hit_count += 1
+                return results
+        cached_value = (
+            self.result_cache.get(key) if self.result_cache is not None else None
+        )
+        if cached_value is None:
+            with self._memory_cache_lock:
+                self.result_cache_statistics.miss_count += 1
+            return None
+        results = json.loads(cached_value)
+        assert isinstance(results, dict)
+        with self._memory_cache_lock:
+            self.result_cache_statistics.disk_hit_count += 1
+        self._set_memory_cached_result(key, results)
+        return results
+
+    def _set_cached_result(self, key: str, results: dict[str, Any]) -> None:
+        if self.result_cache is not None:
+            self.result_cache.set(key, json.dumps(results).encode())
+        self._set_memory_cached_result(key, results)
+
+    def _set_memory_cached_result(self, key: str, results: dict[str, Any]) -> None:
+        if self.memory_cache_size == 0:
+            return
+        with self._memory_cache_lock:
+            self._memory_cache[key] = results
+            self._memory_cache.move_to_end(key)
+            while len(self._memory_cache) > self.memory_cache_size:
+                self._memory_cache.popitem(last=False)
+
+    def _send_query(self, query: str) -> dict[str, Any]:
+        """
+        Return the results in the SPARQL 1.1 Query Results JSON Format.
+        """
+        sparql_wrapper: Optional[SPARQLWrapper] = getattr(
+            self._thread_local, "sparql_wrapper", None
+        )
+        if sparql_wrapper is None:
+            sparql_wrapper = SPARQLWrapper(self.url)
+            sparql_wrapper.setReturnFormat(JSON)
+            self._thread_local.sparql_wrapper = sparql_wrapper
+        sparql_wrapper.setQuery(query)
         try:
-            results = self.sparql_wrapper.query().convert()
+            results = sparql_wrapper.query().convert()
         except urllib.error.URLError as e:
             SafeLogger.error(
                 f"Cannot get result for query: {query}. Check whether the endpoint is reachable."
@@ -24,8 +147,49 @@ class SparqlExecutor:
         assert isinstance(results, dict)
         return results
 
+    def _query_endpoint(self, query: str) -> dict[str, Any]:
+        """
+        The results are looked up in the memory cache, then in the cache file, before the query is sent to the
+            endpoint. The knowledge graph is read-only, so the cached results never become stale. The results are
+            shared by the callers, which must not modify them.
+        """
+        key = self._get_result_cache_key(query)
+        cached_results = self._get_cached_result(key)
+        if cached_results is not None:
+            return cached_results
+        results = self._send_query(query)
+        self._set_cached_result(key, results)
+        return results
+
+    def _get_thread_pool_executor(self) -> ThreadPoolExecutor:
+        with self._thread_pool_executor_lock:
+            if self._thread_pool_executor is None:
+                self._thread_pool_executor = ThreadPoolExecutor(
+                    max_workers=self.concurrency,
+                    thread_name_prefix="sparql_executor",
+                )
+            return self._thread_pool_executor
+
+    def close(self) -> None:
+        statistics = self.result_cache_statistics
+        SafeLogger.info(
+            f"[SparqlExecutor] Result cache memory hit count: {statistics.memory_hit_count}, "
+            f"disk hit count: {statistics.disk_hit_count}, miss count: {statistics.miss_count}, "
+            f"hit rate: {statistics.get_hit_rate():.3f}."
+        )
+        with self._thread_pool_executor_lock:
+            if self._thread_pool_executor is not None:
+                self._thread_pool_executor.shutdown()
+                self._thread_pool_executor = None
+        if self.result_cache is not None:
+            self.result_cache.close()
+
     def execute_query(self, query: str) -> List[str]:
         results = self._query_endpoint(query)
+        return SparqlExecutor._convert_query_results(results)
+
+    @staticmethod
+    def _convert_query_results(results: dict[str, Any]) -> List[str]:
         rtn = []
         for result in results["results"]["bindings"]:
             assert len(result) == 1  # only select one variable
@@ -37,6 +201,24 @@ class SparqlExecutor:
                 )
         return sorted(rtn)
 
+    def execute_query_list(self, query_list: Sequence[str]) -> list[List[str]]:
+        """
+        Execute the independent queries concurrently, and return their results in the order of query_list, so that
+            the latency of the whole list is close to the latency of the slowest query.
+        """
+        unique_query_list = list(dict.fromkeys(query_list))
+        if len(unique_query_list) <= 1:
+            return [self.execute_query(query) for query in query_list]
+        result_dict = dict(
+            zip(
+                unique_query_list,
+                self._get_thread_pool_executor().map(
+                    self.execute_query, unique_query_list
+                ),
+            )
+        )
+        return [result_dict[query] for query in query_list]
+
     def execute_unary(self, _type: str) -> List[str]:
         query = f"""PREFIX rdf: <http://www.w3.org/1999/02/22-rdf-syntax-ns#>
         PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>
@@ -178,8 +360,9 @@ class SparqlExecutor:
             )
         return sorted(list(neighbors))
 
-    def get_out_relations(self, entity: str) -> list[str]:
-        query = f"""PREFIX rdf: <http://www.w3.org/1999/02/22-rdf-syntax-ns#>
+    @staticmethod
+    def _get_out_relations_query(entity: str) -> str:
+        return f"""PREFIX rdf: <http://www.w3.org/1999/02/22-rdf-syntax-ns#>
         PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>
         PREFIX : <http://rdf.freebase.com/ns/>
         SELECT (?x0 AS ?value) WHERE {{
@@ -188,7 +371,9 @@ class SparqlExecutor:
         FILTER regex(?x0, "http://rdf.freebase.com/ns/")
         }}
         }}"""
-        results = self._query_endpoint(query)
+
+    @staticmethod
+    def _convert_out_relations_results(results: dict[str, Any]) -> list[str]:
         out_relations = set()
         for result in results["results"]["bindings"]:
             out_relations.add(
@@ -196,6 +381,77 @@ class SparqlExecutor:
             )
         return sorted(list(out_relations))
 
+    def get_out_relations(self, entity: str) -> list[str]:
+        query = SparqlExecutor._get_out_relations_query(entity)
+        results = self._query_endpoint(query)
+        return SparqlExecutor._convert_out_relations_results(results)
+
+    def get_out_relations_batch(
+        self, entity_list: Sequence[str], batch_size: int = 16
+    ) -> dict[str, list[str]]:
+        """
+        Return the results of get_out_relations() for the entities. The entities whose results are not cached are
+            looked up by queries that bind batch_size entities with VALUES, and the queries are sent concurrently.
+            The results of every entity are cached as if get_out_relations() were called, so that the later calls
+            are answered from the cache.
+        The results of a batched query are limited by the maximum number of rows of the endpoint (10000 for
+            Virtuoso by default), which bounds batch_size.
+        """
+        assert batch_size > 0
+        results_dict: dict[str, dict[str, Any]] = {}
+        missed_entity_list: list[str] = []
+        for entity in dict.fromkeys(entity_list):
+            key = self._get_result_cache_key(
+                SparqlExecutor._get_out_relations_query(entity)
+            )
+            cached_results = self._get_cached_result(key)
+            if cached_results is not None:
+                results_dict[entity] = cached_results
+            else:
+                missed_entity_list.append(entity)
+        batched_query_list: list[str] = []
+        for start_index in range(0, len(missed_entity_list), batch_size):
+            value_str = " ".join(
+                f":{entity}"
+                for entity in missed_entity_list[start_index : start_index + batch_size]
+            )
+            batched_query_list.append(
+                f"""PREFIX : <http://rdf.freebase.com/ns/>
+                SELECT DISTINCT ?entity ?x0 WHERE {{
+                VALUES ?entity {{ {value_str} }}
+                ?entity ?x0 ?x1.
+                FILTER regex(?x0, "http://rdf.freebase.com/ns/")
+                }}"""
+            )
+        binding_list_dict: dict[str, list[dict[str, Any]]] = {
+            entity: [] for entity in missed_entity_list
+        }
+        for batched_results in self._get_thread_pool_executor().map(
+            self._send_query, batched_query_list
+        ):
+            for result in batched_results["results"]["bindings"]:
+                entity = result["entity"]["value"].replace(
+                    "http://rdf.freebase.com/ns/", ""
+                )
+                binding_list_dict[entity].append({"value": result["x0"]})
+        for entity, binding_list in binding_list_dict.items():
+            # The same format as the results of the query of get_out_relations().
+            results = {
+                "head": {"vars": ["value"]},
+                "results": {"bindings": binding_list},
+            }
+            self._set_cached_result(
+                self._get_result_cache_key(
+                    SparqlExecutor._get_out_relations_query(entity)
+                ),
+                results,
+            )
+            results_dict[entity] = results
+        return {
+            entity: SparqlExecutor._convert_out_relations_results(results_dict[entity])
+            for entity in entity_list
+        }
+
     def get_out_entities(self, entity: str, relation: str) -> list[str]:
         neighbors = set()
         query = f"""
@@ -1,30 +1,295 @@
 from docker.models import containers
+import io
 import json
+import posixpath
+import shlex
+import tarfile
 import threading
+import time
+import uuid
 import docker
+import hashlib
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Optional
 
 from .utility import (
     CommandItem,
     CommandName,
     CommandExecutionResult,
+    BuildCacheStatistics,
 )
 
 
+# region Scripts of the snapshot, executed by python3 in the container
+# Print the mode and the owner of the directories in the root filesystem.
+_SNAPSHOT_SCRIPT = """
+import json, os, sys
+root_device = os.stat("/").st_dev
+excluded_path_set = set(sys.argv[1:])
+directory_metadata_list = []
+stack = ["/"]
+while stack:
+    directory_path = stack.pop()
+    try:
+        stat_result = os.lstat(directory_path)
+        entry_list = list(os.scandir(directory_path))
+    except OSError:
+        continue
+    directory_metadata_list.append(
+        [directory_path, stat_result.st_mode & 0o7777, stat_result.st_uid, stat_result.st_gid]
+    )
+    for entry in entry_list:
+        if entry.path in excluded_path_set or not entry.is_dir(follow_symlinks=False):
+            continue
+        if entry.stat(follow_symlinks=False).st_dev == root_device:
+            stack.append(entry.path)
+print(json.dumps(directory_metadata_list))
+"""
+# Kill the processes left by the previous sample, remove the added paths and restore the metadata of the modified
+#   directories. Print the directories that are replaced by other types of files, which are removed and should be
+#   copied from the image.
+_RESTORE_SCRIPT = """
+import json, os, shutil, signal, sys
+request_path = sys.argv[1]
+with open(request_path) as f:
+    request = json.load(f)
+os.remove(request_path)
+try:
+    # All the processes except PID 1 and this process.
+    os.kill(-1, signal.SIGKILL)
+except ProcessLookupError:
+    pass
+def remove(path):
+    if os.path.isdir(path) and not os.path.islink(path):
+        shutil.rmtree(path)
+    elif os.path.lexists(path):
+        os.remove(path)
+for path in request["removed_path_list"]:
+    remove(path)
+replaced_path_list = []
+for path, mode, uid, gid in request["directory_metadata_list"]:
+    if os.path.isdir(path) and not os.path.islink(path):
+        os.chown(path, uid, gid)
+        os.chmod(path, mode)
+    else:
+        remove(path)
+        replaced_path_list.append(path)
+print(json.dumps(replaced_path_list))
+"""
+# endregion
+
+
 class OSInteractionContainer:
-    def __init__(self, command_execution_timeout: int, image: str = "local-os/default"):
-        client = docker.from_env()
-        self.container: containers.Container = client.containers.run(
+    # The mount point of the build cache volume.
+    _BUILD_CACHE_PATH = "/var/cache/os_interaction_build"
+    # The paths that are not a part of the image, e.g., the mount points and the files managed by docker.
+    _SNAPSHOT_EXCLUDED_PATH_TUPLE = (
+        "/proc",
+        "/sys",
+        "/dev",
+        "/.dockerenv",
+        "/etc/hostname",
+        "/etc/hosts",
+        "/etc/resolv.conf",
+        _BUILD_CACHE_PATH,
+    )
+    # The values of "Kind" returned by Container.diff().
+    _CHANGE_KIND_MODIFIED = 0
+    _CHANGE_KIND_ADDED = 1
+    _CHANGE_KIND_DELETED = 2
+    # The environment variable that marks the processes started by an execution, see _kill_execution().
+    _EXECUTION_ID_ENVIRONMENT_VARIABLE = "OS_INTERACTION_EXECUTION_ID"
+    # The time to wait for the output to be closed after the processes of a timed out execution are killed.
+    _KILL_GRACE_PERIOD = 5
+
+    def __init__(
+        self,
+        command_execution_timeout: int,
+        image: str = "local-os/default",
+        maximum_output_byte_count: Optional[int] = None,
+        build_cache_volume: Optional[str] = None,
+    ):
+        """
+        maximum_output_byte_count: Only the beginning of the output of a command within the size is kept, the rest
+            of the output is read and discarded. None means no limit.
+        build_cache_volume: The name of the docker volume that stores the executables compiled from the C and C++
+            commands, keyed by the hash of the image and the source. The volume is shared by the containers (and the
+            runs), so an identical source is only compiled once. None disables the cache.
+        """
+        self.client = docker.from_env()
+        self.image = image
+        self.build_cache_volume = build_cache_volume
+        self.container: containers.Container = self.client.containers.run(
             image,
             detach=True,
             tty=True,
             stdin_open=True,
             remove=True,
             labels={"created_by": "os-pipeline"},
+            volumes=(
+                {
+                    build_cache_volume: {
+                        "bind": OSInteractionContainer._BUILD_CACHE_PATH,
+                        "mode": "rw",
+                    }
+                }
+                if build_cache_volume is not None
+                else None
+            ),
         )
         self.timeout_sec: float = command_execution_timeout
+        self.maximum_output_byte_count = maximum_output_byte_count
+        # Reset by the task for every sample.
+        self.build_cache_statistics = BuildCacheStatistics()
+        # Maintained by OSInteractionContainerPool.
+        self.use_count = 0
+        # Set by create_snapshot().
+        self._directory_metadata_dict: Optional[dict[str, tuple[int, int, int]]] = None
+        self._image_container: Optional[containers.Container] = None
 
     def terminate(self) -> None:
-        self.container.kill()
+        try:
+            self.container.kill()
+        finally:
+            if self._image_container is not None:
+                self._image_container.remove(force=True)
+                self._image_container = None
+
+    def create_snapshot(self) -> None:
+        """
+        Record the pristine filesystem, which can be restored by restore_snapshot(). It must be called before any
+            command changes the filesystem.
+        The files are not copied. The changes are read from the writable layer of the container by docker (the
+            upper directory of overlayfs), and the original files are copied from a container of the same image that
+            is created but never started. Only the mode and the owner of the directories are recorded, since a
+            directory is changed whenever its entries are changed.
+        """
+        execution_result = self.execute_independent(
+            CommandItem(command_name=CommandName.PYTHON, script=_SNAPSHOT_SCRIPT),
+            *OSInteractionContainer._SNAPSHOT_EXCLUDED_PATH_TUPLE,
+        )
+        if execution_result.timeout_flag or execution_result.exit_code != 0:
+            raise RuntimeError(
+                f"Failed to create the snapshot. Output: {execution_result.output}"
+            )
+        assert execution_result.output is not None
+        self._directory_metadata_dict = {
+            path: (mode, uid, gid)
+            for path, mode, uid, gid in json.loads(execution_result.output)
+        }
+        self._image_container = self.client.containers.create(
+            self.image, detach=True, labels={"created_by": "os-pipeline"}
+        )
+
+    @staticmethod
+    def _is_descendant(path: str, ancestor_path_set: set[str]) -> bool:
+        parent_path = posixpath.dirname(path)
+        while parent_path != path:
+            if parent_path in ancestor_path_set:
+                return True
+            path, parent_path = parent_path, posixpath.dirname(parent_path)
+        return False
+
+    @staticmethod
+    def _classify_change_list(
+        change_list: list[dict[str, str | int]],
+        directory_metadata_dict: dict[str, tuple[int, int, int]],
+    ) -> tuple[list[str], list[str], list[str]]:
+        """
+        Return the paths to remove, the directories whose metadata should be restored, and the paths to copy from
+            the image. The paths under a removed or copied directory are omitted.
+        """
+        kind_dict: dict[str, int] = {}
+        for change in change_list:
+            path = str(change["Path"])
+            if any(
+                path == excluded_path or path.startswith(f"{excluded_path}/")
+                for excluded_path in OSInteractionContainer._SNAPSHOT_EXCLUDED_PATH_TUPLE
+            ):
+                continue
+            kind_dict[path] = int(change["Kind"])
+        added_path_set = {
+            path
+            for path, kind in kind_dict.items()
+            if kind == OSInteractionContainer._CHANGE_KIND_ADDED
+        }
+        deleted_path_set = {
+            path
+            for path, kind in kind_dict.items()
+            if kind == OSInteractionContainer._CHANGE_KIND_DELETED
+        }
+        removed_path_list: list[str] = []
+        directory_path_list: list[str] = []
+        copied_path_list: list[str] = []
+        for path in sorted(kind_dict.keys()):
+            if OSInteractionContainer._is_descendant(
+                path, added_path_set | deleted_path_set
+            ):
+                continue
+            match kind_dict[path]:
+                case OSInteractionContainer._CHANGE_KIND_ADDED:
+                    removed_path_list.append(path)
+                case OSInteractionContainer._CHANGE_KIND_DELETED:
+                    copied_path_list.append(path)
+                case _:
+                    if path in directory_metadata_dict:
+                        directory_path_list.append(path)
+                    else:
+                        copied_path_list.append(path)
+        return removed_path_list, directory_path_list, copied_path_list
+
+    def restore_snapshot(self) -> None:
+        """
+        Restore the filesystem recorded by create_snapshot(), and kill the processes started by the commands.
+        """
+        assert (
+            self._directory_metadata_dict is not None
+            and self._image_container is not None
+        ), "Call create_snapshot() first."
+        removed_path_list, directory_path_list, copied_path_list = (
+            OSInteractionContainer._classify_change_list(
+                self.container.diff() or [],  # type: ignore[no-untyped-call]
+                self._directory_metadata_dict,
+            )
+        )
+        # region Remove the added paths and restore the directories in the container
+        request_path = f"/.os_interaction_restore_request_{time.time_ns()}.json"
+        request_bytes = json.dumps(
+            {
+                "removed_path_list": removed_path_list,
+                "directory_metadata_list": [
+                    [path, *self._directory_metadata_dict[path]]
+                    for path in directory_path_list
+                ],
+            }
+        ).encode()
+        tar_buffer = io.BytesIO()
+        with tarfile.open(fileobj=tar_buffer, mode="w") as tar_file:
+            tar_info = tarfile.TarInfo(posixpath.basename(request_path))
+            tar_info.size = len(request_bytes)
+            tar_file.addfile(tar_info, io.BytesIO(request_bytes))
+        if not self.container.put_archive("/", tar_buffer.getvalue()):
+            raise RuntimeError("Failed to send the restore request.")
+        execution_result = self.execute_independent(
+            CommandItem(command_name=CommandName.PYTHON, script=_RESTORE_SCRIPT),
+            request_path,
+        )
+        if execution_result.timeout_flag or execution_result.exit_code != 0:
+            raise RuntimeError(
+                f"Failed to restore the snapshot. Output: {execution_result.output}"
+            )
+        assert execution_result.output is not None
+        copied_path_list.extend(json.loads(execution_result.output))
+        # endregion
+        # region Copy the modified and deleted paths from the image
+        for path in copied_path_list:
+            bit_iterator, _ = self._image_container.get_archive(path)
+            if not self.container.put_archive(
+                posixpath.dirname(path), b"".join(bit_iterator)
+            ):
+                raise RuntimeError(f"Failed to restore {path}.")
+        # endregion
 
     def execute_independent(
         self, command_item: CommandItem, *parameters: str
@@ -41,20 +306,10 @@ class OSInteractionContainer:
             case CommandName.PYTHON:
                 cmd = ["python3", "-c", script, *parameters]
             case CommandName.CPP:
-                command_item = CommandItem(
-                    command_name=CommandName.BASH,
-                    script=f'echo "{json.dumps(script)}" > /tmp/main.cpp && '
-                    f"g++ -o /tmp/a.out /tmp/main.cpp",
-                )
-                self.execute_independent(command_item)
+                self._compile("g++", script)
                 cmd = ["/tmp/a.out", *parameters]
             case CommandName.C:
-                command_item = CommandItem(
-                    command_name=CommandName.BASH,
-                    script=f'echo "{json.dumps(script)}" > /tmp/main.cpp && '
-                    f"gcc -o /tmp/a.out /tmp/main.cpp",
-                )
-                self.execute_independent(command_item)
+                self._compile("gcc", script)
                 cmd = ["/tmp/a.out", *parameters]
             case _:
                 raise NotImplementedError("Unsupported language")
@@ -62,30 +317,110 @@ class OSInteractionContainer:
         # we wrap it with our thread-based timeout function.
         return self._execute_with_timeout(cmd)
 
+    def _compile(self, compiler: str, script: str) -> None:
+        """
+        Compile the source to /tmp/a.out. The result of the compilation is not checked, which is the same as
+            executing the compiled program directly.
+        If the build cache is enabled, the executable of an identical source is copied from the cache instead. The
+            compile time is stored along with the executable, so that the saved time is counted by a cache hit.
+        """
+        write_source_command = f"printf '%s' {shlex.quote(script)} > /tmp/main.cpp"
+        compile_command = f"{compiler} -o /tmp/a.out /tmp/main.cpp"
+        if self.build_cache_volume is None:
+            self.execute_independent(
+                CommandItem(
+                    command_name=CommandName.BASH,
+                    script=f"{write_source_command} && {compile_command}",
+                )
+            )
+            return
+        build_key = hashlib.sha256(
+            json.dumps([self.image, compiler, script]).encode()
+        ).hexdigest()
+        build_path = f"{OSInteractionContainer._BUILD_CACHE_PATH}/{build_key}"
+        # The files are renamed into place, so that a concurrent container never reads a partial file.
+        execution_result = self.execute_independent(
+            CommandItem(
+                command_name=CommandName.BASH,
+                script=(
+                    f"{write_source_command} && "
+                    f"if [ -f {build_path} ]; then "
+                    f"cp {build_path} /tmp/a.out && "
+                    f'echo "BUILD_CACHE hit $(cat {build_path}.milliseconds 2>/dev/null || echo 0)"; '
+                    f"else "
+                    f"start_time=$(date +%s%N) && {compile_command} && end_time=$(date +%s%N) && "
+                    f"echo $(( (end_time - start_time) / 1000000 )) > {build_path}.milliseconds.$$ && "
+                    f"mv {build_path}.milliseconds.$$ {build_path}.milliseconds && "
+                    f"cp /tmp/a.out {build_path}.$$ && mv {build_path}.$$ {build_path} && "
+                    f"echo BUILD_CACHE miss; "
+                    f"fi"
+                ),
+            )
+        )
+        output_line_list = (execution_result.output or "").strip().split("\n")
+        match output_line_list[-1].split():
+            case ["BUILD_CACHE", "hit", milliseconds]:
+                self.build_cache_statistics.hit_count += 1
+                self.build_cache_statistics.saved_seconds += int(milliseconds) / 1000
+            case ["BUILD_CACHE", "miss"]:
+                self.build_cache_statistics.miss_count += 1
+            case _:
+                # E.g., the compilation failed or timed out.
+                pass
+
+    def _kill_execution(self, execution_id: str) -> None:
+        """
+        Kill all the processes started by the execution, which inherit the environment variable set by
+            _execute_with_timeout(). Unlike the process group, it also covers the processes that start a new session
+            or process group. The scan is repeated, so that the processes forked during the first scan are killed.
+        """
+        marker = f"{OSInteractionContainer._EXECUTION_ID_ENVIRONMENT_VARIABLE}={execution_id}"
+        kill_script = (
+            "for _ in 1 2; do for process_path in /proc/[0-9]*; do "
+            f'if grep -qzx "{marker}" "$process_path/environ" 2>/dev/null; then '
+            'kill -9 "${process_path#/proc/}" 2>/dev/null; fi; done; done'
+        )
+        self.container.exec_run(["bash", "-c", kill_script])
+
     def _execute_with_timeout(
         self,
         cmd: list[str],
     ) -> CommandExecutionResult:
         """
-        Runs `container.exec_run(cmd)` in a separate thread, enforcing a timeout.
-        Raises TimeoutException if `timeout_sec` is exceeded.
+        Runs `cmd` in the container, enforcing a timeout.
+        The output is read incrementally by a separate thread, and only the first maximum_output_byte_count bytes are
+            kept. If `timeout_sec` is exceeded, the processes started by the command are killed, which closes the
+            output and ends the thread.
         """
-        result_holder: dict[str, CommandExecutionResult | Exception] = {}
+        api_client = self.client.api
+        execution_id = uuid.uuid4().hex
+        exec_id = api_client.exec_create(
+            self.container.id,
+            cmd,
+            environment={
+                OSInteractionContainer._EXECUTION_ID_ENVIRONMENT_VARIABLE: execution_id
+            },
+        )["Id"]
+        output_chunk_list: list[bytes] = []
+        output_state = {"byte_count": 0, "truncated_flag": False}
+        exception_holder: list[Exception] = []
 
-        def run_exec() -> None:
+        def read_output() -> None:
             try:
-                exec_result: docker.models.containers.ExecResult = (
-                    self.container.exec_run(cmd)
-                )
-                result_holder["result"] = CommandExecutionResult(
-                    exit_code=exec_result.exit_code,
-                    output=exec_result.output.decode("utf-8"),
-                    timeout_flag=False,
-                )
+                for chunk in api_client.exec_start(exec_id, stream=True):
+                    if self.maximum_output_byte_count is not None:
+                        remaining_byte_count = (
+                            self.maximum_output_byte_count - output_state["byte_count"]
+                        )
+                        if len(chunk) > remaining_byte_count:
+                            output_state["truncated_flag"] = True
+                            chunk = chunk[: max(remaining_byte_count, 0)]
+                    output_chunk_list.append(chunk)
+                    output_state["byte_count"] += len(chunk)
             except Exception as e:
-                result_holder["exception"] = e
+                exception_holder.append(e)
 
-        thread = threading.Thread(target=run_exec, daemon=True)
+        thread = threading.Thread(target=read_output, daemon=True)
         thread.start()
         thread.join(self.timeout_sec)
 
@@ -94,16 +429,152 @@ class OSInteractionContainer:
             # It is not suitable to raise an exception here, since the timeout will not stop the interaction loop
             # between the agent and the task. This means that timeout is an excepted behavior and should not be handled
             # as an exception.
+            self._kill_execution(execution_id)
+            thread.join(OSInteractionContainer._KILL_GRACE_PERIOD)
             return CommandExecutionResult(
                 exit_code=None, output=None, timeout_flag=True
             )
 
         # If an exception was captured in the worker thread, re-raise it here
-        if (exception := result_holder.get("exception")) is not None:
-            assert isinstance(exception, Exception), "Check the code of run_exec()"
-            raise exception
-        # I do not think it is possible to throw KeyError here.
-        # If it does happen, The caller should throw a TaskEnvironmentException.
-        result = result_holder["result"]
-        assert isinstance(result, CommandExecutionResult)
-        return result
+        if len(exception_holder) > 0:
+            raise exception_holder[0]
+        exec_inspection = api_client.exec_inspect(  # type: ignore[no-untyped-call]
+            exec_id
+        )
+        output_bytes = b"".join(output_chunk_list)
+        truncated_flag = bool(output_state["truncated_flag"])
+        return CommandExecutionResult(
+            exit_code=exec_inspection["ExitCode"],
+            # The end of the truncated output may be a part of a character.
+            output=output_bytes.decode(
+                "utf-8", errors="ignore" if truncated_flag else "strict"
+            ),
+            timeout_flag=False,
+            truncated_flag=truncated_flag,
+        )
+
+
+class OSInteractionContainerPool:
+    """
+    Keep pool_size containers started ahead of the samples, so that the start-up of a container is not on the
+        critical path of a session. When a container is acquired, a new one is started in the background to replace
+        it, and a released container is killed in the background.
+    A container is handed out at most maximum_reuse_count times. When it is larger than 1, the snapshot of every
+        container is created after the start, and a released container is restored from the snapshot in the
+        background before it is handed out again, which is much cheaper than starting a new container. A container
+        that fails to be restored is replaced.
+    When pool_size is 0, the containers are started and killed on demand, which is the same as creating an
+        OSInteractionContainer for every sample.
+    """
+
+    def __init__(
+        self,
+        command_execution_timeout: int,
+        image: str = "local-os/default",
+        pool_size: int = 1,
+        maximum_reuse_count: int = 1,
+        maximum_output_byte_count: Optional[int] = None,
+        build_cache_volume: Optional[str] = None,
+    ):
+        assert pool_size >= 0 and maximum_reuse_count >= 1
+        self.command_execution_timeout = command_execution_timeout
+        self.image = image
+        self.maximum_output_byte_count = maximum_output_byte_count
+        self.build_cache_volume = build_cache_volume
+        self.pool_size = pool_size
+        self.maximum_reuse_count = maximum_reuse_count
+        # Used to start and kill the containers. Kill is not on the critical path, so one more worker is not needed.
+        self._executor = ThreadPoolExecutor(
+            max_workers=max(pool_size, 1), thread_name_prefix="os_container_pool"
+        )
+        # The containers that are ready or being started, in the order of the start.
+        self._container_future_deque: deque[Future[OSInteractionContainer]] = deque()
+        for _ in range(pool_size):
+            self._submit_start()
+
+    def _start_container(self) -> OSInteractionContainer:
+        container = OSInteractionContainer(
+            self.command_execution_timeout,
+            self.image,
+            self.maximum_output_byte_count,
+            self.build_cache_volume,
+        )
+        try:
+            if self.maximum_reuse_count > 1:
+                container.create_snapshot()
+            else:
+                # Make sure that the container is able to execute commands before it is handed out.
+                container.container.exec_run(["true"])
+        except Exception:
+            OSInteractionContainerPool._terminate(container)
+            raise
+        return container
+
+    def _restore_container(
+        self, container: OSInteractionContainer
+    ) -> OSInteractionContainer:
+        try:
+            container.restore_snapshot()
+        except Exception:  # noqa
+            OSInteractionContainerPool._terminate(container)
+            return self._start_container()
+        return container
+
+    def _submit_start(self) -> None:
+        self._container_future_deque.append(
+            self._executor.submit(self._start_container)
+        )
+
+    @staticmethod
+    def _terminate(container: OSInteractionContainer) -> None:
+        try:
+            container.terminate()
+        except Exception:  # noqa
+            pass
+
+    def acquire(self) -> OSInteractionContainer:
+        """
+        Return a started container. The exception raised by the start of the container is raised here.
+        """
+        if len(self._container_future_deque) == 0:
+            container = self._start_container()
+        else:
+            try:
+                container = self._container_future_deque.popleft().result()
+            except Exception:
+                # Start a replacement of the failed container, so that the size of the pool is kept.
+                self._submit_start()
+                raise
+        container.use_count += 1
+        if self.pool_size > 0 and container.use_count >= self.maximum_reuse_count:
+            # The container will not be returned to the pool, start its replacement now.
+            self._submit_start()
+        return container
+
+    def release(self, container: OSInteractionContainer, reusable: bool = True) -> None:
+        """
+        Return the container to the pool, or kill it in the background if it cannot be reused. Set reusable to False
+            if the container is in an unknown state, e.g., after a failed command.
+        """
+        if self.pool_size == 0:
+            OSInteractionContainerPool._terminate(container)
+            return
+        if reusable and container.use_count < self.maximum_reuse_count:
+            self._container_future_deque.appendleft(
+                self._executor.submit(self._restore_container, container)
+            )
+            return
+        if container.use_count < self.maximum_reuse_count:
+            # The replacement was not started when the container was acquired.
+            self._submit_start()
+        self._executor.submit(OSInteractionContainerPool._terminate, container)
+
+    def shutdown(self) -> None:
+        """
+        Kill all the containers in the pool, including the containers that are being started.
+        """
+        self._executor.shutdown(wait=True)
+        while len(self._container_future_deque) > 0:
+            container_future = self._container_future_deque.popleft()
+            if container_future.exception() is None:
+                OSInteractionContainerPool._terminate(container_future.result())
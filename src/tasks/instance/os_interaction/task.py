@@ -1,12 +1,13 @@
 import json
 from pydantic import BaseModel
-from typing import Optional, Any, Sequence
+from typing import Optional, Any
 import re
 
-from .container import OSInteractionContainer
+from .container import OSInteractionContainer, OSInteractionContainerPool
 from .utility import (
     CommandItem,
     CommandName,
+    BuildCacheStatistics,
 )
 from src.tasks.task import (
     Task,
@@ -14,6 +15,7 @@ from src.tasks.task import (
     SkillUtility,
     AgentResponseParserResult,
     AgentAction,
+    MetricAccumulator,
 )
 from src.typings import (
     SampleIndex,
@@ -25,7 +27,6 @@ from src.typings import (
     Role,
     SessionEvaluationOutcome,
     MetricDict,
-    SessionMetricCalculationPartial,
 )
 from src.factories.chat_history_item import ChatHistoryItemFactory
 
@@ -95,7 +96,18 @@ class OSInteraction(Task[OSInteractionDatasetItem]):
         data_file_path: str,
         max_round: int,
         command_execution_timeout: int,
+        container_pool_size: int = 1,
+        container_maximum_reuse_count: int = 1,
+        command_output_maximum_byte_count: Optional[int] = None,
+        build_cache_volume: Optional[str] = "os_interaction_build_cache",
     ):
+        """
+        container_pool_size, container_maximum_reuse_count: See OSInteractionContainerPool.
+        command_output_maximum_byte_count: The maximum size of the output of the command executed by the agent. The
+            output is truncated with a note when it exceeds the size. None means no limit.
+        build_cache_volume: See OSInteractionContainer. The statistics of the cache are recorded in the evaluation
+            record of the sessions that compile C or C++ programs.
+        """
         super().__init__(task_name, chat_history_item_factory, max_round)
         data: dict[str, dict[str, Any]] = json.load(open(data_file_path))
         # self.dataset can also be implemented as a list, but it is implemented as a dict for forward compatibility
@@ -108,6 +120,13 @@ class OSInteraction(Task[OSInteractionDatasetItem]):
         self._set_dataset(dataset)
         self.container: Optional[OSInteractionContainer] = None
         self.command_execution_timeout = command_execution_timeout
+        self.container_pool = OSInteractionContainerPool(
+            command_execution_timeout,
+            pool_size=container_pool_size,
+            maximum_reuse_count=container_maximum_reuse_count,
+            maximum_output_byte_count=command_output_maximum_byte_count,
+            build_cache_volume=build_cache_volume,
+        )
 
     @staticmethod
     def _construct_dataset_item(entry: dict[str, Any]) -> OSInteractionDatasetItem:
@@ -155,7 +174,15 @@ class OSInteraction(Task[OSInteractionDatasetItem]):
         current_dataset_item: OSInteractionDatasetItem = (
             self._get_current_dataset_item()
         )
-        self.container = OSInteractionContainer(self.command_execution_timeout)
+        if self.container is not None:
+            # The previous sample is not completed, e.g., an exception is raised in _reset() or _complete().
+            self.container_pool.release(self.container, reusable=False)
+            self.container = None
+        try:
+            self.container = self.container_pool.acquire()
+        except Exception as e:
+            raise TaskEnvironmentException(str(e))
+        self.container.build_cache_statistics = BuildCacheStatistics()
         command_item = current_dataset_item.initialization_command_item
         try:
             execution_result = self.container.execute_independent(command_item)
@@ -163,6 +190,9 @@ class OSInteraction(Task[OSInteractionDatasetItem]):
             raise TaskEnvironmentException(str(e))
             # region Handle initialization failure
         if execution_result.timeout_flag or execution_result.exit_code != 0:
+            # The container is left in an unknown state.
+            self.container_pool.release(self.container, reusable=False)
+            self.container = None
             raise TaskEnvironmentException(
                 f"Initialization failed with exit code {execution_result.exit_code}\n"
                 f"Output: {execution_result.output}\n"
@@ -183,7 +213,7 @@ class OSInteraction(Task[OSInteractionDatasetItem]):
         # region Parse agent response, ensure the code pass the type check
         parser_response: AgentResponseParserResult = (
             OSInteraction._parse_agent_response(
-                session.chat_history.get_item_deep_copy(-1).content
+                session.chat_history.get_item(-1).content
             )
         )
         assert self.container is not None
@@ -209,6 +239,11 @@ class OSInteraction(Task[OSInteractionDatasetItem]):
                         )
                     else:
                         command_output = command_execution_result.output
+                        if command_execution_result.truncated_flag:
+                            command_output = (
+                                f"{command_output}\n[The output is truncated. Only the first "
+                                f"{self.container.maximum_output_byte_count} bytes are shown.]"
+                            )
                 except Exception as e:
                     session.task_output = self._get_default_task_output()
                     raise TaskEnvironmentException(str(e))
@@ -260,32 +295,38 @@ class OSInteraction(Task[OSInteractionDatasetItem]):
             correct_flag
         )
         # endregion
+        # region Record the statistics of the build cache
+        build_cache_statistics = self.container.build_cache_statistics
+        if build_cache_statistics.hit_count + build_cache_statistics.miss_count > 0:
+            session.evaluation_record.detail_dict = {
+                **(session.evaluation_record.detail_dict or {}),
+                "build_cache_hit_count": build_cache_statistics.hit_count,
+                "build_cache_miss_count": build_cache_statistics.miss_count,
+                "build_cache_saved_seconds": build_cache_statistics.saved_seconds,
+            }
+        # endregion
         # region Clean the container for next sample
-        try:
-            self.container.terminate()
-        except:  # noqa
-            pass
-        finally:
-            self.container = None
+        self.container_pool.release(self.container)
+        self.container = None
         # endregion
 
     def _release(self) -> None:
-        if self.container is not None:
-            try:
-                self.container.terminate()
-            except Exception as e:
-                raise TaskReleaseException(str(e))
+        try:
+            if self.container is not None:
+                self.container_pool.release(self.container, reusable=False)
+                self.container = None
+            self.container_pool.shutdown()
+        except Exception as e:
+            raise TaskReleaseException(str(e))
 
-    def calculate_metric(
-        self, session_partial_list: Sequence[SessionMetricCalculationPartial]
-    ) -> MetricDict:
+    def _calculate_metric(self, metric_accumulator: MetricAccumulator) -> MetricDict:
         skill_metric_dict = self._calculate_metric_based_on_skill(
-            OSInteractionSkillUtility, session_partial_list
+            OSInteractionSkillUtility, metric_accumulator
         )
         difficulty_level_metric_dict = self._calculate_metric_based_on_difficulty_level(
-            session_partial_list
+            metric_accumulator
         )
-        overall_metric_dict = Task._calculate_overall_metric(session_partial_list)
+        overall_metric_dict = Task._calculate_overall_metric(metric_accumulator)
         metric_dict = {
             "skill": skill_metric_dict,
             "difficulty_level": difficulty_level_metric_dict,
@@ -15,7 +15,16 @@ class CommandItem(BaseModel):
     script: str
 
 
+class BuildCacheStatistics(BaseModel):
+    hit_count: int = 0
+    miss_count: int = 0
+    # The sum of the compile time recorded by the builds that are reused.
+    saved_seconds: float = 0
+
+
 class CommandExecutionResult(BaseModel):
     exit_code: Optional[int]
     output: Optional[str]
     timeout_flag: bool
+    # Whether the output exceeds the maximum size and only its beginning is kept.
+    truncated_flag: bool = False
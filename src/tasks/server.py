@@ -1,21 +1,34 @@
 from fastapi import FastAPI, APIRouter
 import uvicorn
+from typing import Optional
 
 from .task import Task, DatasetItem
-from src.typings import TaskRequest, TaskResponse
-from src.utils import Server
+from .session_replica import SessionReplica, SessionDeltaMismatchError
+from src.typings import TaskRequest, TaskResponse, Session, SessionDelta
+from src.utils import Server, SafeLogger
 
 
 class TaskServer(Server):
     def __init__(self, router: APIRouter, task: Task[DatasetItem]) -> None:
         Server.__init__(self, router, task)
         self.task = task
+        # The copy of the session held by the TaskClient, which is used by the delta-based endpoints.
+        self.session_replica: Optional[SessionReplica] = None
         self.router.post("/get_sample_index_list")(self.get_sample_index_list)
         self.router.post("/reset")(self.reset)
         self.router.post("/interact")(self.interact)
         self.router.post("/complete")(self.complete)
+        self.router.post("/reset_with_session_delta")(self.reset_with_session_delta)
+        self.router.post("/interact_with_session_delta")(
+            self.interact_with_session_delta
+        )
+        self.router.post("/complete_with_session_delta")(
+            self.complete_with_session_delta
+        )
+        self.router.post("/get_full_session_delta")(self.get_full_session_delta)
         self.router.post("/release")(self.release)
         self.router.post("/calculate_metric")(self.calculate_metric)
+        self.router.post("/accumulate_metric")(self.accumulate_metric)
 
     def get_sample_index_list(self) -> TaskResponse.GetSampleIndexList:
         sample_index_list = self.task.get_sample_index_list()
@@ -33,6 +46,67 @@ class TaskServer(Server):
         self.task.complete(data.session)
         return TaskResponse.Complete(session=data.session)
 
+    def _apply_session_delta(self, session_delta: SessionDelta) -> Optional[Session]:
+        if session_delta.base_version is None:
+            self.session_replica = SessionReplica(
+                Session(
+                    task_name=session_delta.task_name,
+                    sample_index=session_delta.sample_index,
+                )
+            )
+        elif self.session_replica is None:
+            SafeLogger.warning(
+                "[TaskServer] No session is held by the server, request the full session."
+            )
+            return None
+        try:
+            self.session_replica.apply_delta(session_delta)
+        except SessionDeltaMismatchError as e:
+            SafeLogger.warning(f"[TaskServer] {e} Request the full session.")
+            return None
+        return self.session_replica.session
+
+    def reset_with_session_delta(
+        self, data: TaskRequest.ExchangeSessionDelta
+    ) -> TaskResponse.ExchangeSessionDelta:
+        session = self._apply_session_delta(data.session_delta)
+        if session is None:
+            return TaskResponse.ExchangeSessionDelta(session_delta=None)
+        self.task.reset(session)
+        return self._create_session_delta_response(full=False)
+
+    def interact_with_session_delta(
+        self, data: TaskRequest.ExchangeSessionDelta
+    ) -> TaskResponse.ExchangeSessionDelta:
+        session = self._apply_session_delta(data.session_delta)
+        if session is None:
+            return TaskResponse.ExchangeSessionDelta(session_delta=None)
+        self.task.interact(session)
+        return self._create_session_delta_response(full=False)
+
+    def complete_with_session_delta(
+        self, data: TaskRequest.ExchangeSessionDelta
+    ) -> TaskResponse.ExchangeSessionDelta:
+        session = self._apply_session_delta(data.session_delta)
+        if session is None:
+            return TaskResponse.ExchangeSessionDelta(session_delta=None)
+        self.task.complete(session)
+        return self._create_session_delta_response(full=False)
+
+    def get_full_session_delta(self) -> TaskResponse.ExchangeSessionDelta:
+        """
+        Called by the TaskClient when the session delta returned by the server cannot be applied.
+        """
+        return self._create_session_delta_response(full=True)
+
+    def _create_session_delta_response(
+        self, full: bool
+    ) -> TaskResponse.ExchangeSessionDelta:
+        assert self.session_replica is not None
+        return TaskResponse.ExchangeSessionDelta(
+            session_delta=self.session_replica.create_delta(full=full)
+        )
+
     def release(self) -> None:
         self.task.release()
         return
@@ -43,6 +117,12 @@ class TaskServer(Server):
         metric = self.task.calculate_metric(data.session_partial_list)
         return TaskResponse.CalculateMetric(metric=metric)
 
+    def accumulate_metric(
+        self, data: TaskRequest.AccumulateMetric
+    ) -> TaskResponse.AccumulateMetric:
+        metric = self.task.accumulate_metric(data.session_partial_list, data.reset)
+        return TaskResponse.AccumulateMetric(metric=metric)
+
     def shutdown(self) -> None:
         self.release()
 
@@ -0,0 +1,212 @@
+import hashlib
+import json
+from typing import Any, Optional
+
+from pydantic import TypeAdapter
+
+from src.typings import (
+    Session,
+    SessionDelta,
+    SampleIndex,
+    ChatHistory,
+    ChatHistoryItem,
+)
+
+
+class SessionDeltaMismatchError(Exception):
+    pass
+
+
+class SessionReplica:
+    """
+    Track the state of a session that the peer (TaskClient or TaskServer) is known to hold, so that only the changes
+        since then need to be transferred.
+    The chat history items are immutable, so the changed items are found by comparing the identities of the items.
+    The checksum of the chat history is calculated as a hash chain over the items, the digests of the synchronized
+        items are kept, so calculating the checksum only costs O(size of the changed items).
+    """
+
+    # The fields other than the identity of the session and the chat history are transferred as a whole.
+    SCALAR_FIELD_NAME_TUPLE = tuple(
+        field_name
+        for field_name in Session.model_fields.keys()
+        if field_name not in {"task_name", "sample_index", "chat_history"}
+    )
+    _SCALAR_FIELD_TYPE_ADAPTER_DICT: dict[str, TypeAdapter[Any]] = {
+        field_name: TypeAdapter(Session.model_fields[field_name].annotation)
+        for field_name in SCALAR_FIELD_NAME_TUPLE
+    }
+    _SCALAR_FIELD_DICT_TYPE_ADAPTER: TypeAdapter[dict[str, Any]] = TypeAdapter(
+        dict[str, Any]
+    )
+
+    def __init__(self, session: Session):
+        self.session = session
+        # None means the peer does not hold the session, the next delta will contain the full session.
+        self.version: Optional[int] = None
+        self._item_list: list[ChatHistoryItem] = []
+        self._item_digest_list: list[bytes] = []
+        self._scalar_field_dict: dict[str, Any] = {}
+
+    @staticmethod
+    def _calculate_item_digest(
+        previous_digest: bytes, chat_history_item: ChatHistoryItem
+    ) -> bytes:
+        hash_object = hashlib.blake2b(previous_digest, digest_size=16)
+        hash_object.update(chat_history_item.role.encode())
+        hash_object.update(b"\0")
+        hash_object.update(chat_history_item.content.encode())
+        return hash_object.digest()
+
+    def _extend_item_digest_list(
+        self, start_index: int, chat_history_item_list: list[ChatHistoryItem]
+    ) -> list[bytes]:
+        item_digest_list = self._item_digest_list[:start_index]
+        previous_digest = item_digest_list[-1] if len(item_digest_list) > 0 else b""
+        for chat_history_item in chat_history_item_list:
+            previous_digest = self._calculate_item_digest(
+                previous_digest, chat_history_item
+            )
+            item_digest_list.append(previous_digest)
+        return item_digest_list
+
+    @staticmethod
+    def _calculate_checksum(
+        session_delta_header: tuple[str, SampleIndex],
+        item_digest_list: list[bytes],
+        scalar_field_dict: dict[str, Any],
+    ) -> str:
+        hash_object = hashlib.blake2b(digest_size=16)
+        hash_object.update(json.dumps(session_delta_header).encode())
+        hash_object.update(item_digest_list[-1] if len(item_digest_list) > 0 else b"")
+        hash_object.update(json.dumps(scalar_field_dict, sort_keys=True).encode())
+        return hash_object.hexdigest()
+
+    def _dump_scalar_field_dict(self) -> dict[str, Any]:
+        # Serialize the values in the same way as SessionDelta.scalar_field_dict is serialized for the transfer
+        #   (e.g., float("inf") is serialized as None), so that the values are the same on both sides.
+        scalar_field_dict: dict[str, Any] = (
+            self._SCALAR_FIELD_DICT_TYPE_ADAPTER.dump_python(
+                self.session.model_dump(include=set(self.SCALAR_FIELD_NAME_TUPLE)),
+                mode="json",
+            )
+        )
+        return scalar_field_dict
+
+    def create_delta(self, full: bool = False) -> SessionDelta:
+        """
+        Create the delta from the synchronized state to the current session, then regard the current session as
+            synchronized.
+        If full is True, or the peer does not hold the session, the delta contains the full session.
+        The state advances before the peer acknowledges the delta. If the delta is lost, the next delta is based on
+            a version that the peer does not hold, so the peer rejects it and the caller should send a full delta.
+        """
+        current_item_list = list(self.session.chat_history.iterate_item())
+        current_scalar_field_dict = self._dump_scalar_field_dict()
+        base_version = None if full else self.version
+        if base_version is None:
+            start_index = 0
+            scalar_field_dict = current_scalar_field_dict
+        else:
+            start_index = 0
+            common_length = min(len(current_item_list), len(self._item_list))
+            while (
+                start_index < common_length
+                and current_item_list[start_index] is self._item_list[start_index]
+            ):
+                start_index += 1
+            scalar_field_dict = {
+                field_name: field_value
+                for field_name, field_value in current_scalar_field_dict.items()
+                if self._scalar_field_dict.get(field_name) != field_value
+            }
+        delta_item_list = current_item_list[start_index:]
+        item_digest_list = self._extend_item_digest_list(start_index, delta_item_list)
+        version = (self.version or 0) + 1
+        session_delta = SessionDelta(
+            task_name=self.session.task_name,
+            sample_index=self.session.sample_index,
+            base_version=base_version,
+            version=version,
+            chat_history_start_index=start_index,
+            chat_history_item_list=delta_item_list,
+            scalar_field_dict=scalar_field_dict,
+            checksum=self._calculate_checksum(
+                (self.session.task_name, self.session.sample_index),
+                item_digest_list,
+                current_scalar_field_dict,
+            ),
+        )
+        self.version = version
+        self._item_list = current_item_list
+        self._item_digest_list = item_digest_list
+        self._scalar_field_dict = current_scalar_field_dict
+        return session_delta
+
+    def apply_delta(self, session_delta: SessionDelta) -> None:
+        """
+        Apply the delta created by the peer to the session. The session must not be modified since it is
+            synchronized last time.
+        Raise SessionDeltaMismatchError if the delta cannot be applied, the session is not modified in that case.
+        """
+        if session_delta.base_version is None:
+            start_index = 0
+            scalar_field_dict = dict(session_delta.scalar_field_dict)
+        else:
+            if (
+                session_delta.base_version != self.version
+                or session_delta.task_name != self.session.task_name
+                or session_delta.sample_index != self.session.sample_index
+                or session_delta.chat_history_start_index > len(self._item_list)
+            ):
+                raise SessionDeltaMismatchError(
+                    f"The delta based on version {session_delta.base_version} cannot be applied to version "
+                    f"{self.version}."
+                )
+            start_index = session_delta.chat_history_start_index
+            scalar_field_dict = {
+                **self._scalar_field_dict,
+                **session_delta.scalar_field_dict,
+            }
+        if set(scalar_field_dict.keys()) != set(self.SCALAR_FIELD_NAME_TUPLE):
+            raise SessionDeltaMismatchError("The scalar fields are incomplete.")
+        item_list = self._item_list[:start_index] + session_delta.chat_history_item_list
+        item_digest_list = self._extend_item_digest_list(
+            start_index, session_delta.chat_history_item_list
+        )
+        if (
+            self._calculate_checksum(
+                (session_delta.task_name, session_delta.sample_index),
+                item_digest_list,
+                scalar_field_dict,
+            )
+            != session_delta.checksum
+        ):
+            raise SessionDeltaMismatchError("The checksum of the session mismatches.")
+        # region Update the session
+        if session_delta.base_version is None:
+            self.session.task_name = session_delta.task_name
+            self.session.sample_index = session_delta.sample_index
+        if (
+            session_delta.base_version is None
+            or start_index != len(self._item_list)
+            or len(session_delta.chat_history_item_list) > 0
+        ):
+            self.session.chat_history = ChatHistory(value=item_list)
+        for field_name in self.SCALAR_FIELD_NAME_TUPLE:
+            if (
+                session_delta.base_version is None
+                or field_name in session_delta.scalar_field_dict
+            ):
+                setattr(
+                    self.session,
+                    field_name,
+                    self._SCALAR_FIELD_TYPE_ADAPTER_DICT[field_name].validate_python(
+                        scalar_field_dict[field_name]
+                    ),
+                )
+        # endregion
+        self.version = session_delta.version
+        self._item_list = item_list
+        self._item_digest_list = item_digest_list
+        self._scalar_field_dict = scalar_field_dict
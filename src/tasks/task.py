@@ -1,10 +1,8 @@
-from typing import final, Optional, Any, TypeVar, Generic, Sequence
+from typing import final, Optional, Any, TypeVar, Generic, Sequence, Mapping
 from abc import ABC, abstractmethod
 
 from pydantic import BaseModel
 from enum import StrEnum
-import inspect
-import warnings
 
 from src.typings import (
     SampleIndex,
@@ -93,6 +91,14 @@ class TaskInterface(ABC):
     ) -> MetricDict:
         raise NotImplementedError()
 
+    @abstractmethod
+    def accumulate_metric(
+        self,
+        session_partial_list: Sequence[SessionMetricCalculationPartial],
+        reset: bool = False,
+    ) -> MetricDict:
+        raise NotImplementedError()
+
 
 class AgentAction(StrEnum):
     EXECUTE = "execute"
@@ -111,6 +117,80 @@ T = TypeVar("T")
 DatasetItemSubclass = TypeVar("DatasetItemSubclass", bound=DatasetItem)
 
 
+class SampleMetricInfo(BaseModel):
+    """
+    The part of a DatasetItem that is used to calculate the metric.
+    """
+
+    skill_list: tuple[str, ...]
+    effective_skill_set: frozenset[str]
+    difficulty_level: int
+
+
+class MetricAccumulator:
+    """
+    Keep the counters that are needed to calculate the metric, so that the metric can be updated session by session.
+    Adding a session costs O(skill count of the session), and producing the metric costs O(skill count + difficulty
+        level count), no matter how many sessions have been added.
+    """
+
+    def __init__(self) -> None:
+        self.session_count: int = 0
+        # region Counters of Task._calculate_metric_based_on_skill
+        self.skill_count_dict: dict[str, int] = {}
+        self.skill_correct_count_dict: dict[str, int] = {}
+        self.effective_skill_count_dict: dict[str, int] = {}
+        self.effective_skill_correct_count_dict: dict[str, int] = {}
+        # endregion
+        # region Counters of Task._calculate_metric_based_on_difficulty_level
+        self.difficulty_level_count_dict: dict[int, int] = {}
+        self.difficulty_level_correct_count_dict: dict[int, int] = {}
+        # endregion
+        # region Counters of Task._calculate_overall_metric
+        self.evaluation_outcome_count_dict: dict[SessionEvaluationOutcome, int] = {}
+        self.sample_status_count_dict: dict[SampleStatus, int] = {}
+        # endregion
+        # The sum of the task-specific values, see Task._get_additional_metric_numerator_dict
+        self.additional_numerator_dict: dict[str, float] = {}
+
+    @staticmethod
+    def _increase(count_dict: dict[T, int], key: T) -> None:
+        count_dict[key] = count_dict.get(key, 0) + 1
+
+    def add(
+        self,
+        session_partial: SessionMetricCalculationPartial,
+        sample_metric_info: SampleMetricInfo,
+        additional_numerator_dict: Mapping[str, float],
+    ) -> None:
+        correct_flag = (
+            session_partial.evaluation_record.outcome
+            == SessionEvaluationOutcome.CORRECT
+        )
+        self.session_count += 1
+        for skill in sample_metric_info.skill_list:
+            self._increase(self.skill_count_dict, skill)
+            if correct_flag:
+                self._increase(self.skill_correct_count_dict, skill)
+            if skill in sample_metric_info.effective_skill_set:
+                self._increase(self.effective_skill_count_dict, skill)
+                if correct_flag:
+                    self._increase(self.effective_skill_correct_count_dict, skill)
+        difficulty_level = sample_metric_info.difficulty_level
+        self._increase(self.difficulty_level_count_dict, difficulty_level)
+        if correct_flag:
+            self._increase(self.difficulty_level_correct_count_dict, difficulty_level)
+        self._increase(
+            self.evaluation_outcome_count_dict,
+            session_partial.evaluation_record.outcome,
+        )
+        self._increase(self.sample_status_count_dict, session_partial.sample_status)
+        for key, value in additional_numerator_dict.items():
+            self.additional_numerator_dict[key] = (
+                self.additional_numerator_dict.get(key, 0) + value
+            )
+
+
 class Task(TaskInterface, Generic[DatasetItemSubclass]):
     def __init__(
         self,
@@ -129,7 +209,11 @@ class Task(TaskInterface, Generic[DatasetItemSubclass]):
         self.max_round = max_round
         self.current_round = 0
         self.__dataset: Optional[dict[SampleIndex, DatasetItemSubclass]] = None
+        # Filled lazily by __get_sample_metric_info().
+        self.__sample_metric_info_dict: dict[SampleIndex, SampleMetricInfo] = {}
         self.__current_dataset_item: Optional[DatasetItemSubclass] = None
+        # Updated by accumulate_metric().
+        self.__metric_accumulator = MetricAccumulator()
 
     @final
     def _set_dataset(self, dataset: dict[SampleIndex, DatasetItemSubclass]) -> None:
@@ -143,25 +227,25 @@ class Task(TaskInterface, Generic[DatasetItemSubclass]):
         return self.__current_dataset_item
 
     @final
-    def __get_dataset_item(self, sample_index: SampleIndex) -> DatasetItemSubclass:
-        caller_frame = inspect.stack()[1]
-        expected_function_name_list = [
-            self._calculate_metric_based_on_skill.__name__,
-            self._calculate_metric_based_on_difficulty_level.__name__,
-        ]
-        if caller_frame.function not in expected_function_name_list:
-            allowed_function_str = ""
-            for expected_function_name in expected_function_name_list:
-                allowed_function_str += f"Task.{expected_function_name}, "
-            allowed_function_str = allowed_function_str[:-2] + "."
-            warnings.warn(
-                f"The function is only expected to be called by {allowed_function_str}",
-                RuntimeWarning,
+    def __get_sample_metric_info(self, sample_index: SampleIndex) -> SampleMetricInfo:
+        """
+        Only the information needed by the metric calculation is exposed, instead of the dataset item itself.
+        The information is computed once per sample and cached.
+        """
+        if (
+            sample_metric_info := self.__sample_metric_info_dict.get(sample_index)
+        ) is None:
+            # The function will not check the existence of the sample index in the dataset,
+            # since it is a very low-level function.
+            assert self.__dataset is not None
+            dataset_item = self.__dataset[sample_index]
+            sample_metric_info = SampleMetricInfo(
+                skill_list=tuple(dataset_item.get_skill_list()),
+                effective_skill_set=frozenset(dataset_item.get_effective_skill_list()),
+                difficulty_level=dataset_item.get_difficulty_level(),
             )
-        # The function will not check the existence of the sample index in the dataset,
-        # since it is a very low-level function.
-        assert self.__dataset is not None
-        return self.__dataset[sample_index]
+            self.__sample_metric_info_dict[sample_index] = sample_metric_info
+        return sample_metric_info
 
     @abstractmethod
     def _get_default_task_output(self) -> dict[str, Optional[str]]:
@@ -193,37 +277,50 @@ class Task(TaskInterface, Generic[DatasetItemSubclass]):
         return correct_rate_dict
 
     @final
-    def _calculate_metric_based_on_skill(
+    def _update_metric_accumulator(
         self,
+        metric_accumulator: MetricAccumulator,
+        session_partial: SessionMetricCalculationPartial,
+    ) -> None:
+        metric_accumulator.add(
+            session_partial,
+            self.__get_sample_metric_info(session_partial.sample_index),
+            self._get_additional_metric_numerator_dict(session_partial),
+        )
+
+    def _get_additional_metric_numerator_dict(
+        self, session_partial: SessionMetricCalculationPartial
+    ) -> dict[str, float]:
+        """
+        The values returned by the method are summed up in MetricAccumulator.additional_numerator_dict.
+        The method can be overridden in the subclass to calculate task-specific metrics.
+        """
+        return {}
+
+    @staticmethod
+    @final
+    def _calculate_metric_based_on_skill(
         skill_utility_cls: type[SkillUtility],
-        session_partial_list: Sequence[SessionMetricCalculationPartial],
+        metric_accumulator: MetricAccumulator,
     ) -> dict[str, dict[str, float]]:
-        count_dict = {key: 0 for key in skill_utility_cls.get_all_skill_list()}
-        correct_count_dict = {key: 0 for key in skill_utility_cls.get_all_skill_list()}
-        effective_count_dict = {
-            key: 0 for key in skill_utility_cls.get_all_skill_list()
-        }
-        effective_correct_count_dict = {
-            key: 0 for key in skill_utility_cls.get_all_skill_list()
-        }
-        for session_partial in session_partial_list:
-            sample_index = session_partial.sample_index
-            dataset_item: DatasetItemSubclass = self.__get_dataset_item(sample_index)
-            for skill in dataset_item.get_skill_list():
-                # region Handle total count
-                count_dict[skill] += 1
-                if skill in dataset_item.get_effective_skill_list():
-                    effective_count_dict[skill] += 1
-                # endregion
-                # region Handle correct count
-                if (
-                    session_partial.evaluation_record.outcome
-                    == SessionEvaluationOutcome.CORRECT
-                ):
-                    correct_count_dict[skill] += 1
-                    if skill in dataset_item.get_effective_skill_list():
-                        effective_correct_count_dict[skill] += 1
-                # endregion
+        all_skill_list = skill_utility_cls.get_all_skill_list()
+        unknown_skill_set = set(metric_accumulator.skill_count_dict.keys()) - set(
+            all_skill_list
+        )
+        if len(unknown_skill_set) > 0:
+            raise KeyError(f"Unknown skills: {sorted(unknown_skill_set)}")
+
+        def get_count_dict(source_count_dict: dict[str, int]) -> dict[str, int]:
+            return {key: source_count_dict.get(key, 0) for key in all_skill_list}
+
+        count_dict = get_count_dict(metric_accumulator.skill_count_dict)
+        correct_count_dict = get_count_dict(metric_accumulator.skill_correct_count_dict)
+        effective_count_dict = get_count_dict(
+            metric_accumulator.effective_skill_count_dict
+        )
+        effective_correct_count_dict = get_count_dict(
+            metric_accumulator.effective_skill_correct_count_dict
+        )
         skill_correct_rate_dict = Task._calculate_correct_rate(
             count_dict, correct_count_dict
         )
@@ -240,34 +337,22 @@ class Task(TaskInterface, Generic[DatasetItemSubclass]):
         }
         return skill_metric_dict
 
+    @staticmethod
     @final
     def _calculate_metric_based_on_difficulty_level(
-        self,
-        session_partial_list: Sequence[SessionMetricCalculationPartial],
+        metric_accumulator: MetricAccumulator,
     ) -> dict[str, dict[str, float]]:
-        # region Preparation
-        difficulty_level_set: set[int] = set()
-        for session_partial in session_partial_list:
-            # Use for-loop instead of list comprehension to mute warnings.
-            difficulty_level: int = self.__get_dataset_item(
-                session_partial.sample_index
-            ).get_difficulty_level()
-            difficulty_level_set.add(difficulty_level)
-        difficulty_level_list: list[int] = sorted(list(difficulty_level_set))
-        count_dict = {str(key): 0 for key in difficulty_level_list}
-        # endregion
-        correct_count_dict = {str(key): 0 for key in difficulty_level_list}
-        for session_partial in session_partial_list:
-            sample_index = session_partial.sample_index
-            dataset_item: DatasetItemSubclass = self.__get_dataset_item(sample_index)
-            difficulty_level = dataset_item.get_difficulty_level()
-            difficulty_level_str = str(difficulty_level)
-            count_dict[difficulty_level_str] += 1
-            if (
-                session_partial.evaluation_record.outcome
-                == SessionEvaluationOutcome.CORRECT
-            ):
-                correct_count_dict[difficulty_level_str] += 1
+        difficulty_level_list: list[int] = sorted(
+            metric_accumulator.difficulty_level_count_dict.keys()
+        )
+        count_dict = {
+            str(key): metric_accumulator.difficulty_level_count_dict[key]
+            for key in difficulty_level_list
+        }
+        correct_count_dict = {
+            str(key): metric_accumulator.difficulty_level_correct_count_dict.get(key, 0)
+            for key in difficulty_level_list
+        }
         sample_level_correct_rate_dict = Task._calculate_correct_rate(
             count_dict, correct_count_dict
         )
@@ -280,13 +365,13 @@ class Task(TaskInterface, Generic[DatasetItemSubclass]):
 
     @staticmethod
     def _calculate_overall_metric(
-        session_partial_list: Sequence[SessionMetricCalculationPartial],
+        metric_accumulator: MetricAccumulator,
     ) -> dict[str, dict[str, float]]:
         """
         The method can be overridden in the subclass, if necessary.
         """
         # region Record the number of sessions
-        session_count = len(session_partial_list)
+        session_count = metric_accumulator.session_count
         overall_metric_dict: dict[str, dict[str, float]] = {
             "basic": {"session_count": float(session_count)},
         }
@@ -296,12 +381,8 @@ class Task(TaskInterface, Generic[DatasetItemSubclass]):
         # region Calculate the rate of each SessionEvaluationOutcome
         evaluation_outcome_metric_dict = {}
         for evaluation_outcome in SessionEvaluationOutcome:
-            outcome_count = len(
-                [
-                    session
-                    for session in session_partial_list
-                    if session.evaluation_record.outcome == evaluation_outcome
-                ]
+            outcome_count = metric_accumulator.evaluation_outcome_count_dict.get(
+                evaluation_outcome, 0
             )
             evaluation_outcome_metric_dict[str(evaluation_outcome)] = (
                 outcome_count / session_count
@@ -311,12 +392,8 @@ class Task(TaskInterface, Generic[DatasetItemSubclass]):
         # region Calculate the rate of each SampleStatus
         sample_status_metric_dict = {}
         for sample_status in SampleStatus:
-            status_count = len(
-                [
-                    session
-                    for session in session_partial_list
-                    if session.sample_status == sample_status
-                ]
+            status_count = metric_accumulator.sample_status_count_dict.get(
+                sample_status, 0
             )
             sample_status_metric_dict[str(sample_status)] = status_count / session_count
         overall_metric_dict["sample_status"] = sample_status_metric_dict
@@ -377,7 +454,7 @@ class Task(TaskInterface, Generic[DatasetItemSubclass]):
         ) or session.sample_status.is_agent_inference_process_abnormal()
         assert session.sample_index == self.current_sample_index
         assert session.task_name == self.task_name
-        assert session.chat_history.get_item_deep_copy(-1).role == Role.AGENT
+        assert session.chat_history.get_item(-1).role == Role.AGENT
         assert session.task_output is None
         # endregion
         try:
@@ -498,16 +575,47 @@ class Task(TaskInterface, Generic[DatasetItemSubclass]):
         """
         raise NotImplementedError()
 
-    @abstractmethod
+    @final
     def calculate_metric(
         self, session_partial_list: Sequence[SessionMetricCalculationPartial]
     ) -> MetricDict:
         """
         Calculate and return metrics based on a list of sessions.
         Past a list with one element to calculate the metric for a single sample.
+        The method does not affect the metric returned by accumulate_metric().
+        """
+        metric_accumulator = MetricAccumulator()
+        for session_partial in session_partial_list:
+            self._update_metric_accumulator(metric_accumulator, session_partial)
+        return self._calculate_metric(metric_accumulator)
+
+    @final
+    def accumulate_metric(
+        self,
+        session_partial_list: Sequence[SessionMetricCalculationPartial],
+        reset: bool = False,
+    ) -> MetricDict:
+        """
+        Add the sessions to the metric that is maintained by the task, and return the metric of all the sessions that
+            have been added so far. The returned metric is the same as calling calculate_metric() with all of them.
+        Pass an empty list to get the current metric.
+        If reset is True, the sessions that have been added are discarded first, so the metric is replaced by the
+            metric of session_partial_list. The task may outlive the assignment (e.g., behind a TaskServer), so it is
+            used when an assignment starts or is resumed.
+        """
+        if reset:
+            self.__metric_accumulator = MetricAccumulator()
+        for session_partial in session_partial_list:
+            self._update_metric_accumulator(self.__metric_accumulator, session_partial)
+        return self._calculate_metric(self.__metric_accumulator)
+
+    @abstractmethod
+    def _calculate_metric(self, metric_accumulator: MetricAccumulator) -> MetricDict:
+        """
+        Produce the metric from the counters in metric_accumulator.
         The most simple implementation is:
         ```
-        return self._calculate_overall_metric(session_list)
+        return {"overall": self._calculate_overall_metric(metric_accumulator)}
         ```
         """
         raise NotImplementedError()
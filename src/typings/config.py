@@ -24,6 +24,9 @@ class AssignmentConfig(BaseModel):
     callback_dict: Mapping[str, GeneralInstanceFactory]
     output_dir: str
     sample_order: Sequence[SampleIndex] | SampleOrderDescription
+    # The number of sessions that are allowed to run at the same time. Each concurrent session is served by an
+    #   independent (task, agent) pair, see ConfigUtility.construct_worker_list for more details.
+    session_concurrency: int = 1
 
     @field_validator("output_dir", mode="before")  # noqa
     @classmethod
@@ -72,6 +75,11 @@ class PathConfig(BaseModel):
 
     exception_record_file_path: str
     config_output_path: str
+    # runs.json, compacted from the session journal. See src.utils.SessionJournal.
     session_list_output_path: str
+    # runs.jsonl, the append-only journal of the finished sessions.
+    session_journal_path: str
+    # runs_index.jsonl, the index that is used to resume the assignment. See src.utils.SessionResumeIndex.
+    session_resume_index_path: str
     metric_output_path: str
     coredumpy_output_dir: str
@@ -195,3 +195,25 @@ class InstanceFactoryUtility:
         ).create()  # Use GeneralInstanceFactory to create an InstanceFactory
         # Use the created InstanceFactory to create an instance
         return instance_factory.create()
+
+
+class HttpTransferPayload(BaseModel):
+    # A value transferred through HTTP by an instance factory, see InstanceFactoryUtility.
+    instance_factory_type: InstanceFactoryType
+    instance_factory_parameter_dict: dict[str, Any]
+
+    @staticmethod
+    def from_value(value: Any) -> "HttpTransferPayload":
+        instance_factory, instance_factory_type = (
+            InstanceFactoryUtility.create_instance_factory_for_http_transfer(value)
+        )
+        return HttpTransferPayload(
+            instance_factory_type=instance_factory_type,
+            instance_factory_parameter_dict=instance_factory.model_dump(),
+        )
+
+    def restore_value(self) -> Any:
+        return InstanceFactoryUtility.restore_instance_for_http_transfer(
+            instance_factory_type=self.instance_factory_type,
+            parameter_dict=self.instance_factory_parameter_dict,
+        )
@@ -1,9 +1,9 @@
 from pydantic import BaseModel
-from typing import Optional, Any, Sequence
+from typing import Optional, Any, Sequence, Literal
 
-from .session import Session, SessionMetricCalculationPartial
+from .session import Session, SessionMetricCalculationPartial, SessionDelta
 from .general import Role
-from .instance_factory import InstanceFactoryType
+from .instance_factory import InstanceFactoryType, HttpTransferPayload
 
 
 class GeneralRequest:
@@ -15,6 +15,17 @@ class GeneralRequest:
         instance_factory_type: InstanceFactoryType
         instance_factory_parameter_dict: dict[str, Any]
 
+    class BatchOperation(BaseModel):
+        operation_type: Literal["get_attribute", "set_attribute", "call_method"]
+        # The name can be a dotted path (e.g., "chat_history_item_factory.set"), which is resolved on the server.
+        name: str
+        # For set_attribute, argument_list contains the value to set.
+        argument_list: list[HttpTransferPayload] = []
+        keyword_argument_dict: dict[str, HttpTransferPayload] = {}
+
+    class Batch(BaseModel):
+        operation_list: list["GeneralRequest.BatchOperation"]
+
 
 class TaskRequest:
     class Reset(BaseModel):
@@ -26,9 +37,16 @@ class TaskRequest:
     class Complete(BaseModel):
         session: Session
 
+    class ExchangeSessionDelta(BaseModel):
+        session_delta: SessionDelta
+
     class CalculateMetric(BaseModel):
         session_partial_list: Sequence[SessionMetricCalculationPartial]
 
+    class AccumulateMetric(BaseModel):
+        session_partial_list: Sequence[SessionMetricCalculationPartial]
+        reset: bool = False
+
 
 class ChatHistoryItemFactoryRequest:
     class Construct(BaseModel):
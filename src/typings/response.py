@@ -1,9 +1,9 @@
 from pydantic import BaseModel
 from typing import Optional, Any
 
-from .session import Session
+from .session import Session, SessionDelta
 from .general import SampleIndex, ChatHistoryItem, ChatHistoryItemDict, MetricDict
-from .instance_factory import InstanceFactoryType
+from .instance_factory import InstanceFactoryType, HttpTransferPayload
 
 
 class GeneralResponse:
@@ -14,6 +14,16 @@ class GeneralResponse:
     class Ping(BaseModel):
         response: str
 
+    class BatchResult(BaseModel):
+        # value is None for set_attribute. The error is set if the operation raises an exception, the operations after
+        # it are not executed.
+        value: Optional[HttpTransferPayload] = None
+        error_type: Optional[str] = None
+        error_message: Optional[str] = None
+
+    class Batch(BaseModel):
+        result_list: list["GeneralResponse.BatchResult"]
+
 
 class TaskResponse:
     class GetSampleIndexList(BaseModel):
@@ -28,9 +38,16 @@ class TaskResponse:
     class Complete(BaseModel):
         session: Session
 
+    class ExchangeSessionDelta(BaseModel):
+        # None if the delta in the request cannot be applied, the request should be sent again with the full session.
+        session_delta: Optional[SessionDelta]
+
     class CalculateMetric(BaseModel):
         metric: MetricDict
 
+    class AccumulateMetric(BaseModel):
+        metric: MetricDict
+
 
 class ChatHistoryItemFactoryResponse:
     class Construct(BaseModel):
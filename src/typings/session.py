@@ -1,4 +1,4 @@
-from typing import Optional, Any, Mapping, Generator
+from typing import Optional, Any, Mapping, Generator, Iterator
 from pydantic import BaseModel
 from enum import StrEnum
 
@@ -43,11 +43,36 @@ class ChatHistory(BaseModel):
         value: list[ChatHistoryItem] = super().__getattribute__("value")
         return value.pop(item_index)
 
+    def get_item(self, item_index: int) -> ChatHistoryItem:
+        # ChatHistoryItem is immutable, so the item can be returned without copying.
+        item: ChatHistoryItem = super().__getattribute__("value")[item_index]
+        return item
+
     def get_item_deep_copy(self, item_index: int) -> ChatHistoryItem:
-        item = super().__getattribute__("value")[item_index]
-        item_copy: ChatHistoryItem = item.model_copy(deep=True)
+        # Use get_item() instead, unless a distinct instance is really needed.
+        item_copy: ChatHistoryItem = self.get_item(item_index).model_copy(deep=True)
         return item_copy
 
+    def iterate_item(
+        self, start_index: int = 0, end_index: Optional[int] = None
+    ) -> Iterator[ChatHistoryItem]:
+        """
+        Iterate the items in [start_index, end_index) without copying them.
+        Do not modify the chat history during the iteration.
+        """
+        value: list[ChatHistoryItem] = super().__getattribute__("value")
+        if end_index is None:
+            end_index = len(value)
+        for item_index in range(start_index, end_index):
+            yield value[item_index]
+
+    def get_copy(self) -> "ChatHistory":
+        """
+        Return a chat history that can be modified independently. The items are shared, since they are immutable.
+        """
+        value: list[ChatHistoryItem] = super().__getattribute__("value")
+        return ChatHistory(value=list(value))
+
     def get_value_length(self) -> int:
         # To better track the usage of this method, we use a method instead of a property.
         return len(super().__getattribute__("value"))
@@ -66,8 +91,7 @@ class ChatHistory(BaseModel):
         assert start_index < end_index <= self.get_value_length()
         chat_history_item_str_list: list[str] = []
         exist_empty_agent_response_flag = False
-        for item_index in range(start_index, end_index):
-            chat_history_item = self.get_item_deep_copy(item_index)
+        for chat_history_item in self.iterate_item(start_index, end_index):
             content = chat_history_item.content
             if chat_history_item.role == Role.AGENT and content == "":
                 exist_empty_agent_response_flag = True
@@ -168,3 +192,19 @@ class SessionMetricCalculationPartial(BaseModel):
     sample_index: SampleIndex
     sample_status: SampleStatus
     evaluation_record: SessionEvaluationRecord
+
+
+class SessionDelta(BaseModel):
+    # The changes of a Session since the version that both the TaskClient and the TaskServer hold. Only the chat
+    # history items from chat_history_start_index and the changed scalar fields are transferred.
+    # If base_version is None, the delta contains the full session, and can be applied to any session.
+    # checksum is calculated over the session after applying the delta. It is used to detect the divergence of the
+    # two copies, in which case the full session is transferred.
+    task_name: TaskName
+    sample_index: SampleIndex
+    base_version: Optional[int]
+    version: int
+    chat_history_start_index: int
+    chat_history_item_list: list[ChatHistoryItem]
+    scalar_field_dict: dict[str, Any]
+    checksum: str
@@ -4,3 +4,5 @@ from .color_message import ColorMessage
 from .client import Client
 from .server import Server
 from .retry import RetryHandler, ExponentialBackoffStrategy
+from .session_journal import SessionJournal, SessionJournalView, SessionResumeIndex
+from .disk_cache import DiskCache
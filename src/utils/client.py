@@ -1,11 +1,15 @@
-from typing import Any, Optional, Type, TypeVar, overload, reveal_type
+from typing import Any, Iterator, Optional, Type, TypeVar, overload, reveal_type
+from contextlib import contextmanager
+import threading
 import requests
+from requests.adapters import HTTPAdapter
 from pydantic import BaseModel
 
 from src.typings import (
     GeneralRequest,
     GeneralResponse,
     InstanceFactoryUtility,
+    HttpTransferPayload,
     HttpException,
     HttpTimeoutException,
     HttpServerException,
@@ -19,6 +23,158 @@ from .logger import SafeLogger
 T = TypeVar("T", bound=BaseModel)
 
 
+class HttpTransport:
+    """
+    Send the requests of all the Client instances through keep-alive connections, so that a call does not pay the
+        TCP handshake unless the idle connection is closed by the server.
+    requests.Session is not thread-safe, so each thread owns a session. The connections of a session are pooled per
+        host.
+    The retry is handled by Client._call_server(), so the adapter does not retry.
+    """
+
+    POOL_CONNECTION_COUNT = 8  # The number of hosts whose connections are pooled.
+    POOL_MAXIMUM_SIZE = 8  # The number of connections kept for each host.
+    _thread_local = threading.local()
+
+    @classmethod
+    def get_session(cls) -> requests.Session:
+        session: Optional[requests.Session] = getattr(
+            cls._thread_local, "session", None
+        )
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(
+                pool_connections=cls.POOL_CONNECTION_COUNT,
+                pool_maxsize=cls.POOL_MAXIMUM_SIZE,
+            )
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            cls._thread_local.session = session
+        return session
+
+    @classmethod
+    def post(
+        cls, address: str, data_dict: dict[str, Any], timeout: int
+    ) -> requests.Response:
+        return cls.get_session().post(address, json=data_dict, timeout=timeout)
+
+
+class ClientBatchResult:
+    """
+    The result of an operation added to ClientBatch. The value is available after the batch is executed.
+    """
+
+    def __init__(self) -> None:
+        self._executed_flag = False
+        self._value: Any = None
+
+    def set(self, value: Any) -> None:
+        self._executed_flag = True
+        self._value = value
+
+    def get(self) -> Any:
+        if not self._executed_flag:
+            raise RuntimeError("The batch has not been executed.")
+        return self._value
+
+
+class ClientBatch:
+    """
+    Collect the attribute reads, writes and method calls on the principal of a Client, and send them to the server in
+        a single request. The operations are executed in the order they are added.
+    A name can be a dotted path, which is resolved on the server. If an object on the path is a Client, the server
+        accesses it through HTTP, so the dotted path saves the round trips between the caller and the server, but not
+        the round trips between the server and the objects on the path.
+    Usage:
+        with client.batch() as batch:
+            str_identity = batch.get_attribute("str_identity")
+            batch.set_attribute("int_identity", 1)
+            batch.call_method("chat_history_item_factory.set", 0, Role.USER, "content")
+        print(str_identity.get())
+    """
+
+    def __init__(self, client: "Client"):
+        self._client = client
+        self._operation_list: list[GeneralRequest.BatchOperation] = []
+        self._result_list: list[ClientBatchResult] = []
+
+    def _add_operation(
+        self, operation: GeneralRequest.BatchOperation
+    ) -> ClientBatchResult:
+        result = ClientBatchResult()
+        self._operation_list.append(operation)
+        self._result_list.append(result)
+        return result
+
+    def get_attribute(self, name: str) -> ClientBatchResult:
+        return self._add_operation(
+            GeneralRequest.BatchOperation(operation_type="get_attribute", name=name)
+        )
+
+    def set_attribute(self, name: str, value: Any) -> ClientBatchResult:
+        return self._add_operation(
+            GeneralRequest.BatchOperation(
+                operation_type="set_attribute",
+                name=name,
+                argument_list=[HttpTransferPayload.from_value(value)],
+            )
+        )
+
+    def call_method(self, name: str, *args: Any, **kwargs: Any) -> ClientBatchResult:
+        return self._add_operation(
+            GeneralRequest.BatchOperation(
+                operation_type="call_method",
+                name=name,
+                argument_list=[HttpTransferPayload.from_value(arg) for arg in args],
+                keyword_argument_dict={
+                    key: HttpTransferPayload.from_value(value)
+                    for key, value in kwargs.items()
+                },
+            )
+        )
+
+    def execute(self) -> list[Any]:
+        """
+        Send the operations that are added since the last execution, and return their values in order.
+        """
+        operation_list, self._operation_list = self._operation_list, []
+        result_list, self._result_list = self._result_list, []
+        if len(operation_list) == 0:
+            return []
+        response: GeneralResponse.Batch = self._client._call_server(
+            "/batch",
+            GeneralRequest.Batch(operation_list=operation_list),
+            GeneralResponse.Batch,
+        )
+        value_list: list[Any] = []
+        # The server stops at the first failed operation, so the results are fewer than the operations only if the
+        #   last result is an error.
+        assert len(response.result_list) == len(operation_list) or (
+            0 < len(response.result_list) < len(operation_list)
+            and response.result_list[-1].error_type is not None
+        )
+        for operation, result, batch_result in zip(
+            operation_list, result_list, response.result_list
+        ):
+            if batch_result.error_type is not None:
+                error_message = (
+                    f"Failed to execute {operation.operation_type} of '{operation.name}' on the server.\n"
+                    f"{batch_result.error_type}: {batch_result.error_message}"
+                )
+                SafeLogger.error(error_message)
+                if batch_result.error_type == "AttributeError":
+                    raise AttributeError(error_message)
+                raise RuntimeError(error_message)
+            value = (
+                None
+                if batch_result.value is None
+                else batch_result.value.restore_value()
+            )
+            result.set(value)
+            value_list.append(value)
+        return value_list
+
+
 class Client(BaseModel):
     server_address: str
     request_timeout: int
@@ -51,6 +207,16 @@ class Client(BaseModel):
             SafeLogger.error(error_message)
             raise HttpUnknownException(error_message) from e
 
+    @contextmanager
+    def batch(self) -> Iterator[ClientBatch]:
+        """
+        The operations added to the batch are sent in a single request when the with block exits normally.
+        Use it instead of __getattr__() and __setattr__() when several attributes are accessed in one step.
+        """
+        client_batch = ClientBatch(self)
+        yield client_batch
+        client_batch.execute()
+
     @overload
     def _call_server(
         self,
@@ -100,39 +266,36 @@ class Client(BaseModel):
             data_dict = {}
         else:
             data_dict = data.model_dump()
-        request_info_str = (
-            f"Request information:\n"
-            f"- address: {address}\n"
-            f"- response_cls: {response_cls}\n"
-            f"- data_cls: {str(type(data))}\n"
-            f"- data_dict_str_length: {len(str(data_dict))}\n"
-            f"- data_dict: {data_dict}"
-        )
-        error_description_placeholder = "<<ERROR_DESCRIPTION>>"
-        error_message_template = f"{error_description_placeholder}\n{request_info_str}"
+
+        def get_error_message(error_description: str) -> str:
+            # The request information is only formatted when an error occurs, since data_dict can be large.
+            return (
+                f"{error_description}\n"
+                f"Request information:\n"
+                f"- address: {address}\n"
+                f"- response_cls: {response_cls}\n"
+                f"- data_cls: {str(type(data))}\n"
+                f"- data_dict_str_length: {len(str(data_dict))}\n"
+                f"- data_dict: {data_dict}"
+            )
+
         # endregion
         # region Send request
         try:
-            response = requests.post(
-                address, json=data_dict, timeout=self.request_timeout
-            )
+            response = HttpTransport.post(address, data_dict, self.request_timeout)
         except requests.exceptions.Timeout as e:
-            error_message = error_message_template.replace(
-                error_description_placeholder, "Request timeout."
-            )
+            error_message = get_error_message("Request timeout.")
             SafeLogger.error(error_message)
             raise HttpTimeoutException(error_message) from e
         except requests.exceptions.ConnectionError as e:
-            error_message = error_message_template.replace(
-                error_description_placeholder,
-                "Error occurs when reaching the destination server. Do you start the server?",
+            error_message = get_error_message(
+                "Error occurs when reaching the destination server. Do you start the server?"
             )
             SafeLogger.error(error_message)
             raise HttpServerException(error_message) from e
         except Exception as e:
-            error_message = error_message_template.replace(
-                error_description_placeholder,
-                "Unknown error occurs when sending request.",
+            error_message = get_error_message(
+                "Unknown error occurs when sending request."
             )
             SafeLogger.error(error_message)
             raise HttpUnknownException(error_message) from e
@@ -153,8 +316,7 @@ class Client(BaseModel):
                 response.raise_for_status()  # The statement will definitely raise requests.exceptions.HTTPError.
             except requests.exceptions.HTTPError as e:
                 if 400 <= response.status_code < 600:
-                    error_message = error_message_template.replace(
-                        error_description_placeholder,
+                    error_message = get_error_message(
                         f"Original error message: {e}\n{error_info_str}",
                     )
                     SafeLogger.error(error_message)
@@ -165,8 +327,7 @@ class Client(BaseModel):
                 else:
                     # This block is not expected to be triggered. Since `response.raise_for_status()` will only raise
                     # requests.exceptions.HTTPError when the status code is in of the range of [400, 600).
-                    error_message = error_message_template.replace(
-                        error_description_placeholder,
+                    error_message = get_error_message(
                         f"The status code of the request is out of the range of [400, 600).\n{error_info_str}",
                     )
                     SafeLogger.error(error_message)
@@ -174,8 +335,7 @@ class Client(BaseModel):
             except Exception as e:
                 # This block is not expected to be triggered. Since ``response.raise_for_status()`` will only raise
                 # requests.exceptions.HTTPError.
-                error_message = error_message_template.replace(
-                    error_description_placeholder,
+                error_message = get_error_message(
                     f"`response.raise_for_status()` raises an unknown error.\n{error_info_str}",
                 )
                 SafeLogger.error(error_message)
@@ -0,0 +1,122 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import zlib
+from typing import Optional
+
+
+class DiskCache:
+    """
+    A persistent key-value cache stored in a SQLite database.
+    The keys are stored as their 16-byte BLAKE2b digests and the values are compressed by zlib, so that the file stays
+        compact. When the total size of the compressed values exceeds maximum_size (in bytes), the least recently
+        used entries are evicted.
+    The instance can be shared by threads.
+    """
+
+    def __init__(self, cache_path: str, maximum_size: int = 1 << 30):
+        assert maximum_size > 0
+        cache_dir = os.path.dirname(cache_path)
+        if cache_dir and not os.path.exists(cache_dir):
+            os.makedirs(cache_dir)
+        self.cache_path = cache_path
+        self.maximum_size = maximum_size
+        self.hit_count = 0
+        self.miss_count = 0
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(cache_path, check_same_thread=False)
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS cache_entry ("
+            "key_digest BLOB PRIMARY KEY, value BLOB NOT NULL, last_access INTEGER NOT NULL"
+            ")"
+        )
+        self._connection.execute(
+            "CREATE INDEX IF NOT EXISTS cache_entry_last_access ON cache_entry (last_access)"
+        )
+        self._connection.commit()
+        total_size, last_access = self._connection.execute(
+            "SELECT COALESCE(SUM(LENGTH(value)), 0), COALESCE(MAX(last_access), 0) FROM cache_entry"
+        ).fetchone()
+        self._total_size: int = total_size
+        # A logical clock, which is more reliable than the wall clock for the LRU order.
+        self._access_counter: int = last_access
+
+    @staticmethod
+    def _calculate_key_digest(key: str) -> bytes:
+        return hashlib.blake2b(key.encode(), digest_size=16).digest()
+
+    def get(self, key: str) -> Optional[bytes]:
+        key_digest = self._calculate_key_digest(key)
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT value FROM cache_entry WHERE key_digest = ?", (key_digest,)
+            ).fetchone()
+            if row is None:
+                self.miss_count += 1
+                return None
+            self.hit_count += 1
+            self._access_counter += 1
+            self._connection.execute(
+                "UPDATE cache_entry SET last_access = ? WHERE key_digest = ?",
+                (self._access_counter, key_digest),
+            )
+            self._connection.commit()
+        value: bytes = zlib.decompress(row[0])
+        return value
+
+    def set(self, key: str, value: bytes) -> None:
+        key_digest = self._calculate_key_digest(key)
+        compressed_value = zlib.compress(value)
+        if len(compressed_value) > self.maximum_size:
+            return
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT LENGTH(value) FROM cache_entry WHERE key_digest = ?",
+                (key_digest,),
+            ).fetchone()
+            if row is not None:
+                self._total_size -= row[0]
+            self._access_counter += 1
+            self._connection.execute(
+                "INSERT OR REPLACE INTO cache_entry (key_digest, value, last_access) VALUES (?, ?, ?)",
+                (key_digest, compressed_value, self._access_counter),
+            )
+            self._total_size += len(compressed_value)
+            self._evict()
+            self._connection.commit()
+
+    def _evict(self) -> None:
+        # Must be called with self._lock held.
+        if self._total_size <= self.maximum_size:
+            return
+        evicted_key_digest_list: list[bytes] = []
+        for key_digest, size in self._connection.execute(
+            "SELECT key_digest, LENGTH(value) FROM cache_entry ORDER BY last_access"
+        ):
+            if self._total_size <= self.maximum_size:
+                break
+            evicted_key_digest_list.append(key_digest)
+            self._total_size -= size
+        self._connection.executemany(
+            "DELETE FROM cache_entry WHERE key_digest = ?",
+            [(key_digest,) for key_digest in evicted_key_digest_list],
+        )
+
+    def get_size(self) -> int:
+        """
+        Return the total size of the compressed values.
+        """
+        with self._lock:
+            return self._total_size
+
+    def get_entry_count(self) -> int:
+        with self._lock:
+            entry_count: int = self._connection.execute(
+                "SELECT COUNT(*) FROM cache_entry"
+            ).fetchone()[0]
+        return entry_count
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
@@ -65,7 +65,13 @@ class RetryHandler:
         max_retries: int = 3,
         waiting_strategy: BackoffStrategyInterface = ExponentialBackoffStrategy(),
         retry_on: Optional[tuple[type[Exception], ...]] = None,
+        retry_after_getter: Optional[Callable[[Exception], Optional[float]]] = None,
     ) -> Callable[[Callable[Param, RetType]], Callable[Param, RetType]]:
+        """
+        retry_after_getter: Return the waiting time requested by the exception (e.g., the Retry-After header of a
+            rate-limited response), which is used instead of waiting_strategy. Return None to use waiting_strategy.
+        """
+
         def decorator(func: Callable[Param, RetType]) -> Callable[Param, RetType]:
             # https://stackoverflow.com/a/309000
             @functools.wraps(func)
@@ -79,7 +85,16 @@ class RetryHandler:
                             SafeLogger.error(f"{e}, retried has been exhausted...")
                             raise e
                         # time sleep
-                        seconds = waiting_strategy.calculate(n)
+                        retry_after = (
+                            retry_after_getter(e)
+                            if retry_after_getter is not None
+                            else None
+                        )
+                        seconds = (
+                            retry_after
+                            if retry_after is not None
+                            else waiting_strategy.calculate(n)
+                        )
                         SafeLogger.warning(f"{e}, retrying in {seconds} seconds...")
                         time.sleep(seconds)
                 raise RuntimeError("This should never be reached")
@@ -6,6 +6,7 @@ from src.typings import (
     GeneralResponse,
     InstanceFactoryUtility,
     InstanceFactoryType,
+    HttpTransferPayload,
 )
 from .client import Client
 from abc import ABC, abstractmethod
@@ -18,6 +19,7 @@ class Server(ABC):
         self.router.post("/ping")(self.ping)
         self.router.post("/get_attribute")(self.get_attribute)
         self.router.post("/set_attribute")(self.set_attribute)
+        self.router.post("/batch")(self.batch)
 
     @staticmethod
     def ping() -> GeneralResponse.Ping:
@@ -53,6 +55,58 @@ class Server(ABC):
         setattr(self.principal, data.name, value)
         return
 
+    def batch(self, data: GeneralRequest.Batch) -> GeneralResponse.Batch:
+        """
+        Execute the operations in order, and return the results in the same order.
+        If an operation raises an exception, the exception is returned, and the remaining operations are skipped.
+        """
+        result_list: list[GeneralResponse.BatchResult] = []
+        for operation in data.operation_list:
+            try:
+                result = self._execute_batch_operation(operation)
+            except Exception as e:
+                result_list.append(
+                    GeneralResponse.BatchResult(
+                        error_type=e.__class__.__name__, error_message=str(e)
+                    )
+                )
+                break
+            result_list.append(result)
+        return GeneralResponse.Batch(result_list=result_list)
+
+    def _execute_batch_operation(
+        self, operation: GeneralRequest.BatchOperation
+    ) -> GeneralResponse.BatchResult:
+        *owner_name_list, name = operation.name.split(".")
+        owner = self.principal
+        for owner_name in owner_name_list:
+            owner = getattr(owner, owner_name)
+        argument_list = [
+            argument.restore_value() for argument in operation.argument_list
+        ]
+        keyword_argument_dict = {
+            key: argument.restore_value()
+            for key, argument in operation.keyword_argument_dict.items()
+        }
+        match operation.operation_type:
+            case "get_attribute":
+                return GeneralResponse.BatchResult(
+                    value=HttpTransferPayload.from_value(getattr(owner, name))
+                )
+            case "set_attribute":
+                assert len(argument_list) == 1 and len(keyword_argument_dict) == 0
+                setattr(owner, name, argument_list[0])
+                return GeneralResponse.BatchResult()
+            case "call_method":
+                return_value = getattr(owner, name)(
+                    *argument_list, **keyword_argument_dict
+                )
+                return GeneralResponse.BatchResult(
+                    value=HttpTransferPayload.from_value(return_value)
+                )
+            case _:
+                raise NotImplementedError()
+
     @staticmethod
     @abstractmethod
     def start_server(*args: Any, **kwargs: Any) -> None:
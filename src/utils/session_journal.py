@@ -0,0 +1,279 @@
+import json
+import os
+from typing import Any, Iterator, Optional, Sequence, overload
+
+from src.typings import Session, SampleIndex, SessionMetricCalculationPartial
+from .logger import SafeLogger
+
+
+class JsonLinesUtility:
+    @staticmethod
+    def append(file_path: str, record_list: Sequence[Any]) -> int:
+        """
+        Append the records to the file, and return the size of the file after appending.
+        The file is fsync-ed before returning, so a crash can at most lose the line that is being written.
+        """
+        file_dir = os.path.dirname(file_path)
+        if file_dir and not os.path.exists(file_dir):
+            os.makedirs(file_dir)
+        with open(file_path, "a", encoding="utf-8") as f:
+            for record in record_list:
+                f.write(json.dumps(record) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+            return f.tell()
+
+    @staticmethod
+    def iterate(file_path: str, start_offset: int = 0) -> Iterator[tuple[Any, int]]:
+        """
+        Yield (record, end_offset) of each line after start_offset, end_offset is the offset right after the line.
+        A torn record at the end of the file (caused by a crash while appending) is skipped, but the file is not
+            modified. Call repair() to remove it before appending to the file.
+        """
+        if not os.path.exists(file_path):
+            return
+        with open(file_path, "rb") as f:
+            f.seek(start_offset)
+            valid_length = start_offset
+            for line in f:
+                if not line.endswith(b"\n"):
+                    # Only the last line can be unterminated.
+                    SafeLogger.warning(
+                        f"[JsonLinesUtility] Skip the torn record at the end of {file_path}."
+                    )
+                    return
+                try:
+                    record = json.loads(line)
+                except ValueError as e:
+                    # The file is fsync-ed after every append, so a crash cannot leave a terminated invalid line.
+                    raise RuntimeError(
+                        f"{file_path} is corrupted, the record at offset {valid_length} is not valid JSON."
+                    ) from e
+                valid_length += len(line)
+                yield record, valid_length
+
+    @staticmethod
+    def repair(file_path: str, chunk_size: int = 65536) -> None:
+        """
+        Remove the torn record at the end of the file (caused by a crash while appending). Only the tail of the file
+            after the last line break is read.
+        """
+        if not os.path.exists(file_path):
+            return
+        with open(file_path, "r+b") as f:
+            file_size = f.seek(0, os.SEEK_END)
+            valid_length = file_size
+            while valid_length > 0:
+                chunk_start = max(0, valid_length - chunk_size)
+                f.seek(chunk_start)
+                chunk = f.read(valid_length - chunk_start)
+                line_break_index = chunk.rfind(b"\n")
+                if line_break_index >= 0:
+                    valid_length = chunk_start + line_break_index + 1
+                    break
+                valid_length = chunk_start
+            if valid_length == file_size:
+                return
+            SafeLogger.warning(
+                f"[JsonLinesUtility] Remove the torn record at the end of {file_path}."
+            )
+            f.truncate(valid_length)
+            f.flush()
+            os.fsync(f.fileno())
+
+
+class SessionJournal:
+    """
+    An append-only store of the finished sessions. Each session is written as one line of JSON, and the file is
+        fsync-ed after every append.
+    Appending a session costs O(size of the session), while rewriting runs.json costs O(size of all the sessions).
+        Use compact() to produce runs.json for the downstream tools.
+    The sessions are only loaded into memory when get_session_list() is called.
+    """
+
+    def __init__(self, journal_path: str):
+        assert journal_path.endswith(".jsonl")
+        self.journal_path = journal_path
+        self._session_list: Optional[list[Session]] = None
+        # The size of the journal when compact() is called last time.
+        self._compacted_size: Optional[int] = None
+
+    def exists(self) -> bool:
+        return os.path.exists(self.journal_path)
+
+    def get_size(self) -> int:
+        return os.path.getsize(self.journal_path) if self.exists() else 0
+
+    def repair(self) -> None:
+        """
+        Remove the session that is torn by a crash while appending. Call it before appending to the journal.
+        """
+        JsonLinesUtility.repair(self.journal_path)
+
+    def append(self, session: Session) -> int:
+        """
+        Return the offset right after the appended session, which is used by SessionResumeIndex.
+        """
+        return self.extend([session])
+
+    def extend(self, session_list: Sequence[Session]) -> int:
+        # Use json.dumps() instead of model_dump_json(), so that the records are serialized in the same way
+        #   as runs.json (e.g., float("inf") is kept as Infinity).
+        end_offset = JsonLinesUtility.append(
+            self.journal_path, [session.model_dump() for session in session_list]
+        )
+        if self._session_list is not None:
+            self._session_list.extend(session_list)
+        return end_offset
+
+    def iterate_record(
+        self, start_offset: int = 0
+    ) -> Iterator[tuple[dict[str, Any], int]]:
+        """
+        Yield (raw dict of the session, end_offset) in the order they are appended.
+        """
+        return JsonLinesUtility.iterate(self.journal_path, start_offset)
+
+    def import_session_list(self, session_list_path: str) -> None:
+        """
+        Append the sessions in runs.json, which is written by the previous versions, to the journal.
+        """
+        self.extend(
+            [
+                Session.model_validate(session_info_dict)
+                for session_info_dict in json.load(open(session_list_path, "r"))
+            ]
+        )
+
+    def get_session_list(self) -> list[Session]:
+        if self._session_list is None:
+            self._session_list = [
+                Session.model_validate(record) for record, _ in self.iterate_record()
+            ]
+        return self._session_list
+
+    def get_session_list_view(self) -> "SessionJournalView":
+        return SessionJournalView(self)
+
+    def compact(self, output_path: str) -> None:
+        """
+        Write the sessions in the journal to output_path, using the same layout as
+            `json.dump([s.model_dump() for s in session_list], f, indent=2)`.
+        The records are streamed, and the file is replaced atomically.
+        """
+        temporary_output_path = f"{output_path}.tmp"
+        with open(temporary_output_path, "w") as f:
+            empty_flag = True
+            for record, _ in self.iterate_record():
+                f.write("[\n  " if empty_flag else ",\n  ")
+                f.write(json.dumps(record, indent=2).replace("\n", "\n  "))
+                empty_flag = False
+            f.write("[]" if empty_flag else "\n]")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporary_output_path, output_path)
+        self._compacted_size = self.get_size()
+
+    def compact_if_grown(self, output_path: str) -> None:
+        """
+        Call compact() if the journal has doubled in size since the last compaction, so that output_path stays
+            reasonably fresh during the run, while the total cost of the compactions is O(size of the journal).
+        """
+        if self._compacted_size is None or self.get_size() >= 2 * self._compacted_size:
+            self.compact(output_path)
+
+
+class SessionJournalView(Sequence[Session]):
+    """
+    A read-only view of the sessions in the journal. The sessions are loaded when the view is accessed for the first
+        time, so that resuming an assignment does not need to load all the previous sessions.
+    """
+
+    def __init__(self, session_journal: SessionJournal):
+        self._session_journal = session_journal
+
+    @overload
+    def __getitem__(self, index: int) -> Session: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> Sequence[Session]: ...
+
+    def __getitem__(self, index: int | slice) -> Session | Sequence[Session]:
+        return self._session_journal.get_session_list()[index]
+
+    def __len__(self) -> int:
+        return len(self._session_journal.get_session_list())
+
+
+class SessionResumeIndex:
+    """
+    A persistent index from SampleIndex to the status of the finished sessions, stored as one line of JSON per
+        session. Each record also saves the offset of the journal right after the session, so the index can be
+        synchronized with the journal by only reading the part of the journal that is not indexed yet.
+    Resuming an assignment only reads the index, instead of validating every session in the journal.
+    """
+
+    def __init__(self, index_path: str):
+        assert index_path.endswith(".jsonl")
+        self.index_path = index_path
+        # Keep the order and the duplicates of the sessions, which is the same as the journal.
+        self._partial_list: list[SessionMetricCalculationPartial] = []
+        self._sample_index_set: set[SampleIndex] = set()
+        self._journal_offset: int = 0
+
+    def synchronize(self, session_journal: SessionJournal) -> None:
+        """
+        Load the index from disk, then index the sessions that are appended to the journal after the last record.
+        If the index file does not exist, it is rebuilt from the journal.
+        The journal should be repaired by SessionJournal.repair() before calling this method.
+        """
+        JsonLinesUtility.repair(self.index_path)
+        self._partial_list.clear()
+        self._sample_index_set.clear()
+        self._journal_offset = 0
+        for record, _ in JsonLinesUtility.iterate(self.index_path):
+            self._journal_offset = record.pop("journal_offset")
+            self._add(SessionMetricCalculationPartial.model_validate(record))
+        journal_size = session_journal.get_size()
+        if journal_size < self._journal_offset:
+            # The journal does not match the index, rebuild the index from scratch.
+            SafeLogger.warning(
+                f"[SessionResumeIndex] {self.index_path} is ahead of {session_journal.journal_path}, rebuild it."
+            )
+            os.remove(self.index_path)
+            self.synchronize(session_journal)
+            return
+        if journal_size == self._journal_offset:
+            return
+        for record, end_offset in session_journal.iterate_record(self._journal_offset):
+            self.append(
+                SessionMetricCalculationPartial(
+                    sample_index=record["sample_index"],
+                    sample_status=record["sample_status"],
+                    evaluation_record=record["evaluation_record"],
+                ),
+                end_offset,
+            )
+
+    def append(
+        self, session_partial: SessionMetricCalculationPartial, journal_offset: int
+    ) -> None:
+        """
+        journal_offset: the value returned by SessionJournal.append() for the session.
+        """
+        JsonLinesUtility.append(
+            self.index_path,
+            [{**session_partial.model_dump(), "journal_offset": journal_offset}],
+        )
+        self._journal_offset = journal_offset
+        self._add(session_partial)
+
+    def _add(self, session_partial: SessionMetricCalculationPartial) -> None:
+        self._partial_list.append(session_partial)
+        self._sample_index_set.add(session_partial.sample_index)
+
+    def is_finished(self, sample_index: SampleIndex) -> bool:
+        return sample_index in self._sample_index_set
+
+    def get_session_partial_list(self) -> Sequence[SessionMetricCalculationPartial]:
+        return self._partial_list
@@ -2,6 +2,7 @@ from abc import ABC, abstractmethod
 from multiprocessing import Process
 
 from pydantic import BaseModel
+import pytest
 import uvicorn
 from fastapi import FastAPI, APIRouter
 import time
@@ -271,6 +272,36 @@ class TestClass:
         client_g2 = client_a.left_parent.right_parent.left_parent
         assert client_g1.str_identity == client_g2.str_identity
 
+    def test_batch(self):
+        with client_c.batch() as batch:
+            int_identity = batch.get_attribute("int_identity")
+            set_result = batch.set_attribute("str_identity", "new_c")
+            str_identity = batch.get_attribute("str_identity")
+            _ = batch.call_method("set_str_identity", str_identity="batch_c")
+            method_str_identity = batch.call_method("get_str_identity")
+            none_value = batch.get_attribute("none_value")
+        assert int_identity.get() == 2
+        assert set_result.get() is None
+        assert str_identity.get() == "new_c"
+        assert method_str_identity.get() == "batch_c"
+        assert none_value.get() is None
+        assert client_c.str_identity == "batch_c"
+        # The dotted name is resolved on the server. Each client on the path is accessed by the server through HTTP.
+        # Only one level is tested, since restoring a client in the server processes imports this module, which is
+        # still being imported by the forked processes.
+        with client_a.batch() as batch:
+            batch.set_attribute("left_parent.str_identity", "batch_b")
+            b_str_identity = batch.get_attribute("left_parent.str_identity")
+        assert b_str_identity.get() == "batch_b"
+        assert client_b.str_identity == "batch_b"
+        # The operations after the failed one are not executed.
+        with pytest.raises(AttributeError):
+            with client_c.batch() as batch:
+                batch.set_attribute("int_identity", 20)
+                batch.get_attribute("missing_attribute")
+                batch.set_attribute("int_identity", 30)
+        assert client_c.int_identity == 20
+
     def test_finish(self):
         for process in process_list:
             process.terminate()
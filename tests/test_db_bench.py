@@ -0,0 +1,220 @@
+from src.tasks.instance.db_bench.task import (
+    AnswerInfo,
+    AnswerType,
+    ColumnInfo,
+    DBBench,
+    DBBenchDatasetItem,
+    TableInfo,
+)
+from src.tasks.instance.db_bench.container import DBBenchContainer
+from src.typings import TaskName
+
+
+def construct_dataset_item(row_list):
+    return DBBenchDatasetItem(
+        instruction="",
+        answer_info=AnswerInfo(
+            answer_type=AnswerType.DIRECT,
+            answer_md5=None,
+            answer_direct=[],
+            ground_truth_sql="SELECT * FROM `item`",
+        ),
+        database_name="item",
+        table_info=TableInfo(
+            name="item",
+            row_list=row_list,
+            column_info_list=[
+                ColumnInfo(name="name", type="TEXT"),
+                ColumnInfo(name="count", type="INT"),
+                ColumnInfo(name="price", type="DECIMAL(10,2)"),
+            ],
+        ),
+        skill_list=[],
+    )
+
+
+def test_get_init_parameter():
+    # The values are the strings stored by the quoted literals of _build_init_sql(), following the escape sequences
+    #   of MySQL string literals.
+    for value, expected_parameter in [
+        ("plain", "plain"),
+        ("it's", "it's"),
+        ('say "hi"', 'say "hi"'),
+        (3, "3"),
+        (-0.5, "-0.5"),
+        ("a;b", "a;b"),
+        ("100%", "100%"),
+        (r"a\nb\tc", "a\nb\tc"),
+        (r"a\\b", "a\\b"),
+        (r"a\"b", 'a"b'),
+        (r"\0\b\r\Z", "\0\b\r\x1a"),
+        (r"50\% off\_x", r"50\% off\_x"),
+        (r"\d\q", "dq"),
+    ]:
+        assert DBBench._get_init_parameter(value) == expected_parameter, value
+
+
+def test_build_init_statement():
+    row_list = [("apple", 3, 1.25), ("it's", 0, 2)]
+    dataset_item = construct_dataset_item(row_list)
+    init_statement = DBBench._build_init_statement(dataset_item)
+    init_sql = DBBench._build_init_sql(dataset_item)
+    # The statements creating the database and the table are the same as _build_init_sql().
+    assert init_sql.startswith(init_statement.setup_sql)
+    assert init_statement.insert_sql == (
+        "INSERT INTO `item` (`name`,`count`,`price`) VALUES (%s,%s,%s)"
+    )
+    assert init_statement.parameter_list == [
+        ("apple", "3", "1.25"),
+        ("it's", "0", "2"),
+    ]
+    assert "VALUES ('apple','3','1.25'),('it''s','0','2');" in init_sql
+    assert (
+        DBBench._build_init_statement(construct_dataset_item([])).parameter_list == []
+    )
+
+
+class RecordingContainer:
+    """
+    Record the statements instead of executing them. The rows loaded by execute_many() are counted, so that the
+        check of the template database passes unless failed_database_name_set contains the database.
+    """
+
+    def __init__(self):
+        self.sql_list = []
+        self.row_count_dict = {}
+        self.failed_database_name_set = set()
+
+    def execute(self, multiple_sql, database=None):
+        self.sql_list.append(multiple_sql)
+        if multiple_sql.startswith("SELECT COUNT(*)"):
+            database_name = multiple_sql.split("`")[1]
+            return str([(self.row_count_dict.get(database_name, 0),)])
+        return "[]"
+
+    def execute_many(self, sql, parameter_list, database=None):
+        self.sql_list.append(sql)
+        if database not in self.failed_database_name_set:
+            self.row_count_dict[database] = len(parameter_list)
+        return ""
+
+
+def construct_db_bench(tmp_path, monkeypatch, template_database_cache_size):
+    monkeypatch.setattr(
+        "src.tasks.instance.db_bench.task.DBBenchContainer", RecordingContainer
+    )
+    data_file_path = tmp_path / "data.json"
+    data_file_path.write_text("{}")
+    return DBBench(
+        TaskName.DB_BENCH,
+        None,
+        str(data_file_path),
+        3,
+        template_database_cache_size=template_database_cache_size,
+    )
+
+
+def get_template_database_name(sql_list):
+    return [sql.split("`")[1] for sql in sql_list if sql.startswith("SELECT COUNT(*)")]
+
+
+def test_initialize_database_from_template(tmp_path, monkeypatch):
+    db_bench = construct_db_bench(tmp_path, monkeypatch, 2)
+    container = db_bench.container
+    dataset_item_0 = construct_dataset_item([("apple", 3, 1.25)])
+    dataset_item_1 = construct_dataset_item([("pear", 1, 2.5)])
+    dataset_item_2 = construct_dataset_item([("plum", 2, 0.5)])
+    db_bench._initialize_database_from_template(dataset_item_0)
+    # The template is initialized, checked, and cloned by the server.
+    (template_database_name_0,) = get_template_database_name(container.sql_list)
+    assert container.sql_list[-1].startswith("CREATE DATABASE IF NOT EXISTS `item`")
+    assert (
+        f"SELECT * FROM `{template_database_name_0}`.`item`" in container.sql_list[-1]
+    )
+    # The same table is cloned without being loaded again.
+    container.sql_list.clear()
+    db_bench._initialize_database_from_template(dataset_item_0.model_copy())
+    assert len(container.sql_list) == 1
+    assert f"LIKE `{template_database_name_0}`.`item`" in container.sql_list[0]
+    # The least recently used template is dropped.
+    db_bench._initialize_database_from_template(dataset_item_1)
+    db_bench._initialize_database_from_template(dataset_item_0)
+    container.sql_list.clear()
+    db_bench._initialize_database_from_template(dataset_item_2)
+    (template_database_name_2,) = get_template_database_name(container.sql_list)
+    assert template_database_name_2 != template_database_name_0
+    assert len(db_bench._template_database_name_dict) == 2
+    assert template_database_name_0 in db_bench._template_database_name_dict
+    template_database_name_1 = DBBench._get_template_database_name(
+        dataset_item_1.table_info
+    )
+    assert f"DROP DATABASE IF EXISTS `{template_database_name_1}`" in container.sql_list
+
+
+def test_initialize_database_from_template_failure(tmp_path, monkeypatch):
+    db_bench = construct_db_bench(tmp_path, monkeypatch, 2)
+    container = db_bench.container
+    dataset_item = construct_dataset_item([("apple", 3, 1.25)])
+    template_database_name = DBBench._get_template_database_name(
+        dataset_item.table_info
+    )
+    container.failed_database_name_set.add(template_database_name)
+    db_bench._initialize_database_from_template(dataset_item)
+    # The incomplete template is dropped and not cached, and the database is initialized from scratch.
+    assert db_bench._template_database_name_dict == {}
+    assert (
+        container.sql_list[-3] == f"DROP DATABASE IF EXISTS `{template_database_name}`"
+    )
+    assert container.sql_list[-2].startswith("CREATE DATABASE IF NOT EXISTS `item`")
+    assert container.sql_list[-1].startswith("INSERT INTO `item`")
+    # Without the cache, the template is not used.
+    db_bench = construct_db_bench(tmp_path, monkeypatch, 0)
+    db_bench._initialize_database_from_template(dataset_item)
+    assert get_template_database_name(db_bench.container.sql_list) == []
+
+
+class ListCursor:
+    def __init__(self, row_list):
+        self.row_list = list(row_list)
+        self.fetched_row_count = 0
+
+    def fetchmany(self, size):
+        batch = self.row_list[self.fetched_row_count : self.fetched_row_count + size]
+        self.fetched_row_count += len(batch)
+        return batch
+
+    def fetchall(self):
+        return self.fetchmany(len(self.row_list))
+
+
+def test_fetch_with_limit():
+    row_list = [(index, f"name {index}", 0.5 * index) for index in range(1000)]
+    # Without limit, the output is the same as fetchall().
+    assert DBBenchContainer._fetch_with_limit(ListCursor(row_list), None, None) == (
+        row_list,
+        1000,
+        False,
+    )
+    cursor = ListCursor(row_list)
+    output_row_list, row_count, truncated_flag = DBBenchContainer._fetch_with_limit(
+        cursor, 10, None
+    )
+    assert (output_row_list, row_count, truncated_flag) == (row_list[:10], 1000, True)
+    # The remaining rows are consumed.
+    assert cursor.fetched_row_count == 1000
+    for maximum_byte_count in [2, 20, 100, 1000]:
+        output_row_list, row_count, truncated_flag = DBBenchContainer._fetch_with_limit(
+            ListCursor(row_list), None, maximum_byte_count
+        )
+        # The output is the longest prefix of the rows within the limit.
+        assert len(str(output_row_list).encode()) <= maximum_byte_count
+        assert (
+            len(str(row_list[: len(output_row_list) + 1]).encode()) > maximum_byte_count
+        )
+        assert row_count == 1000 and truncated_flag
+    # The limit that is not exceeded does not truncate the output.
+    assert DBBenchContainer._fetch_with_limit(ListCursor(row_list[:3]), 3, 1000) == (
+        row_list[:3],
+        3,
+        False,
+    )
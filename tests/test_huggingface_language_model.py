@@ -0,0 +1,121 @@
+import pytest
+
+torch = pytest.importorskip("torch")
+transformers = pytest.importorskip("transformers")
+tokenizers = pytest.importorskip("tokenizers")
+
+from src.language_models.instance.huggingface_language_model import (
+    HuggingfaceLanguageModel,
+)
+from src.typings import ChatHistory, Role
+
+CHAT_TEMPLATE = (
+    "{% for message in messages %}"
+    "<{{ message['role'] }}> {{ message['content'] }} <eot> "
+    "{% endfor %}"
+    "{% if add_generation_prompt %}<assistant> {% endif %}"
+)
+WORD_LIST = [f"w{index}" for index in range(40)]
+
+
+@pytest.fixture(scope="module")
+def model_path(tmp_path_factory):
+    """
+    Save a tiny randomly initialised Llama model and a word-level tokenizer, so that the test runs on CPU.
+    """
+    model_path = tmp_path_factory.mktemp("tiny_llama")
+    special_token_list = ["<unk>", "<eot>", "<system>", "<user>", "<assistant>"]
+    vocab = {token: index for index, token in enumerate(special_token_list + WORD_LIST)}
+    backend_tokenizer = tokenizers.Tokenizer(
+        tokenizers.models.WordLevel(vocab=vocab, unk_token="<unk>")
+    )
+    backend_tokenizer.pre_tokenizer = tokenizers.pre_tokenizers.WhitespaceSplit()
+    backend_tokenizer.decoder = tokenizers.decoders.WordPiece()
+    tokenizer = transformers.PreTrainedTokenizerFast(
+        tokenizer_object=backend_tokenizer,
+        unk_token="<unk>",
+        eos_token="<eot>",
+        additional_special_tokens=special_token_list[2:],
+    )
+    tokenizer.chat_template = CHAT_TEMPLATE
+    tokenizer.save_pretrained(model_path)
+    torch.manual_seed(0)
+    config = transformers.LlamaConfig(
+        vocab_size=len(vocab),
+        hidden_size=32,
+        intermediate_size=64,
+        num_hidden_layers=2,
+        num_attention_heads=4,
+        max_position_embeddings=512,
+        eos_token_id=vocab["<eot>"],
+        bos_token_id=vocab["<eot>"],
+    )
+    transformers.LlamaForCausalLM(config).save_pretrained(model_path)
+    return str(model_path)
+
+
+def construct_language_model(model_path, prefix_cache_size):
+    return HuggingfaceLanguageModel(
+        model_path,
+        {"user": "user", "agent": "assistant"},
+        dtype=torch.float32,
+        device_map="cpu",
+        prefix_cache_size=prefix_cache_size,
+    )
+
+
+def run_conversation(language_model, first_word_index, round_count):
+    chat_history = ChatHistory()
+    # The end of sequence token is suppressed, so that the responses are not empty.
+    inference_config_dict = {
+        "do_sample": False,
+        "min_new_tokens": 6,
+        "max_new_tokens": 6,
+    }
+    for round_index in range(round_count):
+        content = " ".join(
+            WORD_LIST[(first_word_index + round_index + offset) % len(WORD_LIST)]
+            for offset in range(5)
+        )
+        chat_history.inject({"role": Role.USER, "content": content})
+        chat_history.inject(
+            language_model.inference([chat_history], inference_config_dict, "w1 w2 w3")[
+                0
+            ]
+        )
+    return [item.content for item in chat_history.iterate_item()]
+
+
+def test_prefix_cache(model_path, monkeypatch):
+    reference_language_model = construct_language_model(model_path, 0)
+    language_model = construct_language_model(model_path, 1)
+    # Record the number of tokens that run through the forward pass in the first step of each generation.
+    prefill_length_list = []
+    original_forward = language_model.model.forward
+
+    def forward(*args, **kwargs):
+        if kwargs.get("past_key_values") is None or (
+            kwargs["past_key_values"].get_seq_length() == 0
+            or kwargs["input_ids"].shape[-1] > 1
+        ):
+            prefill_length_list.append(kwargs["input_ids"].shape[-1])
+        return original_forward(*args, **kwargs)
+
+    monkeypatch.setattr(language_model.model, "forward", forward)
+    for first_word_index in [0, 7, 0]:
+        # The conversations are greedy, so the outputs are identical with and without the cache.
+        content_list = run_conversation(language_model, first_word_index, 4)
+        assert content_list == run_conversation(
+            reference_language_model, first_word_index, 4
+        )
+        assert all(len(content) > 0 for content in content_list)
+    assert len(language_model._prefix_cache_entry_list) == 1
+    # The first round of a conversation runs the forward pass over the whole prompt, and the later rounds only
+    #   over the tokens that are not cached.
+    first_round_prefill_length = prefill_length_list[0]
+    for round_index in range(1, 4):
+        assert 0 < prefill_length_list[round_index] < first_round_prefill_length
+    # The next conversation reuses the system prompt.
+    assert prefill_length_list[4] < first_round_prefill_length
+    language_model.clear_prefix_cache()
+    assert len(language_model._prefix_cache_entry_list) == 0
@@ -0,0 +1,278 @@
+import json
+
+import pytest
+
+pytest.importorskip("rdflib")
+
+from src.factories.chat_history_item import ChatHistoryItemFactory
+from src.tasks.instance.knowledge_graph import KnowledgeGraph
+from src.tasks.instance.knowledge_graph.api import (
+    KnowledgeGraphAPI,
+    KnowledgeGraphAPIException,
+)
+from src.tasks.instance.knowledge_graph.utils.local_sparql_executor import (
+    LocalSparqlExecutor,
+)
+from src.tasks.instance.knowledge_graph.utils.logic_form_util import LogicFormUtil
+from src.typings import Role, SampleStatus, Session, TaskName
+
+NAMESPACE = "http://rdf.freebase.com/ns/"
+XSD_FLOAT = "http://www.w3.org/2001/XMLSchema#float"
+TRIPLE_LIST = [
+    ("m.a", "type.object.type", "people.person"),
+    ("m.b", "type.object.type", "people.person"),
+    ("m.c", "type.object.type", "people.person"),
+    ("m.a", "people.person.sibling", "m.b"),
+    ("m.a", "people.person.sibling", "m.c"),
+    ("m.b", "people.person.height_meters", 1.8),
+    ("m.c", "people.person.height_meters", 1.6),
+]
+
+
+def write_graph_file(path):
+    line_list = []
+    for subject, predicate, obj in TRIPLE_LIST:
+        if isinstance(obj, float):
+            obj_str = f'"{obj}"^^<{XSD_FLOAT}>'
+        else:
+            obj_str = f"<{NAMESPACE}{obj}>"
+        line_list.append(f"<{NAMESPACE}{subject}> <{NAMESPACE}{predicate}> {obj_str} .")
+    path.write_text("\n".join(line_list) + "\n")
+
+
+@pytest.fixture
+def graph_file_path(tmp_path):
+    path = tmp_path / "subgraph.nt"
+    write_graph_file(path)
+    return str(path)
+
+
+def test_translate_query():
+    query = (
+        "SELECT COUNT DISTINCT ?x WHERE {\n"
+        "FILTER (!isLiteral(?x) OR lang(?x) = '' OR langMatches(lang(?x), 'en'))\n"
+        '?x ?r "A OR B" .\nFILTER regex(?r, "http://rdf.freebase.com/ns/") }'
+    )
+    assert LocalSparqlExecutor._translate_query(query) == (
+        "SELECT (COUNT(DISTINCT ?x) AS ?count) WHERE {\n"
+        "FILTER (!isLiteral(?x) || lang(?x) = '' || langMatches(lang(?x), 'en'))\n"
+        '?x ?r "A OR B" .\nFILTER regex(str(?r), "http://rdf.freebase.com/ns/") }'
+    )
+
+
+def test_local_sparql_executor(graph_file_path):
+    sparql_executor = LocalSparqlExecutor(graph_file_path)
+    assert sparql_executor.get_out_relations("m.a") == [
+        "people.person.sibling",
+        "type.object.type",
+    ]
+    assert sparql_executor.get_in_relations("m.b") == ["people.person.sibling"]
+    assert sparql_executor.get_out_entities("m.a", "people.person.sibling") == [
+        "m.b",
+        "m.c",
+    ]
+    assert sparql_executor.get_in_entities("m.b", "people.person.sibling") == ["m.a"]
+    assert sorted(sparql_executor.execute_unary("people.person")) == [
+        "m.a",
+        "m.b",
+        "m.c",
+    ]
+    assert sparql_executor.entity_type_connected("m.a", "people.person")
+    assert not sparql_executor.entity_type_connected_2hop("m.a", "people.person")
+    # The results are cached in memory, like SparqlExecutor.
+    sparql_executor.get_out_relations("m.a")
+    assert sparql_executor.result_cache_statistics.memory_hit_count == 1
+    sparql_executor.close()
+
+
+class CountingLocalSparqlExecutor(LocalSparqlExecutor):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.sent_query_list = []
+
+    def _send_query(self, query):
+        self.sent_query_list.append(query)
+        return super()._send_query(query)
+
+
+def test_execute_query_list(graph_file_path):
+    sparql_executor = CountingLocalSparqlExecutor(graph_file_path)
+    query_a = (
+        "PREFIX : <http://rdf.freebase.com/ns/>\n"
+        "SELECT DISTINCT ?x WHERE { :m.a :people.person.sibling ?x . }"
+    )
+    query_b = (
+        "PREFIX : <http://rdf.freebase.com/ns/>\n"
+        "SELECT DISTINCT ?x WHERE { ?x :people.person.sibling :m.b . }"
+    )
+    assert sparql_executor.execute_query_list([query_a, query_b, query_a]) == [
+        ["m.b", "m.c"],
+        ["m.a"],
+        ["m.b", "m.c"],
+    ]
+    assert len(sparql_executor.sent_query_list) == 2
+    sparql_executor.close()
+
+
+def test_get_out_relations_batch(graph_file_path):
+    sparql_executor = CountingLocalSparqlExecutor(graph_file_path)
+    entity_list = ["m.a", "m.b", "m.c", "m.d", "m.a"]
+    expected_dict = {
+        entity: sparql_executor.get_out_relations(entity) for entity in entity_list
+    }
+    assert expected_dict["m.d"] == []
+    # The entities are looked up by batched queries, whose results are split into the results of the entities.
+    sparql_executor = CountingLocalSparqlExecutor(graph_file_path)
+    assert sparql_executor.get_out_relations_batch(entity_list, batch_size=3) == (
+        expected_dict
+    )
+    assert len(sparql_executor.sent_query_list) == 2
+    assert "VALUES ?entity" in sparql_executor.sent_query_list[0]
+    # The results are cached as if get_out_relations() were called.
+    for entity in ["m.a", "m.b", "m.c", "m.d"]:
+        assert sparql_executor.get_out_relations(entity) == expected_dict[entity]
+    assert sparql_executor.get_out_relations_batch(["m.b", "m.c"]) == {
+        "m.b": expected_dict["m.b"],
+        "m.c": expected_dict["m.c"],
+    }
+    assert len(sparql_executor.sent_query_list) == 2
+    sparql_executor.close()
+
+
+def test_lisp_to_sparql_memo():
+    program_list = [
+        "(JOIN people.person.sibling_inv m.a)",
+        "(COUNT (JOIN people.person.sibling_inv m.a))",
+        "(ARGMAX (AND (JOIN people.person.sibling_inv m.a) (JOIN people.person.sibling_inv m.b)) "
+        "people.person.height_meters)",
+    ]
+    LogicFormUtil.postprocess_raw_code.cache_clear()
+    LogicFormUtil.lisp_to_sparql.cache_clear()
+    for _ in range(2):
+        for program in program_list:
+            processed_code = LogicFormUtil.postprocess_raw_code(program)
+            assert processed_code == LogicFormUtil.postprocess_raw_code.__wrapped__(
+                program
+            )
+            assert LogicFormUtil.lisp_to_sparql(
+                processed_code
+            ) == LogicFormUtil.lisp_to_sparql.__wrapped__(processed_code)
+    assert LogicFormUtil.lisp_to_sparql.cache_info().hits == len(program_list)
+    assert LogicFormUtil.postprocess_raw_code.cache_info().hits == len(program_list)
+
+
+def run_session(task, agent_content_list):
+    session = Session(task_name=TaskName.KNOWLEDGE_GRAPH, sample_index="0")
+    task.reset(session)
+    for agent_content in agent_content_list:
+        session.chat_history.inject({"role": Role.AGENT, "content": agent_content})
+        task.interact(session)
+        if session.sample_status != SampleStatus.RUNNING:
+            break
+    task.complete(session)
+    return session
+
+
+def write_ontology(ontology_dir_path):
+    ontology_dir_path.mkdir()
+    (ontology_dir_path / "vocab.json").write_text(
+        json.dumps(
+            {
+                "attributes": ["people.person.height_meters"],
+                "relations": ["people.person.sibling"],
+            }
+        )
+    )
+    (ontology_dir_path / "fb_roles").write_text(
+        "people.person people.person.sibling people.person\n"
+        "people.person people.person.height_meters type.float\n"
+    )
+
+
+def test_knowledge_graph_api(graph_file_path, tmp_path):
+    ontology_dir_path = tmp_path / "ontology"
+    write_ontology(ontology_dir_path)
+    api = KnowledgeGraphAPI(
+        str(ontology_dir_path), LocalSparqlExecutor(graph_file_path)
+    )
+    assert api.relation_set == frozenset(["people.person.sibling"])
+    assert api.attribute_set == frozenset(["people.person.height_meters"])
+    # The relations and the attributes that are not in the ontology are filtered out.
+    assert api.get_relations("m.a")[1].endswith("[people.person.sibling]")
+    variable, _ = api.get_neighbors("m.a", "people.person.sibling")
+    assert api.get_attributes(variable)[1].endswith("[people.person.height_meters]")
+    # The error messages are prefixed by the name of the called API.
+    for api_name in ["argmax", "argmin"]:
+        with pytest.raises(KnowledgeGraphAPIException, match=f"^{api_name}: "):
+            getattr(api, api_name)(variable, "people.person.sibling")
+    api.sparql_executor.close()
+
+
+def test_knowledge_graph_task(graph_file_path, tmp_path):
+    ontology_dir_path = tmp_path / "ontology"
+    write_ontology(ontology_dir_path)
+    data_file_path = tmp_path / "entry_dict.json"
+    data_file_path.write_text(
+        json.dumps(
+            {
+                "0": {
+                    "question": "Who is the tallest sibling of A?",
+                    "entity_dict": {"A": "m.a"},
+                    "answer_list": ["m.b"],
+                }
+            }
+        )
+    )
+    chat_history_item_dict_path = tmp_path / "chat_history_items.json"
+    chat_history_item_dict_path.write_text(
+        json.dumps(
+            {
+                "value": {
+                    "0": {"role": "user", "content": "instruction"},
+                    "1": {"role": "agent", "content": "OK."},
+                }
+            }
+        )
+    )
+    task = KnowledgeGraph(
+        task_name=TaskName.KNOWLEDGE_GRAPH,
+        chat_history_item_factory=ChatHistoryItemFactory(
+            str(chat_history_item_dict_path)
+        ),
+        sparql_url="",
+        ontology_dir_path=str(ontology_dir_path),
+        data_file_path=str(data_file_path),
+        max_round=10,
+        sparql_graph_file_path=graph_file_path,
+    )
+    session = run_session(
+        task,
+        [
+            "Action: get_relations(A)",
+            "Action: get_neighbors(A, people.person.sibling)",
+            "Action: get_attributes(#0)",
+            "Action: argmax(#0, people.person.height_meters)",
+            "Final Answer: #1",
+        ],
+    )
+    assert session.sample_status == SampleStatus.COMPLETED
+    # The relations of the entity are looked up in reset(), and get_relations() reads them from the cache.
+    assert (
+        task.knowledge_graph_api.sparql_executor.result_cache_statistics.memory_hit_count
+        == 1
+    )
+    assert "[people.person.height_meters]" in session.chat_history.get_item(-4).content
+    assert session.task_output == {"answer": "m.b"}
+    assert session.evaluation_record.detail_dict["f1_score"] == 1
+    # count() is translated from the aggregate of Virtuoso.
+    session = run_session(
+        task,
+        [
+            "Action: get_relations(A)",
+            "Action: get_neighbors(A, people.person.sibling)",
+            "Action: count(#0)",
+            "Final Answer: #1",
+        ],
+    )
+    assert session.task_output == {"answer": "2"}
+    task.release()
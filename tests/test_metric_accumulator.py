@@ -0,0 +1,217 @@
+import pytest
+
+from src.tasks import Task, DatasetItem
+from src.tasks.task import SkillUtility, MetricAccumulator
+from src.typings import (
+    SampleStatus,
+    SessionEvaluationOutcome,
+    SessionEvaluationRecord,
+    SessionMetricCalculationPartial,
+    TaskName,
+)
+
+
+class FakeSkillUtility(SkillUtility):
+    _SKILL_TO_LEVEL_DICT = {"select": 0, "insert": 1, "join": 1, "unused": 2}
+
+
+class FakeDatasetItem(DatasetItem):
+    skill_list: list[str]
+    difficulty_level: int
+
+    def get_skill_list(self) -> list[str]:
+        return self.skill_list
+
+    def get_difficulty_level(self) -> int:
+        return self.difficulty_level
+
+    def get_effective_skill_list(self) -> list[str]:
+        return self.skill_list[-1:]
+
+
+class FakeTask(Task[FakeDatasetItem]):
+    def __init__(self, dataset):
+        super().__init__(TaskName.DB_BENCH, None, 3)
+        self._set_dataset(dataset)
+
+    def _get_default_task_output(self):
+        return {"answer": None}
+
+    @staticmethod
+    def _parse_agent_response(agent_response):
+        raise NotImplementedError()
+
+    def _reset(self, session):
+        raise NotImplementedError()
+
+    def _interact(self, session):
+        raise NotImplementedError()
+
+    def _complete(self, session):
+        raise NotImplementedError()
+
+    def _release(self):
+        pass
+
+    def _calculate_metric(self, metric_accumulator: MetricAccumulator):
+        return {
+            "skill": self._calculate_metric_based_on_skill(
+                FakeSkillUtility, metric_accumulator
+            ),
+            "difficulty_level": self._calculate_metric_based_on_difficulty_level(
+                metric_accumulator
+            ),
+            "overall": self._calculate_overall_metric(metric_accumulator),
+        }
+
+
+def calculate_reference_metric(dataset, session_partial_list):
+    # The computation over the whole session list, which is used before MetricAccumulator is introduced.
+    all_skill_list = FakeSkillUtility.get_all_skill_list()
+    skill_metric_dict = {
+        key: {skill: 0 for skill in all_skill_list}
+        for key in [
+            "count_dict",
+            "correct_count_dict",
+            "effective_count_dict",
+            "effective_correct_count_dict",
+        ]
+    }
+    difficulty_level_count_dict = {}
+    difficulty_level_correct_count_dict = {}
+    for session_partial in session_partial_list:
+        dataset_item = dataset[session_partial.sample_index]
+        correct_flag = (
+            session_partial.evaluation_record.outcome
+            == SessionEvaluationOutcome.CORRECT
+        )
+        for skill in dataset_item.get_skill_list():
+            effective_flag = skill in dataset_item.get_effective_skill_list()
+            skill_metric_dict["count_dict"][skill] += 1
+            skill_metric_dict["effective_count_dict"][skill] += effective_flag
+            skill_metric_dict["correct_count_dict"][skill] += correct_flag
+            skill_metric_dict["effective_correct_count_dict"][skill] += (
+                correct_flag and effective_flag
+            )
+        difficulty_level = str(dataset_item.get_difficulty_level())
+        difficulty_level_count_dict[difficulty_level] = (
+            difficulty_level_count_dict.get(difficulty_level, 0) + 1
+        )
+        difficulty_level_correct_count_dict[difficulty_level] = (
+            difficulty_level_correct_count_dict.get(difficulty_level, 0) + correct_flag
+        )
+    for prefix in ["", "effective_"]:
+        skill_metric_dict[f"{prefix}correct_rate_dict"] = {
+            skill: (
+                skill_metric_dict[f"{prefix}correct_count_dict"][skill]
+                / skill_metric_dict[f"{prefix}count_dict"][skill]
+                if skill_metric_dict[f"{prefix}count_dict"][skill] > 0
+                else -1
+            )
+            for skill in all_skill_list
+        }
+    session_count = len(session_partial_list)
+    overall_metric_dict = {"basic": {"session_count": float(session_count)}}
+    if session_count > 0:
+        overall_metric_dict["evaluation_outcome"] = {
+            str(outcome): sum(
+                session_partial.evaluation_record.outcome == outcome
+                for session_partial in session_partial_list
+            )
+            / session_count
+            for outcome in SessionEvaluationOutcome
+        }
+        overall_metric_dict["sample_status"] = {
+            str(sample_status): sum(
+                session_partial.sample_status == sample_status
+                for session_partial in session_partial_list
+            )
+            / session_count
+            for sample_status in SampleStatus
+        }
+    return {
+        "skill": skill_metric_dict,
+        "difficulty_level": {
+            "count_dict": {
+                key: difficulty_level_count_dict[key]
+                for key in sorted(difficulty_level_count_dict, key=int)
+            },
+            "correct_count_dict": {
+                key: difficulty_level_correct_count_dict[key]
+                for key in sorted(difficulty_level_count_dict, key=int)
+            },
+            "correct_rate_dict": {
+                key: difficulty_level_correct_count_dict[key]
+                / difficulty_level_count_dict[key]
+                for key in sorted(difficulty_level_count_dict, key=int)
+            },
+        },
+        "overall": overall_metric_dict,
+    }
+
+
+def construct_dataset():
+    skill_list_list = [["select"], ["select", "insert"], ["insert", "join"], ["join"]]
+    return {
+        sample_index: FakeDatasetItem(
+            skill_list=skill_list_list[sample_index % len(skill_list_list)],
+            difficulty_level=sample_index % 3,
+        )
+        for sample_index in range(12)
+    }
+
+
+def construct_session_partial(sample_index, outcome):
+    return SessionMetricCalculationPartial(
+        sample_index=sample_index,
+        sample_status=(
+            SampleStatus.COMPLETED
+            if outcome == SessionEvaluationOutcome.CORRECT
+            else SampleStatus.TASK_LIMIT_REACHED
+        ),
+        evaluation_record=SessionEvaluationRecord(outcome=outcome),
+    )
+
+
+def test_accumulate_metric():
+    dataset = construct_dataset()
+    outcome_list = [
+        SessionEvaluationOutcome.CORRECT,
+        SessionEvaluationOutcome.INCORRECT,
+        SessionEvaluationOutcome.UNKNOWN,
+    ]
+    session_partial_list = [
+        construct_session_partial(sample_index, outcome_list[sample_index % 5 % 3])
+        for sample_index in list(dataset.keys()) + [1, 2]
+    ]
+    task = FakeTask(dataset)
+    assert task.calculate_metric([]) == calculate_reference_metric(dataset, [])
+    for length in range(1, len(session_partial_list) + 1):
+        expected_metric = calculate_reference_metric(
+            dataset, session_partial_list[:length]
+        )
+        assert task.calculate_metric(session_partial_list[:length]) == expected_metric
+        # The sessions are added one by one.
+        assert task.accumulate_metric([session_partial_list[length - 1]]) == (
+            expected_metric
+        )
+    # calculate_metric() does not affect the accumulated metric.
+    assert task.accumulate_metric([]) == calculate_reference_metric(
+        dataset, session_partial_list
+    )
+    # Resuming the assignment replaces the accumulated metric, instead of counting the previous sessions twice.
+    assert task.accumulate_metric(session_partial_list[:5], reset=True) == (
+        calculate_reference_metric(dataset, session_partial_list[:5])
+    )
+    assert task.accumulate_metric([], reset=True) == calculate_reference_metric(
+        dataset, []
+    )
+
+
+def test_unknown_skill():
+    dataset = {0: FakeDatasetItem(skill_list=["select", "delete"], difficulty_level=0)}
+    task = FakeTask(dataset)
+    with pytest.raises(KeyError, match="delete"):
+        task.calculate_metric(
+            [construct_session_partial(0, SessionEvaluationOutcome.CORRECT)]
+        )
@@ -0,0 +1,174 @@
+import socket
+import threading
+import time
+from multiprocessing import Process
+
+import httpx
+import openai
+import pytest
+import requests
+import uvicorn
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse
+
+from src.language_models.instance.openai_language_model import OpenaiLanguageModel
+from src.typings import ChatHistory, Role
+
+
+def start_fake_openai_server(port):
+    """
+    An OpenAI-compatible server. The content of the last message controls the response:
+        "<name> <latency> <rate_limit_count>" sleeps for <latency> seconds, and responds 429 to the first
+        <rate_limit_count> requests of <name>.
+    """
+    app = FastAPI()
+    lock = threading.Lock()
+    call_count_dict = {}
+
+    @app.post("/v1/chat/completions")
+    def create_chat_completion(body: dict):
+        content = body["messages"][-1]["content"]
+        name, latency, rate_limit_count = content.split(" ")
+        with lock:
+            call_count_dict[name] = call_count_dict.get(name, 0) + 1
+            call_count = call_count_dict[name]
+        if call_count <= int(rate_limit_count):
+            return JSONResponse(
+                {"error": {"message": "Rate limit reached.", "type": "requests"}},
+                status_code=429,
+                headers={"retry-after": "0.1"},
+            )
+        time.sleep(float(latency))
+        return {
+            "id": f"chatcmpl-{name}",
+            "object": "chat.completion",
+            "created": 0,
+            "model": body["model"],
+            "choices": [
+                {
+                    "index": 0,
+                    "message": {"role": "assistant", "content": f"answer {name}"},
+                    "finish_reason": "stop",
+                }
+            ],
+            "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2},
+        }
+
+    @app.post("/call_count")
+    def get_call_count():
+        with lock:
+            return dict(call_count_dict)
+
+    uvicorn.run(app, host="127.0.0.1", port=port, log_level="warning")
+
+
+@pytest.fixture(scope="module")
+def server_address():
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    process = Process(target=start_fake_openai_server, args=(port,))
+    process.start()
+    server_address = f"http://127.0.0.1:{port}"
+    try:
+        for _ in range(100):
+            try:
+                requests.post(f"{server_address}/call_count", timeout=1)
+                break
+            except requests.exceptions.ConnectionError:
+                time.sleep(0.1)
+        yield server_address
+    finally:
+        process.terminate()
+        process.join()
+
+
+def construct_language_model(server_address, maximum_concurrency):
+    return OpenaiLanguageModel(
+        "fake-model",
+        {"user": "user", "agent": "assistant"},
+        api_key="fake-key",
+        base_url=f"{server_address}/v1",
+        maximum_concurrency=maximum_concurrency,
+    )
+
+
+def construct_batch_chat_history(content_list):
+    batch_chat_history = []
+    for content in content_list:
+        chat_history = ChatHistory()
+        chat_history.inject({"role": Role.USER, "content": content})
+        batch_chat_history.append(chat_history)
+    return batch_chat_history
+
+
+def get_call_count_dict(server_address):
+    return requests.post(f"{server_address}/call_count", timeout=1).json()
+
+
+def test_concurrent_batch(server_address):
+    name_list = [f"concurrent_{index}" for index in range(6)]
+    batch_chat_history = construct_batch_chat_history(
+        [f"{name} {0.5 - index * 0.05} 0" for index, name in enumerate(name_list)]
+    )
+    language_model = construct_language_model(server_address, 3)
+    start_time = time.perf_counter()
+    output_list = language_model.inference(batch_chat_history)
+    elapsed = time.perf_counter() - start_time
+    # The outputs are in the order of the batch, although the later requests finish earlier.
+    assert [output.content for output in output_list] == [
+        f"answer {name}" for name in name_list
+    ]
+    assert all(output.role == Role.AGENT for output in output_list)
+    # Two waves of three requests, instead of six sequential requests.
+    assert elapsed < 1.5
+
+
+def test_rate_limit(server_address):
+    batch_chat_history = construct_batch_chat_history(
+        ["limited 0 4", "unlimited_0 0.2 0", "unlimited_1 0 0"]
+    )
+    language_model = construct_language_model(server_address, 4)
+    output_list = language_model.inference(batch_chat_history)
+    assert [output.content for output in output_list] == [
+        "answer limited",
+        "answer unlimited_0",
+        "answer unlimited_1",
+    ]
+    call_count_dict = get_call_count_dict(server_address)
+    # The OpenAI client retries twice, then OpenaiLanguageModel retries after the time in the Retry-After header.
+    assert call_count_dict["limited"] == 5
+    # The other requests in the batch are not sent again.
+    assert call_count_dict["unlimited_0"] == 1
+    assert call_count_dict["unlimited_1"] == 1
+
+
+def test_get_retry_after():
+    request = httpx.Request("POST", "http://127.0.0.1/v1/chat/completions")
+
+    def construct_rate_limit_error(header_dict):
+        return openai.RateLimitError(
+            "Rate limit reached.",
+            response=httpx.Response(429, headers=header_dict, request=request),
+            body=None,
+        )
+
+    assert (
+        OpenaiLanguageModel._get_retry_after(
+            construct_rate_limit_error({"retry-after": "3"})
+        )
+        == 3
+    )
+    assert (
+        OpenaiLanguageModel._get_retry_after(
+            construct_rate_limit_error({"retry-after-ms": "250", "retry-after": "3"})
+        )
+        == 0.25
+    )
+    assert (
+        OpenaiLanguageModel._get_retry_after(
+            construct_rate_limit_error({"retry-after": "Wed, 21 Oct 2015 07:28:00 GMT"})
+        )
+        is None
+    )
+    assert OpenaiLanguageModel._get_retry_after(ValueError()) is None
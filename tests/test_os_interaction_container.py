@@ -0,0 +1,86 @@
+import threading
+import time
+
+import pytest
+
+docker = pytest.importorskip("docker")
+
+from src.tasks.instance.os_interaction.container import OSInteractionContainer
+from src.tasks.instance.os_interaction.utility import CommandItem, CommandName
+
+IMAGE = "local-os/default"
+
+
+@pytest.fixture(scope="module")
+def container():
+    try:
+        docker.from_env().images.get(IMAGE)
+    except Exception as e:
+        pytest.skip(f"The docker image {IMAGE} is not available: {e}")
+    container = OSInteractionContainer(2, IMAGE, maximum_output_byte_count=1000)
+    yield container
+    container.terminate()
+
+
+def execute_bash(container, script):
+    return container.execute_independent(
+        CommandItem(command_name=CommandName.BASH, script=script)
+    )
+
+
+def test_timeout(container):
+    thread_count = threading.active_count()
+    start_time = time.perf_counter()
+    # The loop is in a new session, which is not in the process group of the command.
+    execution_result = execute_bash(
+        container, "setsid bash -c 'while true; do :; done' & while true; do :; done"
+    )
+    assert execution_result.timeout_flag and execution_result.output is None
+    assert time.perf_counter() - start_time < 2 + 5
+    # The processes of the command are killed, and the thread that reads the output is finished.
+    # The pattern does not match the command line of grep itself.
+    execution_result = execute_bash(
+        container, "grep -l '[w]hile true' /proc/[0-9]*/cmdline 2>/dev/null | wc -l"
+    )
+    assert execution_result.output.strip() == "0"
+    assert threading.active_count() == thread_count
+    # The container is still usable.
+    execution_result = execute_bash(container, "echo done")
+    assert (execution_result.exit_code, execution_result.output) == (0, "done\n")
+
+
+def test_output_limit(container):
+    execution_result = execute_bash(container, "yes 0123456789 | head -c 100000")
+    assert execution_result.exit_code == 0 and execution_result.truncated_flag
+    assert execution_result.output == "0123456789\n" * 90 + "0123456789"
+    execution_result = execute_bash(container, "printf 'x%.0s' $(seq 1000); exit 3")
+    assert execution_result.exit_code == 3 and not execution_result.truncated_flag
+    assert execution_result.output == "x" * 1000
+
+
+def test_build_cache(container):
+    client = docker.from_env()
+    build_cache_volume = f"os_interaction_build_cache_test_{time.time_ns()}"
+    container_list = []
+    try:
+        for _ in range(2):
+            container_list.append(
+                OSInteractionContainer(10, IMAGE, build_cache_volume=build_cache_volume)
+            )
+        command_item = CommandItem(
+            command_name=CommandName.C,
+            script='#include <stdio.h>\nint main() { printf("%d", 6 * 7); return 0; }',
+        )
+        # The second container reuses the executable compiled by the first one.
+        for container_index, expected_statistics in enumerate([(0, 1), (1, 0)]):
+            build_container = container_list[container_index]
+            execution_result = build_container.execute_independent(command_item)
+            assert (execution_result.exit_code, execution_result.output) == (0, "42")
+            statistics = build_container.build_cache_statistics
+            assert (statistics.hit_count, statistics.miss_count) == expected_statistics
+        assert container_list[1].build_cache_statistics.saved_seconds > 0
+    finally:
+        for build_container in container_list:
+            build_container.terminate()
+        time.sleep(1)
+        client.volumes.get(build_cache_volume).remove(force=True)
@@ -0,0 +1,190 @@
+import threading
+import time
+
+import pytest
+
+from src.tasks.instance.os_interaction import container as container_module
+from src.tasks.instance.os_interaction.container import (
+    OSInteractionContainer,
+    OSInteractionContainerPool,
+)
+
+
+class FakeDockerContainer:
+    def exec_run(self, cmd):
+        pass
+
+
+class FakeOSInteractionContainer(OSInteractionContainer):
+    """
+    Record the start, the snapshot and the termination instead of running a docker container.
+    """
+
+    lock = threading.Lock()
+    started_list = []
+    start_latency = 0.0
+    failure_flag = False
+
+    def __init__(
+        self,
+        command_execution_timeout,
+        image,
+        maximum_output_byte_count,
+        build_cache_volume,
+    ):
+        time.sleep(FakeOSInteractionContainer.start_latency)
+        if FakeOSInteractionContainer.failure_flag:
+            raise RuntimeError("docker is not available")
+        self.container = FakeDockerContainer()
+        self.use_count = 0
+        self.terminated_flag = False
+        self.snapshot_flag = False
+        self.restore_count = 0
+        self.restore_failure_flag = False
+        with FakeOSInteractionContainer.lock:
+            FakeOSInteractionContainer.started_list.append(self)
+
+    def terminate(self):
+        self.terminated_flag = True
+
+    def create_snapshot(self):
+        self.snapshot_flag = True
+
+    def restore_snapshot(self):
+        assert self.snapshot_flag
+        if self.restore_failure_flag:
+            raise RuntimeError("the snapshot is broken")
+        self.restore_count += 1
+
+
+@pytest.fixture(autouse=True)
+def fake_container(monkeypatch):
+    monkeypatch.setattr(
+        container_module, "OSInteractionContainer", FakeOSInteractionContainer
+    )
+    FakeOSInteractionContainer.started_list = []
+    FakeOSInteractionContainer.start_latency = 0.0
+    FakeOSInteractionContainer.failure_flag = False
+
+
+def test_warm_pool():
+    FakeOSInteractionContainer.start_latency = 0.3
+    pool = OSInteractionContainerPool(10, pool_size=2)
+    time.sleep(0.5)
+    # The containers are started in advance, so acquiring one does not wait for the start.
+    start_time = time.perf_counter()
+    container_0 = pool.acquire()
+    assert time.perf_counter() - start_time < 0.1
+    pool.release(container_0)
+    container_1 = pool.acquire()
+    assert container_1 is not container_0
+    pool.release(container_1)
+    time.sleep(0.5)
+    # Every container is used once, and killed after it is released.
+    assert container_0.terminated_flag and container_1.terminated_flag
+    assert len(FakeOSInteractionContainer.started_list) == 4
+    pool.shutdown()
+    assert all(
+        container.terminated_flag
+        for container in FakeOSInteractionContainer.started_list
+    )
+
+
+def test_reuse():
+    pool = OSInteractionContainerPool(10, pool_size=1, maximum_reuse_count=2)
+    container_0 = pool.acquire()
+    assert container_0.snapshot_flag
+    pool.release(container_0)
+    # The container is restored from the snapshot before it is handed out again.
+    assert pool.acquire() is container_0
+    assert container_0.restore_count == 1
+    pool.release(container_0)
+    container_1 = pool.acquire()
+    assert container_0.restore_count == 1
+    assert container_1 is not container_0
+    # A container in an unknown state is not reused.
+    pool.release(container_1, reusable=False)
+    container_2 = pool.acquire()
+    assert container_2 not in (container_0, container_1)
+    pool.release(container_2)
+    pool.shutdown()
+    assert container_0.terminated_flag and container_1.terminated_flag
+    assert all(
+        container.terminated_flag
+        for container in FakeOSInteractionContainer.started_list
+    )
+
+
+def test_without_pool():
+    pool = OSInteractionContainerPool(10, pool_size=0)
+    assert FakeOSInteractionContainer.started_list == []
+    container = pool.acquire()
+    pool.release(container)
+    assert container.terminated_flag
+    assert len(FakeOSInteractionContainer.started_list) == 1
+    pool.shutdown()
+
+
+def test_start_failure():
+    # The latency makes sure that the replacement is started after the failure is fixed.
+    FakeOSInteractionContainer.start_latency = 0.1
+    FakeOSInteractionContainer.failure_flag = True
+    pool = OSInteractionContainerPool(10, pool_size=1)
+    with pytest.raises(RuntimeError, match="docker is not available"):
+        pool.acquire()
+    FakeOSInteractionContainer.failure_flag = False
+    # The failed start is replaced in the background.
+    time.sleep(0.3)
+    assert len(FakeOSInteractionContainer.started_list) == 1
+    container = pool.acquire()
+    assert container is FakeOSInteractionContainer.started_list[0]
+    pool.release(container)
+    pool.shutdown()
+
+
+def test_restore_failure():
+    pool = OSInteractionContainerPool(10, pool_size=1, maximum_reuse_count=3)
+    container_0 = pool.acquire()
+    container_0.restore_failure_flag = True
+    pool.release(container_0)
+    # The container that fails to be restored is replaced by a new one.
+    container_1 = pool.acquire()
+    assert container_1 is not container_0 and container_0.terminated_flag
+    assert container_1.use_count == 1
+    pool.release(container_1)
+    pool.shutdown()
+    assert container_1.terminated_flag
+
+
+def test_classify_change_list():
+    directory_metadata_dict = {
+        "/": (0o755, 0, 0),
+        "/etc": (0o755, 0, 0),
+        "/home": (0o755, 0, 0),
+        "/tmp": (0o1777, 0, 0),
+        "/usr": (0o755, 0, 0),
+        "/usr/share": (0o755, 0, 0),
+    }
+    change_list = [
+        {"Path": "/etc", "Kind": 0},
+        {"Path": "/etc/passwd", "Kind": 0},
+        {"Path": "/etc/hosts", "Kind": 0},
+        {"Path": "/home", "Kind": 0},
+        {"Path": "/home/jack", "Kind": 1},
+        {"Path": "/home/jack/.bashrc", "Kind": 1},
+        {"Path": "/usr", "Kind": 0},
+        {"Path": "/usr/share", "Kind": 2},
+        {"Path": "/usr/share/doc", "Kind": 2},
+        {"Path": "/proc", "Kind": 0},
+        {"Path": "/tmp", "Kind": 0},
+        {"Path": "/tmp/a.out", "Kind": 1},
+    ]
+    removed_path_list, directory_path_list, copied_path_list = (
+        OSInteractionContainer._classify_change_list(
+            change_list, directory_metadata_dict
+        )
+    )
+    assert removed_path_list == ["/home/jack", "/tmp/a.out"]
+    assert directory_path_list == ["/etc", "/home", "/tmp", "/usr"]
+    # The paths under the deleted directory are copied with the directory.
+    assert copied_path_list == ["/etc/passwd", "/usr/share"]
@@ -0,0 +1,119 @@
+from src.language_models import LanguageModel
+from src.typings import ChatHistory, ChatHistoryItem, Role
+from src.utils import DiskCache
+
+
+class CountingLanguageModel(LanguageModel):
+    def __init__(self, response_cache_path, response_count=1):
+        super().__init__(
+            {"user": "user", "agent": "assistant"},
+            response_cache_path=response_cache_path,
+        )
+        self.response_count = response_count
+        self.request_count = 0
+
+    def _inference(self, batch_chat_history, inference_config_dict, system_prompt):
+        output_list = []
+        for chat_history in batch_chat_history:
+            self.request_count += 1
+            for response_index in range(self.response_count):
+                output_list.append(
+                    ChatHistoryItem(
+                        role=Role.AGENT,
+                        content=f"{chat_history.get_item(-1).content} "
+                        f"{self.request_count} {response_index}",
+                    )
+                )
+        return output_list
+
+
+def construct_chat_history(content):
+    chat_history = ChatHistory()
+    chat_history.inject({"role": Role.USER, "content": content})
+    return chat_history
+
+
+def test_disk_cache(tmp_path):
+    cache_path = str(tmp_path / "cache.sqlite")
+    disk_cache = DiskCache(cache_path, maximum_size=200)
+    assert disk_cache.get("a") is None
+    disk_cache.set("a", b"x" * 100)
+    disk_cache.set("b", b"y" * 100)
+    assert disk_cache.get("a") == b"x" * 100
+    assert (disk_cache.hit_count, disk_cache.miss_count) == (1, 1)
+    # The values are compressed.
+    assert disk_cache.get_size() < 100
+    disk_cache.close()
+    # The entries are persistent, and the least recently used entry is evicted when the size is exceeded.
+    disk_cache = DiskCache(cache_path, maximum_size=40)
+    disk_cache.set("c", bytes(range(30)))
+    assert disk_cache.get("b") is None
+    assert disk_cache.get("a") is None
+    assert disk_cache.get("c") == bytes(range(30))
+    assert disk_cache.get_entry_count() == 1
+    assert disk_cache.get_size() <= 40
+    # A value is replaced without counting its previous size.
+    disk_cache.set("c", b"z")
+    assert disk_cache.get("c") == b"z"
+    assert disk_cache.get_entry_count() == 1
+    assert disk_cache.get_size() < 40
+    disk_cache.close()
+
+
+def test_language_model_response_cache(tmp_path):
+    cache_path = str(tmp_path / "response_cache.sqlite")
+    language_model = CountingLanguageModel(cache_path)
+    batch_chat_history = [
+        construct_chat_history(content) for content in ["q0", "q1", "q0"]
+    ]
+    output_list = language_model.inference(batch_chat_history, {"temperature": 1})
+    # The duplicated requests in a batch are sent separately, since they are used to get different samples.
+    assert [output.content for output in output_list] == ["q0 1 0", "q1 2 0", "q0 3 0"]
+    assert language_model.request_count == 3
+    # A new instance (e.g., a resumed run) reads the responses from the file.
+    language_model = CountingLanguageModel(cache_path)
+    assert [
+        output.content
+        for output in language_model.inference(batch_chat_history, {"temperature": 1})
+    ] == ["q0 1 0", "q1 2 0", "q0 3 0"]
+    assert language_model.request_count == 0
+    assert language_model.response_cache.hit_count == 3
+    # Only the requests that are not cached are sent.
+    output_list = language_model.inference(
+        [construct_chat_history("q2"), construct_chat_history("q1")],
+        {"temperature": 1},
+    )
+    assert [output.content for output in output_list] == ["q2 1 0", "q1 2 0"]
+    assert language_model.request_count == 1
+    # The inference config, the system prompt and the model are parts of the key.
+    language_model.inference([construct_chat_history("q1")], {"temperature": 0})
+    language_model.inference(
+        [construct_chat_history("q1")], {"temperature": 1}, system_prompt="other"
+    )
+    assert language_model.request_count == 3
+    language_model.get_model_identity = lambda: "other_model"
+    language_model.inference([construct_chat_history("q1")], {"temperature": 1})
+    assert language_model.request_count == 4
+
+
+def test_language_model_response_cache_multiple_response(tmp_path):
+    cache_path = str(tmp_path / "response_cache.sqlite")
+    language_model = CountingLanguageModel(cache_path, response_count=2)
+    output_list = language_model.inference(
+        [construct_chat_history("q0"), construct_chat_history("q1")]
+    )
+    assert [output.content for output in output_list] == [
+        "q0 1 0",
+        "q0 1 1",
+        "q1 2 0",
+        "q1 2 1",
+    ]
+    output_list = language_model.inference(
+        [construct_chat_history("q1"), construct_chat_history("q2")]
+    )
+    assert [output.content for output in output_list] == [
+        "q1 2 0",
+        "q1 2 1",
+        "q2 3 0",
+        "q2 3 1",
+    ]
@@ -0,0 +1,212 @@
+import socket
+import time
+from multiprocessing import Process
+
+import pytest
+import requests
+
+from src.tasks.client import TaskClient
+from src.tasks.server import TaskServer
+from src.tasks.session_replica import SessionReplica
+from src.typings import (
+    Role,
+    SampleStatus,
+    Session,
+    SessionEvaluationOutcome,
+    TaskName,
+)
+from src.utils import SafeLogger
+
+
+class FakeTask:
+    """
+    A stateless task, so that the sessions of different clients can be interleaved on the same server.
+    """
+
+    def reset(self, session):
+        session.sample_status = SampleStatus.RUNNING
+        session.chat_history.inject(
+            {"role": Role.USER, "content": f"question {session.sample_index}"}
+        )
+
+    def interact(self, session):
+        last_content = session.chat_history.get_item(-1).content
+        if last_content == "rewrite":
+            # Replace an item in the middle of the chat history.
+            session.chat_history.set(0, {"role": Role.USER, "content": "rewritten"})
+        session.chat_history.inject(
+            {
+                "role": Role.USER,
+                "content": f"reply {session.chat_history.get_value_length()}",
+            }
+        )
+        session.task_output = {"last_content": last_content}
+        if session.chat_history.get_value_length() >= 7:
+            session.sample_status = SampleStatus.TASK_LIMIT_REACHED
+            session.finish_reason = "round limit"
+
+    def complete(self, session):
+        session.evaluation_record.outcome = SessionEvaluationOutcome.CORRECT
+        session.evaluation_record.detail_dict = {"score": 1.5, "flag": True}
+
+    def release(self):
+        pass
+
+
+def get_free_port():
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+@pytest.fixture(scope="module")
+def server_address():
+    port = get_free_port()
+    process = Process(target=TaskServer.start_server, args=(FakeTask(), port, "/api"))
+    process.start()
+    server_address = f"http://127.0.0.1:{port}/api"
+    try:
+        for _ in range(100):
+            try:
+                requests.post(f"{server_address}/ping", json={}, timeout=1)
+                break
+            except requests.exceptions.ConnectionError:
+                time.sleep(0.1)
+        yield server_address
+    finally:
+        process.terminate()
+        process.join()
+
+
+@pytest.fixture
+def warning_list(monkeypatch):
+    warning_list = []
+    monkeypatch.setattr(SafeLogger, "warning", warning_list.append)
+    return warning_list
+
+
+def run_session(task, sample_index, agent_content_list):
+    session = Session(task_name=TaskName.DB_BENCH, sample_index=sample_index)
+    task.reset(session)
+    for agent_content in agent_content_list:
+        session.chat_history.inject({"role": Role.AGENT, "content": agent_content})
+        task.interact(session)
+    task.complete(session)
+    return session
+
+
+def test_multiple_round(server_address, warning_list):
+    task_client = TaskClient(server_address, 10)
+    agent_content_list = ["a", "b", "c"]
+    for sample_index in range(3):
+        session = run_session(task_client, sample_index, agent_content_list)
+        expected_session = run_session(FakeTask(), sample_index, agent_content_list)
+        assert session.model_dump() == expected_session.model_dump()
+    assert warning_list == []
+
+
+def test_chat_history_start_index(server_address, warning_list, monkeypatch):
+    sent_delta_list = []
+    received_delta_list = []
+    original_create_delta = SessionReplica.create_delta
+    original_apply_delta = SessionReplica.apply_delta
+
+    def create_delta(self, full=False):
+        session_delta = original_create_delta(self, full)
+        sent_delta_list.append(session_delta)
+        return session_delta
+
+    def apply_delta(self, session_delta):
+        received_delta_list.append(session_delta)
+        original_apply_delta(self, session_delta)
+
+    monkeypatch.setattr(SessionReplica, "create_delta", create_delta)
+    monkeypatch.setattr(SessionReplica, "apply_delta", apply_delta)
+    task_client = TaskClient(server_address, 10)
+    session = Session(task_name=TaskName.DB_BENCH, sample_index=0)
+    task_client.reset(session)
+    assert sent_delta_list[-1].base_version is None
+    assert received_delta_list[-1].chat_history_start_index == 0
+    assert len(received_delta_list[-1].chat_history_item_list) == 1
+    # Only the item injected by the agent is sent, and only the item injected by the task is received.
+    session.chat_history.inject({"role": Role.AGENT, "content": "a"})
+    task_client.interact(session)
+    assert sent_delta_list[-1].chat_history_start_index == 1
+    assert len(sent_delta_list[-1].chat_history_item_list) == 1
+    assert received_delta_list[-1].chat_history_start_index == 2
+    assert len(received_delta_list[-1].chat_history_item_list) == 1
+    # The item replaced by the client is sent again, along with the items after it.
+    session.chat_history.set(1, {"role": Role.AGENT, "content": "x"})
+    session.chat_history.inject({"role": Role.AGENT, "content": "rewrite"})
+    task_client.interact(session)
+    assert sent_delta_list[-1].chat_history_start_index == 1
+    assert [item.content for item in sent_delta_list[-1].chat_history_item_list] == [
+        "x",
+        "reply 2",
+        "rewrite",
+    ]
+    # The item replaced by the server is received again, along with the items after it.
+    assert received_delta_list[-1].chat_history_start_index == 0
+    assert [
+        item.content for item in received_delta_list[-1].chat_history_item_list
+    ] == ["rewritten", "x", "reply 2", "rewrite", "reply 4"]
+    # Nothing is changed by the client.
+    task_client.complete(session)
+    assert sent_delta_list[-1].chat_history_start_index == 5
+    assert sent_delta_list[-1].chat_history_item_list == []
+    assert sent_delta_list[-1].scalar_field_dict == {}
+    assert received_delta_list[-1].chat_history_item_list == []
+    assert set(received_delta_list[-1].scalar_field_dict.keys()) == {
+        "evaluation_record"
+    }
+    assert [item.content for item in session.chat_history.iterate_item()] == [
+        "rewritten",
+        "x",
+        "reply 2",
+        "rewrite",
+        "reply 4",
+    ]
+    assert session.evaluation_record.detail_dict == {"score": 1.5, "flag": True}
+    assert warning_list == []
+
+
+def test_stale_server_replica(server_address, warning_list):
+    # Two clients share the server, so the replica held by the server is replaced by the session of the other client.
+    task_client_0 = TaskClient(server_address, 10)
+    task_client_1 = TaskClient(server_address, 10)
+    session_0 = Session(task_name=TaskName.DB_BENCH, sample_index=0)
+    session_1 = Session(task_name=TaskName.DB_BENCH, sample_index=1)
+    task_client_0.reset(session_0)
+    task_client_1.reset(session_1)
+    assert warning_list == []
+    session_0.chat_history.inject({"role": Role.AGENT, "content": "a"})
+    task_client_0.interact(session_0)
+    assert len(warning_list) == 1 and "send the full session" in warning_list[0]
+    expected_session_0 = run_session(FakeTask(), 0, ["a"])
+    task_client_0.complete(session_0)
+    assert session_0.model_dump() == expected_session_0.model_dump()
+    # The version of the client is ahead of the server, e.g., the response of the previous call is lost.
+    session_1.chat_history.inject({"role": Role.AGENT, "content": "a"})
+    task_client_1.interact(session_1)
+    task_client_1._get_session_replica().version += 1
+    task_client_1.complete(session_1)
+    assert session_1.model_dump() == run_session(FakeTask(), 1, ["a"]).model_dump()
+    assert len(warning_list) == 3 and "send the full session" in warning_list[-1]
+
+
+def test_client_mismatch(server_address, warning_list, monkeypatch):
+    original_create_delta = SessionReplica.create_delta
+
+    def create_delta(self, full=False):
+        session_delta = original_create_delta(self, full)
+        if self.version is not None and self.version > 2:
+            # The state of the client is corrupted after the delta is sent, so the response cannot be applied.
+            self._item_digest_list[-1] = b"corrupted"
+        return session_delta
+
+    monkeypatch.setattr(SessionReplica, "create_delta", create_delta)
+    task_client = TaskClient(server_address, 10)
+    session = run_session(task_client, 0, ["a", "b"])
+    assert session.model_dump() == run_session(FakeTask(), 0, ["a", "b"]).model_dump()
+    assert len(warning_list) > 0
+    assert all("Fetch the full session" in warning for warning in warning_list)
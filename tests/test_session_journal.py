@@ -0,0 +1,160 @@
+import json
+import os
+
+import pytest
+
+from src.typings import (
+    Role,
+    SampleStatus,
+    Session,
+    SessionEvaluationOutcome,
+    SessionEvaluationRecord,
+    SessionMetricCalculationPartial,
+    TaskName,
+)
+from src.utils import SessionJournal, SessionResumeIndex
+
+
+def create_session(sample_index):
+    session = Session(task_name=TaskName.DB_BENCH, sample_index=sample_index)
+    session.chat_history.inject({"role": Role.USER, "content": 'question\n"ü"'})
+    session.chat_history.inject(
+        {"role": Role.AGENT, "content": f"answer {sample_index}"}
+    )
+    session.sample_status = SampleStatus.COMPLETED
+    session.evaluation_record = SessionEvaluationRecord(
+        outcome=SessionEvaluationOutcome.CORRECT,
+        detail_dict={"score": float("inf"), "flag": True, "count": sample_index},
+    )
+    return session
+
+
+@pytest.mark.parametrize("session_count", [0, 1, 5])
+def test_compact_layout(tmp_path, session_count):
+    session_list = [
+        create_session(sample_index) for sample_index in range(session_count)
+    ]
+    session_journal = SessionJournal(str(tmp_path / "runs.jsonl"))
+    for session in session_list:
+        session_journal.append(session)
+    session_journal.compact(str(tmp_path / "runs.json"))
+    expected_output = json.dumps(
+        [session.model_dump() for session in session_list], indent=2
+    )
+    assert (tmp_path / "runs.json").read_text() == expected_output
+    assert not os.path.exists(tmp_path / "runs.json.tmp")
+
+
+def test_import_session_list(tmp_path):
+    # runs.json written by the previous versions.
+    session_list = [create_session(sample_index) for sample_index in range(3)]
+    json.dump(
+        [session.model_dump() for session in session_list],
+        open(tmp_path / "legacy_runs.json", "w"),
+        indent=2,
+    )
+    session_journal = SessionJournal(str(tmp_path / "runs.jsonl"))
+    session_journal.import_session_list(str(tmp_path / "legacy_runs.json"))
+    assert [
+        session.model_dump()
+        for session in SessionJournal(session_journal.journal_path).get_session_list()
+    ] == [session.model_dump() for session in session_list]
+    session_journal.compact(str(tmp_path / "runs.json"))
+    assert (tmp_path / "runs.json").read_text() == (
+        tmp_path / "legacy_runs.json"
+    ).read_text()
+
+
+def test_compact_if_grown(tmp_path):
+    session_journal = SessionJournal(str(tmp_path / "runs.jsonl"))
+    output_path = str(tmp_path / "runs.json")
+    compacted_session_count_list = []
+    for sample_index in range(16):
+        session_journal.append(create_session(sample_index))
+        session_journal.compact_if_grown(output_path)
+        compacted_session_count_list.append(len(json.load(open(output_path))))
+    # The sessions have the same size, so runs.json is rewritten when the session count doubles.
+    assert compacted_session_count_list == [1, 2, 2, 4, 4, 4, 4] + [8] * 8 + [16]
+
+
+def test_corrupted_record(tmp_path):
+    session_journal = SessionJournal(str(tmp_path / "runs.jsonl"))
+    for sample_index in range(3):
+        session_journal.append(create_session(sample_index))
+    content = (tmp_path / "runs.jsonl").read_bytes()
+    first_line_length = content.index(b"\n") + 1
+    (tmp_path / "runs.jsonl").write_bytes(
+        content[:first_line_length] + b"x" + content[first_line_length + 1 :]
+    )
+    with pytest.raises(RuntimeError, match=f"offset {first_line_length}"):
+        SessionJournal(session_journal.journal_path).get_session_list()
+
+
+def test_repair_torn_record(tmp_path):
+    session_journal = SessionJournal(str(tmp_path / "runs.jsonl"))
+    end_offset_list = [
+        session_journal.append(create_session(sample_index))
+        for sample_index in range(3)
+    ]
+    # A crash while appending the fourth session.
+    with open(tmp_path / "runs.jsonl", "ab") as f:
+        f.write(b'{"task_name": "db_bench", "sample_index')
+    # The torn record is skipped but not removed when iterating.
+    assert [
+        session.sample_index
+        for session in SessionJournal(session_journal.journal_path).get_session_list()
+    ] == [0, 1, 2]
+    assert session_journal.get_size() > end_offset_list[-1]
+    session_journal.repair()
+    assert session_journal.get_size() == end_offset_list[-1]
+    session_journal.repair()
+    assert session_journal.get_size() == end_offset_list[-1]
+    assert session_journal.append(create_session(3)) > end_offset_list[-1]
+    assert [
+        session.sample_index
+        for session in SessionJournal(session_journal.journal_path).get_session_list()
+    ] == [0, 1, 2, 3]
+
+
+def test_repair_single_torn_record(tmp_path):
+    (tmp_path / "runs.jsonl").write_bytes(b'{"task_name": "db')
+    session_journal = SessionJournal(str(tmp_path / "runs.jsonl"))
+    session_journal.repair()
+    assert session_journal.get_size() == 0
+
+
+def test_resume_index_synchronize(tmp_path):
+    session_journal = SessionJournal(str(tmp_path / "runs.jsonl"))
+    session_resume_index = SessionResumeIndex(str(tmp_path / "runs_index.jsonl"))
+    for sample_index in range(2):
+        session = create_session(sample_index)
+        session_resume_index.append(
+            SessionMetricCalculationPartial(
+                sample_index=session.sample_index,
+                sample_status=session.sample_status,
+                evaluation_record=session.evaluation_record,
+            ),
+            session_journal.append(session),
+        )
+    # A crash between appending to the journal and appending to the index.
+    session_journal.append(create_session(2))
+    session_resume_index = SessionResumeIndex(str(tmp_path / "runs_index.jsonl"))
+    session_resume_index.synchronize(session_journal)
+    assert [
+        session_partial.sample_index
+        for session_partial in session_resume_index.get_session_partial_list()
+    ] == [0, 1, 2]
+    assert len((tmp_path / "runs_index.jsonl").read_text().splitlines()) == 3
+    # The journal is replaced by a shorter one, so the index is ahead of the journal.
+    (tmp_path / "runs.jsonl").unlink()
+    session_journal = SessionJournal(str(tmp_path / "runs.jsonl"))
+    session_journal.append(create_session(5))
+    session_resume_index = SessionResumeIndex(str(tmp_path / "runs_index.jsonl"))
+    session_resume_index.synchronize(session_journal)
+    assert [
+        session_partial.sample_index
+        for session_partial in session_resume_index.get_session_partial_list()
+    ] == [5]
+    assert session_resume_index.is_finished(5)
+    assert not session_resume_index.is_finished(0)
+    assert len((tmp_path / "runs_index.jsonl").read_text().splitlines()) == 1
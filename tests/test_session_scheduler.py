@@ -0,0 +1,152 @@
+import json
+import time
+
+import pytest
+
+from src.callbacks import Callback, CallbackArguments, CallbackHandler
+from src.run_experiment import SessionScheduler
+from src.typings import (
+    Role,
+    SampleStatus,
+    SessionEvaluationOutcome,
+    TaskName,
+)
+from src.utils import SessionJournal, SessionResumeIndex
+
+
+class FakeTask:
+    def __init__(self) -> None:
+        self.task_name = TaskName.DB_BENCH
+        self.accumulated_sample_index_list = []
+
+    def reset(self, session):
+        session.sample_status = SampleStatus.RUNNING
+        session.chat_history.inject({"role": Role.USER, "content": "question"})
+
+    def interact(self, session):
+        session.sample_status = SampleStatus.COMPLETED
+
+    def complete(self, session):
+        session.evaluation_record.outcome = SessionEvaluationOutcome.CORRECT
+
+    def accumulate_metric(self, session_partial_list):
+        self.accumulated_sample_index_list.extend(
+            session_partial.sample_index for session_partial in session_partial_list
+        )
+        return {"session_count": len(self.accumulated_sample_index_list)}
+
+
+class FakeAgent:
+    def __init__(self, failed_sample_index=None) -> None:
+        self.failed_sample_index = failed_sample_index
+
+    def inference(self, session):
+        # The later sessions finish earlier, so the sessions are not finished in the sample order.
+        time.sleep(0.02 * (10 - session.sample_index))
+        if session.sample_index == self.failed_sample_index:
+            raise RuntimeError("Agent failed.")
+        session.chat_history.inject({"role": Role.AGENT, "content": "answer"})
+
+
+class RecordingCallback(Callback):
+    def __init__(self) -> None:
+        super().__init__()
+        self.event_list = []
+
+    @classmethod
+    def is_unique(cls):
+        return True
+
+    @classmethod
+    def is_session_concurrency_safe(cls):
+        return True
+
+    def on_session_create(self, callback_args: CallbackArguments) -> None:
+        self.event_list.append(
+            ("on_session_create", callback_args.current_session.sample_index)
+        )
+
+    def on_task_complete(self, callback_args: CallbackArguments) -> None:
+        self.event_list.append(
+            ("on_task_complete", callback_args.current_session.sample_index)
+        )
+
+    def on_state_save(self, callback_args: CallbackArguments) -> None:
+        self.event_list.append(
+            ("on_state_save", callback_args.current_session.sample_index)
+        )
+
+
+class FakeLogger:
+    def info(self, message):
+        pass
+
+
+def construct_scheduler(tmp_path, worker_list):
+    callback = RecordingCallback()
+    session_journal = SessionJournal(str(tmp_path / "runs.jsonl"))
+    session_resume_index = SessionResumeIndex(str(tmp_path / "runs_index.jsonl"))
+    session_scheduler = SessionScheduler(
+        worker_list,
+        CallbackHandler({"recording_callback": callback}),
+        session_journal,
+        session_resume_index,
+        str(tmp_path / "runs.json"),
+        str(tmp_path / "metric.json"),
+        FakeLogger(),
+    )
+    return session_scheduler, callback, session_journal
+
+
+@pytest.mark.parametrize("worker_count", [1, 3])
+def test_event_order(tmp_path, worker_count):
+    worker_list = [(FakeTask(), FakeAgent()) for _ in range(worker_count)]
+    session_scheduler, callback, session_journal = construct_scheduler(
+        tmp_path, worker_list
+    )
+    sample_order = list(range(8))
+    session_scheduler.run(sample_order)
+    for event in ["on_session_create", "on_task_complete", "on_state_save"]:
+        assert [
+            sample_index for name, sample_index in callback.event_list if name == event
+        ] == sample_order
+    for sample_index in sample_order:
+        # The session is committed only after it is created, and the state is saved after it is completed.
+        assert (
+            callback.event_list.index(("on_session_create", sample_index))
+            < callback.event_list.index(("on_task_complete", sample_index))
+            < callback.event_list.index(("on_state_save", sample_index))
+        )
+    # A session is not created until a worker is released.
+    assert callback.event_list.index(
+        ("on_session_create", worker_count)
+    ) > callback.event_list.index(("on_state_save", 0))
+    session_list = session_journal.get_session_list()
+    assert [session.sample_index for session in session_list] == sample_order
+    assert all(
+        session.evaluation_record.outcome == SessionEvaluationOutcome.CORRECT
+        for session in session_list
+    )
+    # The metric is only maintained by the task of the first worker.
+    assert worker_list[0][0].accumulated_sample_index_list == sample_order
+    assert json.load(open(tmp_path / "metric.json")) == {
+        "session_count": len(sample_order)
+    }
+
+
+@pytest.mark.parametrize("worker_count", [1, 3])
+def test_worker_exception(tmp_path, worker_count):
+    worker_list = [
+        (FakeTask(), FakeAgent(failed_sample_index=2)) for _ in range(worker_count)
+    ]
+    session_scheduler, callback, session_journal = construct_scheduler(
+        tmp_path, worker_list
+    )
+    with pytest.raises(RuntimeError, match="Agent failed."):
+        session_scheduler.run(list(range(8)))
+    # The sessions before the failed one are committed, the failed one and the sessions after it are not.
+    assert [session.sample_index for session in session_journal.get_session_list()] == [
+        0,
+        1,
+    ]
+    assert ("on_task_complete", 2) not in callback.event_list
@@ -0,0 +1,160 @@
+import threading
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+rdflib = pytest.importorskip("rdflib")
+
+from src.tasks.instance.knowledge_graph.utils.sparql_executor import SparqlExecutor
+
+TRIPLE_LIST = [
+    ("m.a", "type.object.type", "m.person"),
+    ("m.b", "type.object.type", "m.person"),
+    ("m.a", "people.person.spouse", "m.b"),
+    ("m.a", "people.person.place_of_birth", "m.c"),
+]
+
+
+class LocalSparqlEndpoint:
+    """
+    An in-memory RDF graph served over the SPARQL protocol, which stands in for the Freebase endpoint.
+    """
+
+    def __init__(self):
+        graph = rdflib.Graph()
+        namespace = rdflib.Namespace("http://rdf.freebase.com/ns/")
+        for subject, predicate, obj in TRIPLE_LIST:
+            graph.add((namespace[subject], namespace[predicate], namespace[obj]))
+        self.query_list = []
+        endpoint = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                parameter_dict = urllib.parse.parse_qs(
+                    urllib.parse.urlparse(self.path).query
+                )
+                query = parameter_dict["query"][0]
+                endpoint.query_list.append(query)
+                body = graph.query(query).serialize(format="json")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/sparql-results+json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                return
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/sparql"
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def shutdown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def endpoint():
+    endpoint = LocalSparqlEndpoint()
+    yield endpoint
+    endpoint.shutdown()
+
+
+def test_normalize_query():
+    assert (
+        SparqlExecutor._normalize_query(
+            '  SELECT ?x WHERE {  # comment\n        ?x :r  "a  b" .\t}  '
+        )
+        == 'SELECT ?x WHERE { ?x :r "a  b" . }'
+    )
+    # The whitespace in the string literals and the "#" in the IRIs are kept.
+    assert SparqlExecutor._normalize_query(
+        'ASK { ?x :r "a b" }'
+    ) != SparqlExecutor._normalize_query('ASK { ?x :r "a  b" }')
+    assert (
+        SparqlExecutor._normalize_query(
+            "ASK {\n?x <http://www.w3.org/1999/02/22-rdf-syntax-ns#type> ?y }"
+        )
+        == "ASK { ?x <http://www.w3.org/1999/02/22-rdf-syntax-ns#type> ?y }"
+    )
+
+
+def test_result_cache(endpoint, tmp_path):
+    cache_path = str(tmp_path / "sparql_result_cache.sqlite")
+    sparql_executor = SparqlExecutor(endpoint.url, cache_path, memory_cache_size=2)
+    # rdflib does not accept an IRI in regex(), which is used by the get_*_relations() methods, so the other
+    #   methods are tested.
+    assert sorted(sparql_executor.execute_unary("m.person")) == ["m.a", "m.b"]
+    assert sparql_executor.execute_binary("people.person.spouse") == [
+        ("http://rdf.freebase.com/ns/m.a", "http://rdf.freebase.com/ns/m.b")
+    ]
+    assert sparql_executor.entity_type_connected("m.a", "m.person")
+    assert len(endpoint.query_list) == 3
+    # The same queries are answered from the caches, even if their indentation is different.
+    assert len(sparql_executor.execute_binary("people.person.spouse")) == 1
+    assert sparql_executor.execute_query(
+        "PREFIX : <http://rdf.freebase.com/ns/>\n"
+        "SELECT DISTINCT ?x WHERE { :m.a :people.person.spouse ?x . }"
+    ) == ["m.b"]
+    assert sparql_executor.execute_query(
+        "PREFIX : <http://rdf.freebase.com/ns/>   SELECT DISTINCT ?x\n"
+        "    WHERE {   :m.a :people.person.spouse ?x . }"
+    ) == ["m.b"]
+    assert len(endpoint.query_list) == 4
+    # The result of execute_unary() is evicted from the memory cache, and read from the file.
+    assert len(sparql_executor.execute_unary("m.person")) == 2
+    assert len(endpoint.query_list) == 4
+    statistics = sparql_executor.result_cache_statistics
+    assert (
+        statistics.memory_hit_count,
+        statistics.disk_hit_count,
+        statistics.miss_count,
+    ) == (2, 1, 4)
+    assert statistics.get_hit_rate() == pytest.approx(3 / 7)
+    sparql_executor.close()
+    # A new instance (e.g., a later run) reads the results from the file.
+    sparql_executor = SparqlExecutor(endpoint.url, cache_path)
+    assert sparql_executor.entity_type_connected("m.a", "m.person")
+    assert len(sparql_executor.execute_binary("people.person.spouse")) == 1
+    assert len(endpoint.query_list) == 4
+    assert sparql_executor.result_cache_statistics.disk_hit_count == 2
+    sparql_executor.close()
+    # The results of another endpoint are not shared.
+    other_endpoint = LocalSparqlEndpoint()
+    try:
+        sparql_executor = SparqlExecutor(other_endpoint.url, cache_path)
+        assert len(sparql_executor.execute_binary("people.person.spouse")) == 1
+        assert len(other_endpoint.query_list) == 1
+        sparql_executor.close()
+    finally:
+        other_endpoint.shutdown()
+
+
+def test_memory_cache_only(endpoint):
+    sparql_executor = SparqlExecutor(endpoint.url)
+    for _ in range(3):
+        assert sorted(sparql_executor.execute_unary("m.person")) == ["m.a", "m.b"]
+    assert len(endpoint.query_list) == 1
+    assert sparql_executor.result_cache_statistics.memory_hit_count == 2
+    sparql_executor.close()
+
+
+def test_execute_query_list(endpoint):
+    sparql_executor = SparqlExecutor(endpoint.url, memory_cache_size=0, concurrency=3)
+    query_list = [
+        "PREFIX : <http://rdf.freebase.com/ns/>\n"
+        f"SELECT DISTINCT ?x WHERE {{ ?x :type.object.type :{_type} . }}"
+        for _type in ["m.person", "m.place", "m.person", "m.organization"]
+    ]
+    # Every thread of the pool sends its queries through its own SPARQLWrapper.
+    assert sparql_executor.execute_query_list(query_list) == [
+        ["m.a", "m.b"],
+        [],
+        ["m.a", "m.b"],
+        [],
+    ]
+    assert len(endpoint.query_list) == 3
+    sparql_executor.close()